@@ -1,20 +1,29 @@
-from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
-
-class CustomUserAdmin(UserAdmin):
-    model = CustomUser
-    list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'followers_count', 'following_count']
-    list_filter = ['is_staff', 'is_superuser', 'is_active', 'groups']
-    search_fields = ['username', 'email', 'first_name', 'last_name']
-    ordering = ['username']
-    
-    fieldsets = UserAdmin.fieldsets + (
-        ('Profile Info', {'fields': ('bio', 'profile_picture', 'followers')}),
-    )
-    
-    add_fieldsets = UserAdmin.add_fieldsets + (
-        ('Profile Info', {'fields': ('bio', 'profile_picture')}),
-    )
-
-admin.site.register(CustomUser, CustomUserAdmin)
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from .graph import follow_graph
+from .models import CustomUser
+
+class CustomUserAdmin(UserAdmin):
+    model = CustomUser
+    list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'followers_count', 'following_count']
+    list_filter = ['is_staff', 'is_superuser', 'is_active', 'groups']
+    search_fields = ['username', 'email', 'first_name', 'last_name']
+    ordering = ['username']
+    
+    fieldsets = UserAdmin.fieldsets + (
+        ('Profile Info', {'fields': ('bio', 'profile_picture', 'followers')}),
+    )
+    
+    add_fieldsets = UserAdmin.add_fieldsets + (
+        ('Profile Info', {'fields': ('bio', 'profile_picture')}),
+    )
+    
+    @admin.display(description='Followers')
+    def followers_count(self, obj):
+        return follow_graph.followers_count(obj.pk)
+    
+    @admin.display(description='Following')
+    def following_count(self, obj):
+        return follow_graph.following_count(obj.pk)
+
+admin.site.register(CustomUser, CustomUserAdmin)
@@ -1,6 +1,28 @@
-from django.apps import AppConfig
-
-
-class AccountsConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts'
+from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+
+class AccountsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework.authtoken.models import Token
+
+        from . import signals
+        from .models import Follow
+
+        # Keep the in-memory follow graph in step with every follow write.
+        post_save.connect(signals.follow_saved, sender=Follow)
+        post_delete.connect(signals.follow_deleted, sender=Follow)
+        m2m_changed.connect(signals.following_changed, sender=Follow)
+
+        # Drop cached token lookups when a token or its user changes.
+        post_save.connect(signals.token_changed, sender=Token)
+        post_delete.connect(signals.token_changed, sender=Token)
+        post_save.connect(signals.user_saved, sender=get_user_model())
+
+        # Resize new profile pictures in the background.
+        pre_save.connect(signals.picture_changing, sender=get_user_model())
+        post_save.connect(signals.picture_saved, sender=get_user_model())
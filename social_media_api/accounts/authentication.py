@@ -0,0 +1,65 @@
+"""Token authentication with a cached token-to-user lookup.
+
+DRF's ``TokenAuthentication`` runs a Token JOIN User query on every request.
+``CachedTokenAuthentication`` keeps the result in the default cache for
+``AUTH_TOKEN_CACHE_TTL`` seconds. Unknown keys are cached too, as a negative
+entry for ``AUTH_TOKEN_NEGATIVE_CACHE_TTL`` seconds, so a client retrying
+with a bad token does not reach the database every time. Entries are dropped
+when a token is deleted or its user is saved, e.g. deactivated (see
+``AccountsConfig.ready``). With a per-process cache such as the default
+LocMemCache, other processes can serve a stale entry until the TTL runs out.
+
+The user's password hash is deferred, so it never reaches the cache. Code
+that needs it (a password change, say) loads it with one more query, and
+saving the user only writes the fields that were loaded.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+CACHE_PREFIX = 'auth:token:'
+# Cached in place of a (user, token) pair for keys that matched no token.
+INVALID = 'invalid'
+
+
+def get_cache_ttl():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+
+
+def get_negative_cache_ttl():
+    return getattr(settings, 'AUTH_TOKEN_NEGATIVE_CACHE_TTL', 10)
+
+
+def cache_key(key):
+    return CACHE_PREFIX + key
+
+
+def get_token(key):
+    """Return the Token (with its user loaded, password deferred) for ``key``, or None"""
+    cached = cache.get(cache_key(key))
+    if cached == INVALID:
+        return None
+    if cached is not None:
+        return cached
+    token = Token.objects.select_related('user').defer('user__password').filter(key=key).first()
+    if token is None:
+        cache.set(cache_key(key), INVALID, get_negative_cache_ttl())
+    else:
+        cache.set(cache_key(key), token, get_cache_ttl())
+    return token
+
+
+def forget_tokens(keys):
+    cache.delete_many([cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token = get_token(key)
+        if token is None:
+            raise AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return token.user, token
@@ -0,0 +1,56 @@
+"""Stored follower counts and the pull-delivery flag.
+
+``CustomUser.followers_count`` is moved by the same follow signal handlers
+and bulk paths that update the in-memory graph, in the transaction that
+writes the ``Follow`` rows. It lets the feed tell pulled authors apart with
+an indexed flag instead of counting every followee's followers per request
+(see posts/timelines.py).
+
+An author is flagged for pull delivery in the statement that takes them to
+``FEED_PULL_FOLLOWER_THRESHOLD`` followers. Losing followers never clears
+the flag here: ``manage.py release_pull_authors`` does it once they are
+below ``FEED_PUSH_FOLLOWER_THRESHOLD``, after pushing their recent posts
+into their followers' timelines.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from posts.timelines import get_pull_threshold
+from .models import Follow
+
+
+def count_follows(pairs, sign=1):
+    """Move the followers_count of each followed user in (follower_id, following_id) ``pairs`` by ``sign``"""
+    counts = Counter(following_id for _, following_id in pairs)
+    by_delta = defaultdict(list)
+    for user_id, count in counts.items():
+        by_delta[count * sign].append(user_id)
+    users = get_user_model().objects
+    threshold = get_pull_threshold()
+    for delta, user_ids in by_delta.items():
+        if delta > 0:
+            users.filter(pk__in=user_ids).update(
+                followers_count=F('followers_count') + delta,
+                # Compared against the count before this update.
+                pull_delivery=Case(
+                    When(followers_count__gte=threshold - delta, then=Value(True)),
+                    default=F('pull_delivery'),
+                ),
+            )
+        else:
+            users.filter(pk__in=user_ids).update(followers_count=Greatest(F('followers_count') + delta, 0))
+
+
+def recount_followers(users=None):
+    """Recompute followers_count from the ``Follow`` table and flag authors at the pull threshold"""
+    if users is None:
+        users = get_user_model().objects.all()
+    followers = (
+        Follow.objects.filter(following=OuterRef('pk')).order_by()
+        .values('following').annotate(count=Count('pk')).values('count')
+    )
+    users.update(followers_count=Coalesce(Subquery(followers), 0))
+    users.filter(followers_count__gte=get_pull_threshold()).update(pull_delivery=True)
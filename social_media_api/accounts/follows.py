@@ -0,0 +1,96 @@
+"""Set-based follow/unfollow for the bulk import endpoint.
+
+Users are named by id (JSON integers) or username (strings). All of them
+are resolved with one query, new follows are written with one bulk insert
+that ignores conflicts, and removed ones with one bulk delete. The work
+therefore stays flat whether a contact import names five users or five
+hundred. The in-memory follow graph, the stored follower counts and the
+follower's timeline are repaired for the whole batch at once.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from posts.timelines import backfill_follows, purge_unfollows
+from .follower_counts import count_follows
+from .graph import follow_graph
+from .models import Follow
+from .recommendations import mark_changed
+from .signals import bulk_follow_write
+
+FOLLOWED = 'followed'
+ALREADY_FOLLOWING = 'already_following'
+UNFOLLOWED = 'unfollowed'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+def _resolve(user, identifiers):
+    """Map each identifier to (user id, already followed) for the users that exist"""
+    ids = [identifier for identifier in identifiers if isinstance(identifier, int)]
+    usernames = [identifier for identifier in identifiers if isinstance(identifier, str)]
+    rows = (
+        get_user_model().objects.filter(Q(pk__in=ids) | Q(username__in=usernames))
+        .annotate(followed=Exists(Follow.objects.filter(follower=user, following=OuterRef('pk'))))
+        .values_list('pk', 'username', 'followed')
+    )
+    resolved = {}
+    for pk, username, followed in rows:
+        resolved[pk] = resolved[username] = (pk, followed)
+    return {identifier: resolved[identifier] for identifier in identifiers if identifier in resolved}
+
+
+def follow_users(user, identifiers):
+    """Follow every user in ``identifiers``; returns ``{identifier: (user id, status)}``."""
+    identifiers = list(dict.fromkeys(identifiers))
+    with transaction.atomic():
+        resolved = _resolve(user, identifiers)
+        new_ids = {pk for pk, followed in resolved.values() if not followed and pk != user.pk}
+        if new_ids:
+            Follow.objects.bulk_create(
+                [Follow(follower=user, following_id=pk) for pk in new_ids],
+                ignore_conflicts=True,
+            )
+            follow_graph.add_edges((user.pk, pk) for pk in new_ids)
+            count_follows((user.pk, pk) for pk in new_ids)
+            mark_changed([user.pk])
+            backfill_follows(user, new_ids)
+
+    results = {}
+    for identifier in identifiers:
+        if identifier not in resolved:
+            results[identifier] = (None, NOT_FOUND)
+            continue
+        pk, followed = resolved[identifier]
+        if pk == user.pk:
+            results[identifier] = (pk, SELF)
+        elif followed:
+            results[identifier] = (pk, ALREADY_FOLLOWING)
+        else:
+            results[identifier] = (pk, FOLLOWED)
+    return results
+
+
+def unfollow_users(user, identifiers):
+    """Unfollow every user in ``identifiers``; returns ``{identifier: (user id, status)}``."""
+    identifiers = list(dict.fromkeys(identifiers))
+    with transaction.atomic():
+        resolved = _resolve(user, identifiers)
+        removed_ids = {pk for pk, followed in resolved.values() if followed}
+        if removed_ids:
+            with bulk_follow_write():
+                Follow.objects.filter(follower=user, following_id__in=removed_ids).delete()
+            follow_graph.remove_edges((user.pk, pk) for pk in removed_ids)
+            count_follows(((user.pk, pk) for pk in removed_ids), -1)
+            mark_changed([user.pk])
+            purge_unfollows(user, removed_ids)
+
+    results = {}
+    for identifier in identifiers:
+        if identifier not in resolved:
+            results[identifier] = (None, NOT_FOUND)
+            continue
+        pk, followed = resolved[identifier]
+        results[identifier] = (pk, UNFOLLOWED if followed else NOT_FOLLOWING)
+    return results
@@ -0,0 +1,211 @@
+"""In-memory follow graph.
+
+Each process keeps both directions of ``Follow`` as adjacency sets of user
+ids, so follower/following counts are a ``len()`` and membership is a set
+lookup instead of a COUNT or EXISTS query per user. The graph is loaded from
+the table on first use (``warm_start`` does it at server boot, see
+``wsgi.py``/``asgi.py``) and kept current by the follow signals registered in
+``AccountsConfig.ready``. Writes that bypass signals, such as
+``Follow.objects.bulk_create``, must call ``add_edges``/``remove_edges``
+themselves. Edge changes are applied when the surrounding transaction
+commits, so a rollback leaves the graph alone.
+
+Every change is also written to the ``FollowChange`` log in the transaction
+that writes the follow, so it commits or rolls back with it. At most every
+``FOLLOW_GRAPH_CHECK_INTERVAL`` seconds each process replays the log rows
+past its position. It only reloads the whole table on first use, every
+``FOLLOW_GRAPH_MAX_AGE`` seconds if that is set, or after going unchecked
+for half of ``LOG_RETENTION``. Log ids are assigned on insert but can commit
+out of order, so the position only moves past rows older than
+``SETTLE_SECONDS``. Newer rows are replayed again on the next check, along
+with any row that committed late beneath them; replaying in id order is
+idempotent. The graph may lag behind the table by up to the check interval;
+it serves counts, membership checks and the feed's pulled-author lookup,
+while fan-out reads the ``Follow`` table (see posts/timelines.py).
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Follow, FollowChange
+
+# Rows fetched per round trip while loading.
+LOAD_CHUNK_SIZE = 10000
+# Longest a follow transaction is expected to stay open between logging a
+# change and committing it.
+SETTLE_SECONDS = 5
+# Log rows older than this are deleted on load and then at most once per
+# period per process.
+# A process that has not checked the log for half as long reloads instead.
+LOG_RETENTION = 3600
+
+
+def get_max_age():
+    return getattr(settings, 'FOLLOW_GRAPH_MAX_AGE', None)
+
+
+def get_check_interval():
+    return getattr(settings, 'FOLLOW_GRAPH_CHECK_INTERVAL', 1)
+
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+
+
+def _log(pairs, added):
+    FollowChange.objects.bulk_create([
+        FollowChange(follower_id=follower_id, following_id=following_id, added=added)
+        for follower_id, following_id in pairs
+    ])
+
+
+def prune_log():
+    """Delete log rows every process has had ample time to replay"""
+    FollowChange.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=LOG_RETENTION)).delete()
+
+
+class FollowGraph:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.following = {}
+        self.followers = {}
+        self.loaded_at = None
+        self.checked_at = None
+        self.pruned_at = None
+        # Id of the newest log row already reflected, with every row below it.
+        self.position = None
+
+    def load(self):
+        """Rebuild both adjacency maps from the ``Follow`` table"""
+        following, followers = {}, {}
+        with self.lock:
+            prune_log()
+            # Unsettled rows may postdate the table read; they are replayed on top of it.
+            position = FollowChange.objects.filter(created_at__lt=_settled_before()).aggregate(Max('pk'))['pk__max']
+            rows = Follow.objects.values_list('follower_id', 'following_id').iterator(chunk_size=LOAD_CHUNK_SIZE)
+            for follower_id, following_id in rows:
+                following.setdefault(follower_id, set()).add(following_id)
+                followers.setdefault(following_id, set()).add(follower_id)
+            self.following, self.followers = following, followers
+            self.position = position or 0
+            self.loaded_at = self.checked_at = self.pruned_at = time.monotonic()
+
+    def reset(self):
+        """Forget everything; the next read reloads from the table"""
+        with self.lock:
+            self.following, self.followers = {}, {}
+            self.loaded_at = self.checked_at = self.pruned_at = self.position = None
+
+    def catch_up(self):
+        """Replay the follow changes logged past our position"""
+        settled_before = _settled_before()
+        changes = (
+            FollowChange.objects.filter(pk__gt=self.position).order_by('pk')
+            .values_list('pk', 'follower_id', 'following_id', 'added', 'created_at')
+        )
+        with self.lock:
+            settled = True
+            for pk, follower_id, following_id, added, created_at in changes:
+                if added:
+                    self._add(follower_id, following_id)
+                else:
+                    self._remove(follower_id, following_id)
+                settled = settled and created_at < settled_before
+                if settled:
+                    self.position = pk
+            self.checked_at = time.monotonic()
+
+    def ensure_loaded(self):
+        now = time.monotonic()
+        max_age = get_max_age()
+        if (
+            self.loaded_at is None
+            or (max_age is not None and now - self.loaded_at > max_age)
+            or now - self.checked_at > LOG_RETENTION / 2
+        ):
+            self.load()
+            return
+        interval = get_check_interval()
+        if interval is not None and now - self.checked_at >= interval:
+            self.catch_up()
+            if now - self.pruned_at > LOG_RETENTION:
+                self.pruned_at = now
+                prune_log()
+
+    def add_edges(self, pairs):
+        """Log (follower_id, following_id) pairs and record them here once the current transaction commits"""
+        pairs = list(pairs)
+        _log(pairs, added=True)
+        transaction.on_commit(lambda: self.apply(added=pairs))
+
+    def remove_edges(self, pairs):
+        """Log (follower_id, following_id) pairs and drop them here once the current transaction commits"""
+        pairs = list(pairs)
+        _log(pairs, added=False)
+        transaction.on_commit(lambda: self.apply(removed=pairs))
+
+    def apply(self, added=(), removed=()):
+        """Apply committed edge changes to this process's graph"""
+        with self.lock:
+            if self.loaded_at is None:
+                return
+            for follower_id, following_id in added:
+                self._add(follower_id, following_id)
+            for follower_id, following_id in removed:
+                self._remove(follower_id, following_id)
+
+    def _add(self, follower_id, following_id):
+        self.following.setdefault(follower_id, set()).add(following_id)
+        self.followers.setdefault(following_id, set()).add(follower_id)
+
+    def _remove(self, follower_id, following_id):
+        _discard(self.following, follower_id, following_id)
+        _discard(self.followers, following_id, follower_id)
+
+    def following_ids(self, user_id):
+        """Snapshot of the ids ``user_id`` follows"""
+        self.ensure_loaded()
+        with self.lock:
+            return frozenset(self.following.get(user_id, ()))
+
+    def follower_ids(self, user_id):
+        """Snapshot of the ids following ``user_id``"""
+        self.ensure_loaded()
+        with self.lock:
+            return frozenset(self.followers.get(user_id, ()))
+
+    def following_count(self, user_id):
+        self.ensure_loaded()
+        return len(self.following.get(user_id, ()))
+
+    def followers_count(self, user_id):
+        self.ensure_loaded()
+        return len(self.followers.get(user_id, ()))
+
+    def follows(self, follower_id, following_id):
+        self.ensure_loaded()
+        return following_id in self.following.get(follower_id, ())
+
+
+def _discard(adjacency, key, value):
+    neighbours = adjacency.get(key)
+    if neighbours is not None:
+        neighbours.discard(value)
+        if not neighbours:
+            del adjacency[key]
+
+
+follow_graph = FollowGraph()
+
+
+def warm_start():
+    """Load the graph before the first request; a missing table is left for lazy loading"""
+    try:
+        follow_graph.load()
+    except DatabaseError:
+        follow_graph.reset()
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as BasePBKDF2PasswordHasher
+
+
+class PBKDF2PasswordHasher(BasePBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the work factor taken from ``PASSWORD_PBKDF2_ITERATIONS``.
+
+    Hashes stored with a different iteration count are upgraded on the next
+    successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', BasePBKDF2PasswordHasher.iterations)
@@ -0,0 +1,55 @@
+"""Bounded worker pool for password hashing.
+
+PBKDF2 costs hundreds of milliseconds of CPU per check. The async login
+view (``accounts.views.login``) hands it to this pool so the event loop,
+and every other request it serves, keeps running during a login storm.
+The jobs are pure functions with no database access. ``hashlib`` releases
+the GIL while it derives the key, so the worker threads hash in parallel.
+
+At most ``LOGIN_HASHER_WORKERS`` hashes run at once and at most
+``LOGIN_HASHER_QUEUE_DEPTH`` more wait. Anything beyond that is refused
+with ``PoolSaturated`` straight away, and the view turns that into a 503.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers, queue_depth):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self.limit = workers + queue_depth
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    async def run(self, func, *args):
+        with self.lock:
+            if self.pending >= self.limit:
+                raise PoolSaturated
+            self.pending += 1
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = HashingPool(
+            getattr(settings, 'LOGIN_HASHER_WORKERS', 4),
+            getattr(settings, 'LOGIN_HASHER_QUEUE_DEPTH', 32),
+        )
+    return _pool
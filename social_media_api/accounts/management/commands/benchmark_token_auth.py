@@ -0,0 +1,40 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.authentication import CachedTokenAuthentication, cache_key
+from social_media_api.benchmarks import benchmark_user
+
+
+class Command(BaseCommand):
+    help = 'Compare database round-trips and throughput of plain versus cached token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with benchmark_user('auth') as user:
+            token = Token.objects.create(user=user)
+            request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {token.key}'))
+            try:
+                for name, backend in (('plain', TokenAuthentication()), ('cached', CachedTokenAuthentication())):
+                    queries, rate = self.run(backend, request, options['requests'])
+                    self.stdout.write(f'{name}: {queries} queries for {options["requests"]} requests, {rate:,.0f} requests/s')
+            finally:
+                cache.delete(cache_key(token.key))
+        self.stdout.write(self.style.SUCCESS('done'))
+
+    def run(self, backend, request, count):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                backend.authenticate(request)
+            elapsed = time.perf_counter() - start
+        return len(queries), count / elapsed
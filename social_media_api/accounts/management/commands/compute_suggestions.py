@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.recommendations import compute_suggestions, refresh_changed
+
+
+class Command(BaseCommand):
+    help = 'Precompute friends-of-friends follow suggestions (incremental unless --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every user instead of only those whose follows changed')
+
+    def handle(self, *args, **options):
+        try:
+            refreshed = compute_suggestions() if options['full'] else refresh_changed()
+        except ImportError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Refreshed suggestions for {refreshed} user(s)'))
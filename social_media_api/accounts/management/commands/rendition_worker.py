@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.renditions import process
+
+
+class Command(BaseCommand):
+    help = 'Render queued profile pictures into pre-sized renditions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Process what is pending and exit')
+
+    def handle(self, *args, **options):
+        rendered = 0
+        while True:
+            processed = process(options['batch_size'])
+            rendered += processed
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {rendered} profile picture job(s)'))
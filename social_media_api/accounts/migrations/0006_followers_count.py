@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_followers(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+    followers = (
+        Follow.objects.filter(following=models.OuterRef('pk')).order_by()
+        .values('following').annotate(count=models.Count('pk')).values('count')
+    )
+    CustomUser.objects.update(followers_count=Coalesce(models.Subquery(followers), 0))
+    threshold = getattr(settings, 'FEED_PULL_FOLLOWER_THRESHOLD', 10000)
+    CustomUser.objects.filter(followers_count__gte=threshold).update(pull_delivery=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_customuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='pull_delivery',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(count_followers, migrations.RunPython.noop),
+    ]
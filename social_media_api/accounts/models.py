@@ -1,39 +1,97 @@
-# accounts/models.py
-from django.contrib.auth.models import AbstractUser
-from django.db import models
-
-class User(AbstractUser):
-    bio = models.TextField(max_length=500, blank=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
-    
-    # Many-to-many relationship for following
-    following = models.ManyToManyField(
-        'self', 
-        through='Follow',
-        related_name='followers',
-        symmetrical=False,
-        blank=True
-    )
-    
-    def __str__(self):
-        return self.username
-
-class Follow(models.Model):
-    """Intermediate model for user follows"""
-    follower = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='user_following'
-    )
-    following = models.ForeignKey(
-        User, 
-        on_delete=models.CASCADE, 
-        related_name='user_followers'
-    )
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        unique_together = ('follower', 'following')
-        
-    def __str__(self):
-        return f"{self.follower.username} follows {self.following.username}"
+# accounts/models.py
+from django.contrib.auth.models import AbstractUser
+from django.db import models
+
+class CustomUser(AbstractUser):
+    bio = models.TextField(max_length=500, blank=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Pre-sized copies of profile_picture by rendition name (see accounts/renditions.py)
+    profile_picture_renditions = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kept in step with Follow writes (see accounts/follower_counts.py)
+    followers_count = models.PositiveIntegerField(default=0)
+    # Posts reach followers by pull at read time instead of fan-out (see posts/timelines.py)
+    pull_delivery = models.BooleanField(default=False, db_index=True)
+    
+    # Many-to-many relationship for following
+    following = models.ManyToManyField(
+        'self', 
+        through='Follow',
+        related_name='followers',
+        symmetrical=False,
+        blank=True
+    )
+    
+    def __str__(self):
+        return self.username
+
+class Follow(models.Model):
+    """Intermediate model for user follows"""
+    follower = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE, 
+        related_name='user_following'
+    )
+    following = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE, 
+        related_name='user_followers'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('follower', 'following')
+        
+    def __str__(self):
+        return f"{self.follower.username} follows {self.following.username}"
+
+
+class FollowChange(models.Model):
+    """A follow edge added or removed, replayed by every process's follow graph (see accounts/graph.py).
+
+    Plain ids rather than foreign keys: changes are logged from follow delete
+    signals, including the cascade that runs while a user is deleted.
+    """
+    follower_id = models.BigIntegerField()
+    following_id = models.BigIntegerField()
+    added = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class FollowSuggestion(models.Model):
+    """Precomputed "who to follow" candidate (see accounts/recommendations.py)"""
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    candidate = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Number of people the user follows who follow the candidate
+    score = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx'),
+        ]
+
+
+class SuggestionRefresh(models.Model):
+    """Marks a user whose outgoing follows changed since the last suggestion run.
+
+    A plain id rather than a foreign key: markers are written from follow
+    delete signals, including the cascade that runs while the user is deleted.
+    """
+    user_id = models.BigIntegerField(primary_key=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+
+class RenditionJob(models.Model):
+    """A profile picture waiting for `manage.py rendition_worker` to resize it"""
+    user_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
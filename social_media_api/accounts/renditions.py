@@ -0,0 +1,130 @@
+"""Pre-sized profile picture renditions.
+
+Uploads are streamed to a temporary file on disk (``FILE_UPLOAD_HANDLERS``)
+and stored as they are. Saving a new picture queues a ``RenditionJob``.
+``manage.py rendition_worker`` then crops the picture to squares of the
+sizes in ``PROFILE_PICTURE_RENDITIONS``, re-encodes them at
+``PROFILE_PICTURE_QUALITY`` and records their paths in
+``profile_picture_renditions``. Serializers link the rendition that fits
+the slot, so a 48px avatar costs a couple of kilobytes instead of the
+original upload.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import RenditionJob
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 'WEBP'
+EXTENSION = 'webp'
+
+
+def get_rendition_sizes():
+    return getattr(settings, 'PROFILE_PICTURE_RENDITIONS', {'small': 48, 'medium': 96, 'large': 256})
+
+
+def get_quality():
+    return getattr(settings, 'PROFILE_PICTURE_QUALITY', 80)
+
+
+def enqueue(user_id):
+    RenditionJob.objects.create(user_id=user_id)
+
+
+def render(source_name):
+    """Write every rendition of ``source_name``; returns {rendition name: storage path}"""
+    with default_storage.open(source_name) as source:
+        image = Image.open(source)
+        image.draft('RGB', (max(get_rendition_sizes().values()),) * 2)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    # The source name goes into the path so a new picture gets new URLs.
+    digest = hashlib.sha1(source_name.encode()).hexdigest()[:12]
+    renditions = {}
+    for name, size in get_rendition_sizes().items():
+        output = BytesIO()
+        ImageOps.fit(image, (size, size), Image.LANCZOS).save(output, FORMAT, quality=get_quality())
+        path = f'profile_pics/renditions/{name}-{size}-{digest}.{EXTENSION}'
+        default_storage.delete(path)
+        renditions[name] = default_storage.save(path, ContentFile(output.getvalue()))
+    return renditions
+
+
+def record(user_id, source_name, renditions):
+    """Store the renditions of ``source_name`` unless the user has another picture by now.
+
+    Only this write locks the user row. Files no longer referenced, the old
+    renditions or a stale result, are deleted after the transaction.
+    """
+    UserModel = get_user_model()
+    with transaction.atomic():
+        user = UserModel.objects.select_for_update().only('profile_picture', 'profile_picture_renditions').filter(
+            pk=user_id,
+        ).first()
+        current = set(user.profile_picture_renditions.values()) if user is not None else set()
+        if user is None or (user.profile_picture.name or '') != source_name:
+            # Replaced while rendering; the new picture has a job of its own.
+            unused = set(renditions.values()) - current
+        else:
+            unused = current - set(renditions.values())
+            UserModel.objects.filter(pk=user_id).update(profile_picture_renditions=renditions, updated_at=timezone.now())
+    for path in unused:
+        default_storage.delete(path)
+
+
+def process(batch_size=100):
+    """Render the pictures of up to ``batch_size`` queued jobs; returns how many jobs were processed
+
+    Jobs are claimed by deleting them in a short transaction, and pictures
+    are decoded and resized with no transaction open. Jobs left unfinished
+    by an unexpected error are queued again.
+    """
+    with transaction.atomic():
+        jobs = RenditionJob.objects.order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        jobs = list(jobs[:batch_size])
+        if not jobs:
+            return 0
+        RenditionJob.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    pictures = list(get_user_model().objects.filter(pk__in={job.user_id for job in jobs}).values_list(
+        'pk', 'profile_picture',
+    ))
+    done = 0
+    try:
+        for user_id, source_name in pictures:
+            renditions = {}
+            if source_name:
+                try:
+                    renditions = render(source_name)
+                except (OSError, Image.DecompressionBombError):
+                    logger.warning('Could not render profile picture %s', source_name, exc_info=True)
+            record(user_id, source_name or '', renditions)
+            done += 1
+    finally:
+        RenditionJob.objects.bulk_create([RenditionJob(user_id=user_id) for user_id, _ in pictures[done:]])
+    return len(jobs)
+
+
+def rendition_urls(user, request=None):
+    """{rendition name: URL} for a user, or None until the picture has been processed"""
+    return urls_for(user.profile_picture_renditions, request)
+
+
+def urls_for(renditions, request=None):
+    """URLs of a ``profile_picture_renditions`` value"""
+    if not renditions:
+        return None
+    urls = {name: default_storage.url(path) for name, path in renditions.items()}
+    if request is not None:
+        urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+    return urls
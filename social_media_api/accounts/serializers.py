@@ -1,59 +1,93 @@
-from rest_framework import serializers
-from rest_framework.authtoken.models import Token
-from django.contrib.auth import get_user_model, authenticate
-from django.contrib.auth.password_validation import validate_password
-
-User = get_user_model()
-
-class UserRegistrationSerializer(serializers.ModelSerializer):
-    password = serializers.CharField(write_only=True, validators=[validate_password])
-    password_confirm = serializers.CharField(write_only=True)
-    
-    class Meta:
-        model = User
-        fields = ('username', 'email', 'password', 'password_confirm', 'bio', 'profile_picture')
-        
-    def validate(self, attrs):
-        if attrs['password'] != attrs['password_confirm']:
-            raise serializers.ValidationError("Passwords don't match")
-        return attrs
-    
-    def create_user(self, validated_data):
-        """Create a new user and return the token"""
-        validated_data.pop('password_confirm')
-        user = get_user_model().objects.create_user(**validated_data)
-        # Create token for the user
-        Token.objects.create(user=user)
-        return user
-
-class UserLoginSerializer(serializers.Serializer):
-    username = serializers.CharField()
-    password = serializers.CharField(write_only=True)
-    
-    def validate(self, attrs):
-        username = attrs.get('username')
-        password = attrs.get('password')
-        
-        if username and password:
-            user = authenticate(username=username, password=password)
-            if not user:
-                raise serializers.ValidationError('Invalid credentials')
-            if not user.is_active:
-                raise serializers.ValidationError('User account is disabled')
-            attrs['user'] = user
-        return attrs
-
-class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count')
-        read_only_fields = ('id', 'followers_count', 'following_count')
-        
-    def get_followers_count(self, obj):
-        return obj.followers.count()
-        
-    def get_following_count(self, obj):
-        return obj.following.count()
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth.password_validation import validate_password
+from .graph import follow_graph
+
+User = get_user_model()
+
+class UserRegistrationSerializer(serializers.ModelSerializer):
+    password = serializers.CharField(write_only=True, validators=[validate_password])
+    password_confirm = serializers.CharField(write_only=True)
+    
+    class Meta:
+        model = User
+        fields = ('username', 'email', 'password', 'password_confirm', 'bio', 'profile_picture')
+        
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password_confirm']:
+            raise serializers.ValidationError("Passwords don't match")
+        return attrs
+    
+    def create(self, validated_data):
+        """Create a new user and return the token"""
+        validated_data.pop('password_confirm')
+        user = get_user_model().objects.create_user(**validated_data)
+        # Create token for the user
+        Token.objects.create(user=user)
+        return user
+
+class UserLoginSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(write_only=True)
+    
+    def validate(self, attrs):
+        username = attrs.get('username')
+        password = attrs.get('password')
+        
+        if username and password:
+            user = authenticate(username=username, password=password)
+            if not user:
+                raise serializers.ValidationError('Invalid credentials')
+            if not user.is_active:
+                raise serializers.ValidationError('User account is disabled')
+            attrs['user'] = user
+        return attrs
+
+class UserSerializer(serializers.ModelSerializer):
+    followers_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count')
+        read_only_fields = ('id', 'followers_count', 'following_count')
+        
+    def get_followers_count(self, obj):
+        return follow_graph.followers_count(obj.pk)
+        
+    def get_following_count(self, obj):
+        return follow_graph.following_count(obj.pk)
+
+
+class UserIdentifierField(serializers.Field):
+    """A user id (JSON integer) or username (string)"""
+    default_error_messages = {'invalid': 'Expected a user id or username.'}
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)) or data == '':
+            self.fail('invalid')
+        return data
+        
+    def to_representation(self, value):
+        return value
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Input for the bulk follow/unfollow endpoint"""
+    follow = serializers.ListField(child=UserIdentifierField(), required=False, max_length=500)
+    unfollow = serializers.ListField(child=UserIdentifierField(), required=False, max_length=500)
+    
+    def validate(self, attrs):
+        if not attrs.get('follow') and not attrs.get('unfollow'):
+            raise serializers.ValidationError('Provide user ids or usernames to follow or unfollow')
+        if set(attrs.get('follow', [])) & set(attrs.get('unfollow', [])):
+            raise serializers.ValidationError('A user cannot be followed and unfollowed in the same request')
+        return attrs
+
+
+class FollowSuggestionSerializer(serializers.Serializer):
+    """A suggested user and how many of the people you follow follow them"""
+    id = serializers.IntegerField(source='candidate.id')
+    username = serializers.CharField(source='candidate.username')
+    score = serializers.IntegerField()
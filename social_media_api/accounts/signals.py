@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+from .follower_counts import count_follows
+from .graph import follow_graph
+from .models import Follow
+from .recommendations import mark_changed
+from .renditions import enqueue as enqueue_renditions
+
+# Set while accounts.follows deletes follows in bulk; it updates the graph, the
+# follower counts and the suggestion markers once for the whole batch instead
+# of once per row.
+_bulk_write = ContextVar('bulk_follow_write', default=False)
+
+
+@contextmanager
+def bulk_follow_write():
+    token = _bulk_write.set(True)
+    try:
+        yield
+    finally:
+        _bulk_write.reset(token)
+
+
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.add_edges([(instance.follower_id, instance.following_id)])
+        count_follows([(instance.follower_id, instance.following_id)])
+        mark_changed([instance.follower_id])
+
+
+def follow_deleted(sender, instance, **kwargs):
+    if _bulk_write.get():
+        return
+    follow_graph.remove_edges([(instance.follower_id, instance.following_id)])
+    count_follows([(instance.follower_id, instance.following_id)], -1)
+    mark_changed([instance.follower_id])
+
+
+def following_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mirror ``user.following`` / ``user.followers`` add, remove and clear"""
+    if action == 'pre_clear':
+        # pk_set is not given for clear(); read the rows about to go.
+        rows = Follow.objects.filter(**{'following' if reverse else 'follower': instance})
+        instance._cleared_follow_pairs = list(rows.values_list('follower_id', 'following_id'))
+        return
+    if action == 'post_clear':
+        pairs = instance.__dict__.pop('_cleared_follow_pairs', [])
+        follow_graph.remove_edges(pairs)
+        mark_changed(follower_id for follower_id, _ in pairs)
+        return
+    if action not in ('post_add', 'post_remove'):
+        return
+    pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+    if action == 'post_add':
+        follow_graph.add_edges(pairs)
+        count_follows(pairs)
+    else:
+        # Counted by follow_deleted: remove() and clear() delete the Follow rows with signals.
+        follow_graph.remove_edges(pairs)
+    mark_changed(follower_id for follower_id, _ in pairs)
+
+
+def token_changed(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Cached tokens carry a copy of the user; drop them on any change,
+    # deactivation included, except the last_login stamp written at login.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    forget_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+def picture_changing(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note whether this save changes the profile picture.
+
+    A new upload is not committed to storage yet; anything else (a stored
+    name assigned, the picture cleared) is compared with the saved row.
+    """
+    instance._picture_changed = False
+    if raw or 'profile_picture' in instance.get_deferred_fields():
+        return
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    picture = instance.profile_picture
+    if picture and not picture._committed:
+        instance._picture_changed = True
+        return
+    saved = None
+    if not instance._state.adding:
+        saved = sender.objects.filter(pk=instance.pk).values_list('profile_picture', flat=True).first()
+    instance._picture_changed = (picture.name or '') != (saved or '')
+
+
+def picture_saved(sender, instance, **kwargs):
+    """Queue renditions when a user's profile picture changed"""
+    if getattr(instance, '_picture_changed', False):
+        enqueue_renditions(instance.pk)
+    instance._picture_changed = False
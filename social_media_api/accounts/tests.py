@@ -1,3 +1,613 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models.signals import post_init
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import APITestCase
+from .authentication import CachedTokenAuthentication, cache_key
+from . import hashing, recommendations, renditions
+from .graph import follow_graph
+from posts.models import Post, TimelineEntry
+from posts.serializers import AuthorSerializer
+from .models import Follow, FollowChange, FollowSuggestion, RenditionJob, SuggestionRefresh
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+
+class FollowGraphTest(APITestCase):
+    """Test the in-memory follow graph"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.carol = User.objects.create_user(username='carol', password='testpass123')
+        
+    def test_warm_start_loads_existing_follows(self):
+        """Test loading builds both directions from the table"""
+        Follow.objects.bulk_create([
+            Follow(follower=self.alice, following=self.bob),
+            Follow(follower=self.carol, following=self.bob),
+        ])
+        follow_graph.load()
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), {self.alice.pk, self.carol.pk})
+        self.assertEqual(follow_graph.following_ids(self.alice.pk), {self.bob.pk})
+        self.assertTrue(follow_graph.follows(self.alice.pk, self.bob.pk))
+        self.assertFalse(follow_graph.follows(self.bob.pk, self.alice.pk))
+        
+    def test_tracks_m2m_writes(self):
+        """Test add, remove and clear on the following relation update the graph"""
+        follow_graph.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.add(self.bob, self.carol)
+            self.carol.followers.add(self.bob)
+        self.assertEqual(follow_graph.following_count(self.alice.pk), 2)
+        self.assertEqual(follow_graph.followers_count(self.carol.pk), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.remove(self.bob)
+        self.assertFalse(follow_graph.follows(self.alice.pk, self.bob.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.carol.followers.clear()
+        self.assertEqual(follow_graph.followers_count(self.carol.pk), 0)
+        self.assertEqual(follow_graph.following_count(self.alice.pk), 0)
+        
+    def test_tracks_model_writes(self):
+        """Test creating and deleting Follow rows, including by cascade"""
+        follow_graph.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.alice, following=self.bob)
+            Follow.objects.create(follower=self.bob, following=self.carol)
+        self.assertTrue(follow_graph.follows(self.alice.pk, self.bob.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.delete()
+        self.assertEqual(follow_graph.following_count(self.alice.pk), 0)
+        self.assertEqual(follow_graph.followers_count(self.carol.pk), 0)
+        
+    def test_rolled_back_writes_are_not_applied(self):
+        """Test edges only change once the transaction commits"""
+        follow_graph.load()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.alice.following.add(self.bob)
+        self.assertFalse(follow_graph.follows(self.alice.pk, self.bob.pk))
+        # A rollback discards the callbacks; committing runs them.
+        for callback in callbacks:
+            callback()
+        self.assertTrue(follow_graph.follows(self.alice.pk, self.bob.pk))
+        
+    @override_settings(FOLLOW_GRAPH_CHECK_INTERVAL=0)
+    def test_replays_writes_from_another_process(self):
+        """Test follows logged elsewhere are replayed without reloading the table"""
+        follow_graph.load()
+        # As if written by another process: no signals, no graph update here.
+        Follow.objects.bulk_create([Follow(follower=self.alice, following=self.bob)])
+        FollowChange.objects.create(follower_id=self.alice.pk, following_id=self.bob.pk, added=True)
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.follows(self.alice.pk, self.bob.pk))
+        FollowChange.objects.create(follower_id=self.alice.pk, following_id=self.bob.pk, added=False)
+        with self.assertNumQueries(1):
+            self.assertFalse(follow_graph.follows(self.alice.pk, self.bob.pk))
+        
+    @override_settings(FOLLOW_GRAPH_CHECK_INTERVAL=0)
+    def test_replays_changes_that_commit_late(self):
+        """Test a change committed below the position of a newer one is still replayed"""
+        follow_graph.load()
+        early = FollowChange.objects.create(follower_id=self.alice.pk, following_id=self.bob.pk, added=True)
+        late = FollowChange.objects.create(follower_id=self.carol.pk, following_id=self.bob.pk, added=True)
+        self.assertLess(early.pk, late.pk)
+        # Only the newer change has committed so far.
+        FollowChange.objects.filter(pk=early.pk).delete()
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), {self.carol.pk})
+        FollowChange.objects.bulk_create([early])
+        self.assertEqual(follow_graph.follower_ids(self.bob.pk), {self.alice.pk, self.carol.pk})
+        
+    @override_settings(FOLLOW_GRAPH_MAX_AGE=0)
+    def test_reloads_after_max_age(self):
+        """Test writes that bypass signals are seen after a reload"""
+        follow_graph.load()
+        Follow.objects.bulk_create([Follow(follower=self.alice, following=self.bob)])
+        self.assertTrue(follow_graph.follows(self.alice.pk, self.bob.pk))
+        
+    def test_serializer_counts_without_queries(self):
+        """Test follower counts are served from the graph"""
+        self.alice.following.add(self.bob)
+        self.carol.following.add(self.bob)
+        follow_graph.load()
+        with self.assertNumQueries(0):
+            data = UserSerializer(self.bob).data
+        self.assertEqual(data['followers_count'], 2)
+        self.assertEqual(data['following_count'], 0)
+
+
+class FollowerCountTest(APITestCase):
+    """Test the stored follower counts and pull-delivery flag"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(3)]
+        
+    def followers_count(self):
+        self.author.refresh_from_db()
+        return self.author.followers_count
+        
+    @override_settings(FEED_PULL_FOLLOWER_THRESHOLD=2)
+    def test_counts_follow_writes(self):
+        """Test model, m2m and bulk writes move the count and flag authors at the threshold"""
+        Follow.objects.create(follower=self.fans[0], following=self.author)
+        self.assertEqual(self.followers_count(), 1)
+        self.assertFalse(self.author.pull_delivery)
+        self.author.followers.add(self.fans[1], self.fans[2])
+        self.assertEqual(self.followers_count(), 3)
+        self.assertTrue(self.author.pull_delivery)
+        self.fans[1].following.remove(self.author)
+        self.assertEqual(self.followers_count(), 2)
+        self.author.followers.clear()
+        self.assertEqual(self.followers_count(), 0)
+        # Only release_pull_authors clears the flag.
+        self.assertTrue(self.author.pull_delivery)
+        
+    def test_recount_repairs_drift(self):
+        """Test the --recount option rebuilds counts from the table"""
+        Follow.objects.bulk_create([Follow(follower=fan, following=self.author) for fan in self.fans])
+        self.assertEqual(self.followers_count(), 0)
+        call_command('release_pull_authors', '--recount', stdout=StringIO())
+        self.assertEqual(self.followers_count(), 3)
+
+
+class BulkFollowTest(APITestCase):
+    """Test bulk follow/unfollow"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='importer', password='testpass123')
+        self.contacts = [User.objects.create_user(username=f'contact{i}', password='testpass123') for i in range(4)]
+        self.client.force_authenticate(user=self.user)
+        
+    def bulk(self, **body):
+        response = self.client.post(reverse('bulk_follow'), body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item['user']: (item['id'], item['status']) for item in response.data['results']}
+        
+    def test_follow_by_id_and_username(self):
+        """Test ids and usernames resolve in one request with per-entry status"""
+        Follow.objects.create(follower=self.user, following=self.contacts[0])
+        statuses = self.bulk(follow=[self.contacts[0].pk, 'contact1', self.contacts[2].pk, 'nobody', 'importer'])
+        self.assertEqual(statuses, {
+            self.contacts[0].pk: (self.contacts[0].pk, 'already_following'),
+            'contact1': (self.contacts[1].pk, 'followed'),
+            self.contacts[2].pk: (self.contacts[2].pk, 'followed'),
+            'nobody': (None, 'not_found'),
+            'importer': (self.user.pk, 'self'),
+        })
+        self.assertEqual(Follow.objects.filter(follower=self.user).count(), 3)
+        self.assertEqual(follow_graph.following_count(self.user.pk), 3)
+        
+    def test_follow_backfills_timeline(self):
+        """Test newly followed users' posts appear in the timeline"""
+        post = Post.objects.create(author=self.contacts[1], title='Hello', content='content')
+        self.bulk(follow=['contact1'])
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.user, post=post).exists())
+        
+    def test_query_count_is_constant(self):
+        """Test the number of statements does not grow with the batch"""
+        follow_graph.load()
+        with self.assertNumQueries(12):
+            self.bulk(follow=['contact0'])
+        with self.assertNumQueries(12):
+            self.bulk(follow=['contact1', 'contact2', self.contacts[3].pk])
+            
+    def test_unfollow_query_count_is_constant(self):
+        """Test bulk unfollow writes one refresh marker however many users it drops"""
+        self.bulk(follow=['contact0', 'contact1', 'contact2', 'contact3'])
+        follow_graph.load()
+        with self.assertNumQueries(9):
+            self.bulk(unfollow=['contact0'])
+        with self.assertNumQueries(9):
+            self.bulk(unfollow=['contact1', 'contact2', self.contacts[3].pk])
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+            
+    def test_unfollow(self):
+        """Test unfollowing many users at once"""
+        post = Post.objects.create(author=self.contacts[0], title='Hello', content='content')
+        self.bulk(follow=['contact0', 'contact1'])
+        statuses = self.bulk(unfollow=['contact0', 'contact1', 'contact2'])
+        self.assertEqual(
+            [result for _, result in statuses.values()],
+            ['unfollowed', 'unfollowed', 'not_following'],
+        )
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+        self.assertEqual(follow_graph.following_count(self.user.pk), 0)
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user, post=post).exists())
+        
+    def test_rejects_invalid_input(self):
+        """Test conflicting actions and malformed identifiers are rejected"""
+        for body in ({'follow': ['contact0'], 'unfollow': ['contact0']}, {'follow': [1.5]}, {}):
+            response = self.client.post(reverse('bulk_follow'), body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(recommendations.sparse is not None, 'requires numpy and scipy')
+class FollowSuggestionTest(APITestCase):
+    """Test friends-of-friends suggestions"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        names = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank']
+        self.users = {name: User.objects.create_user(username=name, password='testpass123') for name in names}
+        self.follow('alice', 'bob', 'carol')
+        self.follow('bob', 'dave', 'erin', 'alice')
+        self.follow('carol', 'dave')
+        
+    def follow(self, name, *others):
+        self.users[name].following.add(*[self.users[other] for other in others])
+        
+    def suggestions(self, name):
+        return list(
+            FollowSuggestion.objects.filter(user=self.users[name])
+            .order_by('-score', 'candidate_id')
+            .values_list('candidate__username', 'score')
+        )
+        
+    def test_full_run_scores_friends_of_friends(self):
+        """Test candidates are ranked by mutual follows, excluding self and followed users"""
+        call_command('compute_suggestions', '--full', stdout=StringIO())
+        self.assertEqual(self.suggestions('alice'), [('dave', 2), ('erin', 1)])
+        self.assertEqual(self.suggestions('bob'), [('carol', 1)])
+        self.assertEqual(self.suggestions('dave'), [])
+        
+    @override_settings(SUGGESTION_TOP_K=1)
+    def test_top_k(self):
+        """Test only the best SUGGESTION_TOP_K candidates are kept"""
+        recommendations.compute_suggestions()
+        self.assertEqual(self.suggestions('alice'), [('dave', 2)])
+        
+    def test_incremental_refresh(self):
+        """Test only users whose follows changed, and their followers, are recomputed"""
+        recommendations.compute_suggestions()
+        SuggestionRefresh.objects.all().delete()
+        self.follow('carol', 'frank')
+        self.assertEqual(list(SuggestionRefresh.objects.values_list('user_id', flat=True)), [self.users['carol'].pk])
+        refreshed = recommendations.refresh_changed()
+        self.assertEqual(refreshed, 2)
+        self.assertEqual(self.suggestions('alice'), [('dave', 2), ('erin', 1), ('frank', 1)])
+        self.assertFalse(SuggestionRefresh.objects.exists())
+        
+    def test_endpoint(self):
+        """Test the endpoint serves stored suggestions minus users followed since"""
+        recommendations.compute_suggestions()
+        self.follow('alice', 'erin')
+        self.client.force_authenticate(user=self.users['alice'])
+        response = self.client.get(reverse('follow_suggestions'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.users['dave'].pk, 'username': 'dave', 'score': 2}])
+
+
+class CachedTokenAuthTest(APITestCase):
+    """Test cached token authentication"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.backend = CachedTokenAuthentication()
+        
+    def authenticate(self, key):
+        request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {key}'))
+        return self.backend.authenticate(request)
+        
+    def test_lookup_is_cached(self):
+        """Test only the first request for a token reaches the database"""
+        with self.assertNumQueries(1):
+            user, token = self.authenticate(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.authenticate(self.token.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+        
+    def test_password_hash_is_not_cached(self):
+        """Test the cached user carries no password hash and still saves cleanly"""
+        self.authenticate(self.token.key)
+        cached = cache.get(cache_key(self.token.key))
+        self.assertNotIn('password', cached.user.__dict__)
+        user, _ = self.authenticate(self.token.key)
+        user.bio = 'updated'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+        
+    def test_unknown_token_is_negatively_cached(self):
+        """Test repeated bad tokens are rejected without a query"""
+        with self.assertNumQueries(1):
+            self.assertRaises(AuthenticationFailed, self.authenticate, 'bogus')
+        with self.assertNumQueries(0):
+            self.assertRaises(AuthenticationFailed, self.authenticate, 'bogus')
+            
+    def test_deleted_token_is_rejected(self):
+        """Test deleting a token invalidates its cached lookup"""
+        self.authenticate(self.token.key)
+        self.token.delete()
+        self.assertRaises(AuthenticationFailed, self.authenticate, self.token.key)
+        
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating a user invalidates cached lookups"""
+        self.authenticate(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        self.assertRaises(AuthenticationFailed, self.authenticate, self.token.key)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, LOGIN_HASHER_WORKERS=1, LOGIN_HASHER_QUEUE_DEPTH=0)
+class AsyncLoginTest(TestCase):
+    """Test the async login view and its hashing pool"""
+    
+    def setUp(self):
+        hashing._pool = None
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        
+    async def login(self, password='testpass123'):
+        return await self.async_client.post(
+            reverse('login'), {'username': 'testuser', 'password': password}, content_type='application/json'
+        )
+        
+    async def test_login_returns_token(self):
+        """Test valid credentials return the user's token"""
+        response = await self.login()
+        self.assertEqual(response.status_code, 200)
+        token = await Token.objects.aget(user=self.user)
+        self.assertEqual(response.json(), {'token': token.key})
+        
+    async def test_invalid_credentials(self):
+        """Test a wrong password or unknown user is rejected"""
+        response = await self.login('wrong')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(reverse('login'), {'username': 'nobody', 'password': 'x'})
+        self.assertEqual(response.status_code, 400)
+        
+    async def test_rehashes_with_new_work_factor(self):
+        """Test a hash with an outdated iteration count is upgraded on login"""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1200):
+            response = await self.login()
+        self.assertEqual(response.status_code, 200)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1200$'))
+        
+    async def test_saturated_pool_skips_rehash(self):
+        """Test a login whose password checked out still succeeds when the rehash cannot run"""
+        verify = hashing.get_pool().run
+        
+        async def run(func, *args):
+            if func is make_password:
+                raise hashing.PoolSaturated()
+            return await verify(func, *args)
+            
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1200), mock.patch.object(hashing.get_pool(), 'run', run):
+            response = await self.login()
+        self.assertEqual(response.status_code, 200)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        
+    async def test_saturated_pool_rejects_fast(self):
+        """Test logins beyond the pool's capacity get a 503"""
+        release = threading.Event()
+        busy = asyncio.ensure_future(hashing.get_pool().run(release.wait))
+        await asyncio.sleep(0)
+        try:
+            response = await self.login()
+        finally:
+            release.set()
+            await busy
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual((await self.login()).status_code, 200)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class ProvisionUsersTest(APITestCase):
+    """Test the bulk user provisioning command"""
+    
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+        
+    def provision(self, path):
+        out = StringIO()
+        call_command('provision_users', path, '--chunk-size', '2', '--workers', '2', stdout=out, stderr=StringIO())
+        return out.getvalue()
+        
+    def test_csv_import_creates_users_and_tokens(self):
+        """Test users are created with hashed passwords and tokens"""
+        path = self.write('.csv', 'username,email,password,bio\nann,ann@example.com,pw-ann,hi\nben,,pw-ben,\ncat,,,\n')
+        output = self.provision(path)
+        self.assertIn('Created 3 user(s)', output)
+        ann = User.objects.get(username='ann')
+        self.assertTrue(ann.check_password('pw-ann'))
+        self.assertEqual((ann.email, ann.bio), ('ann@example.com', 'hi'))
+        self.assertFalse(User.objects.get(username='cat').has_usable_password())
+        self.assertEqual(Token.objects.filter(user__username__in=['ann', 'ben', 'cat']).count(), 3)
+        
+    def test_jsonl_import_is_resumable(self):
+        """Test re-running skips existing users and invalid lines"""
+        records = [{'username': f'user{i}', 'password': f'pw{i}'} for i in range(5)]
+        lines = [json.dumps(record) for record in records] + ['not json', json.dumps({'username': 'user0'})]
+        path = self.write('.jsonl', '\n'.join(lines))
+        User.objects.create_user(username='user1', password='other')
+        output = self.provision(path)
+        self.assertIn('Created 4 user(s), skipped 1 existing, 2 invalid', output)
+        self.assertTrue(User.objects.get(username='user1').check_password('other'))
+        output = self.provision(path)
+        self.assertIn('Created 0 user(s), skipped 5 existing', output)
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 5)
+        
+    def test_invalid_fields_are_reported_and_skipped(self):
+        """Test records failing the model's field validators are not created"""
+        path = self.write('.csv', 'username,email,password,bio\nok,ok@example.com,pw,\nbad name!,,pw,\nmail,not-an-email,pw,\n'
+                          + 'x' * 151 + ',,pw,\n')
+        out, err = StringIO(), StringIO()
+        call_command('provision_users', path, '--workers', '1', stdout=out, stderr=err)
+        self.assertIn('Created 1 user(s), skipped 0 existing, 3 invalid', out.getvalue())
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['ok'])
+        for line, field in ((3, 'username'), (4, 'email'), (5, 'username')):
+            self.assertIn(f'line {line}: {field}:', err.getvalue())
+            
+    def test_workers_must_be_positive(self):
+        """Test --workers 0 is rejected up front"""
+        path = self.write('.csv', 'username\nann\n')
+        with self.assertRaisesMessage(CommandError, '--workers must be at least 1'):
+            call_command('provision_users', path, '--workers', '0', stdout=StringIO())
+
+
+class ProfilePictureRenditionTest(APITestCase):
+    """Test profile picture renditions"""
+    
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        
+    def upload(self, name):
+        output = BytesIO()
+        Image.effect_noise((1600, 1200), 64).convert('RGB').save(output, 'JPEG', quality=95)
+        self.user.profile_picture = SimpleUploadedFile(name, output.getvalue(), content_type='image/jpeg')
+        self.user.save()
+        
+    def test_new_picture_is_queued_and_rendered(self):
+        """Test the worker writes square, recompressed renditions"""
+        self.assertFalse(RenditionJob.objects.exists())
+        self.upload('me.jpg')
+        self.assertEqual(RenditionJob.objects.filter(user_id=self.user.pk).count(), 1)
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        self.assertFalse(RenditionJob.objects.exists())
+        
+        self.user.refresh_from_db()
+        renditions = self.user.profile_picture_renditions
+        self.assertEqual(set(renditions), {'small', 'medium', 'large'})
+        with default_storage.open(renditions['small']) as f:
+            self.assertEqual(Image.open(f).size, (48, 48))
+        original = self.user.profile_picture.size
+        self.assertLess(default_storage.size(renditions['small']) * 10, original)
+        
+    def test_unchanged_picture_is_not_requeued(self):
+        """Test saving a user without touching the picture queues nothing"""
+        self.upload('me.jpg')
+        RenditionJob.objects.all().delete()
+        user = User.objects.get(pk=self.user.pk)
+        user.bio = 'hello'
+        user.save()
+        self.assertFalse(RenditionJob.objects.exists())
+        self.assertFalse(post_init.has_listeners(User))
+        
+    def test_clearing_picture_is_queued(self):
+        """Test removing the picture queues a job that drops its renditions"""
+        self.upload('me.jpg')
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        user = User.objects.get(pk=self.user.pk)
+        old = user.profile_picture_renditions
+        user.profile_picture = None
+        user.save()
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        user.refresh_from_db()
+        self.assertEqual(user.profile_picture_renditions, {})
+        self.assertFalse(any(default_storage.exists(path) for path in old.values()))
+        
+    def test_picture_replaced_while_rendering_is_not_overwritten(self):
+        """Test a result for a picture replaced mid-render is thrown away"""
+        self.upload('first.jpg')
+        render = renditions.render
+        
+        def replace_then_render(name):
+            User.objects.filter(pk=self.user.pk).update(profile_picture='profile_pics/second.jpg')
+            return render(name)
+            
+        with mock.patch.object(renditions, 'render', replace_then_render):
+            call_command('rendition_worker', '--once', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_renditions, {})
+        self.assertEqual(default_storage.listdir('profile_pics/renditions')[1], [])
+        
+    def test_unexpected_render_error_requeues(self):
+        """Test a job claimed by a worker that crashes is queued again"""
+        self.upload('me.jpg')
+        with mock.patch.object(renditions, 'render', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command('rendition_worker', '--once', stdout=StringIO())
+        self.assertEqual(list(RenditionJob.objects.values_list('user_id', flat=True)), [self.user.pk])
+        
+    def test_replacing_picture_replaces_renditions(self):
+        """Test old renditions are deleted once the new picture is rendered"""
+        self.upload('first.jpg')
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        self.user.refresh_from_db()
+        old = self.user.profile_picture_renditions
+        self.upload('second.jpg')
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.profile_picture_renditions['small'], old['small'])
+        self.assertFalse(any(default_storage.exists(path) for path in old.values()))
+        
+    def test_author_serializer_links_renditions(self):
+        """Test authors expose rendition URLs once processed"""
+        self.assertIsNone(AuthorSerializer(self.user).data['avatar'])
+        self.upload('me.jpg')
+        call_command('rendition_worker', '--once', stdout=StringIO())
+        self.user.refresh_from_db()
+        avatar = AuthorSerializer(self.user).data['avatar']
+        self.assertEqual(avatar['small'], '/media/' + self.user.profile_picture_renditions['small'])
+
+
+class ProfileConditionalGetTest(APITestCase):
+    """Test ETag / Last-Modified validators on the profile"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('profile')
+        
+    def test_unchanged_profile_answers_304(self):
+        """Test If-None-Match and If-Modified-Since return 304"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['username'], 'testuser')
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        again = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_edit_and_follow_change_etag(self):
+        """Test profile edits and new followers invalidate the ETag"""
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'bio': 'Hello'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Hello')
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.following.add(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['followers_count'], 1)
@@ -1,18 +1,20 @@
-# accounts/urls.py
-from django.urls import path
-from . import views
-
-urlpatterns = [
-    # Existing authentication URLs
-    path('register/', views.register, name='register'),
-    path('login/', views.login, name='login'),
-    path('profile/', views.profile, name='profile'),
-    
-    # Follow management URLs
-    path('follow/<int:user_id>/', views.follow_user, name='follow_user'),
-    path('unfollow/<int:user_id>/', views.unfollow_user, name='unfollow_user'),
-    path('following/', views.user_following, name='user_following'),
-    path('following/<int:user_id>/', views.user_following, name='user_following_by_id'),
-    path('followers/', views.user_followers, name='user_followers'),
-    path('followers/<int:user_id>/', views.user_followers, name='user_followers_by_id'),
-]
+# accounts/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Existing authentication URLs
+    path('register/', views.RegisterUserView.as_view(), name='register'),
+    path('login/', views.login, name='login'),
+    path('profile/', views.ProfileView.as_view(), name='profile'),
+    
+    # Follow management URLs
+    path('follow/<int:user_id>/', views.FollowUserView.as_view(), name='follow_user'),
+    path('follow/bulk/', views.BulkFollowView.as_view(), name='bulk_follow'),
+    path('unfollow/<int:user_id>/', views.UnfollowUserView.as_view(), name='unfollow_user'),
+    path('following/', views.FollowListView.as_view(relation='following'), name='user_following'),
+    path('following/<int:user_id>/', views.FollowListView.as_view(relation='following'), name='user_following_by_id'),
+    path('followers/', views.FollowListView.as_view(relation='followers'), name='user_followers'),
+    path('followers/<int:user_id>/', views.FollowListView.as_view(relation='followers'), name='user_followers_by_id'),
+    path('suggestions/', views.FollowSuggestionsView.as_view(), name='follow_suggestions'),
+]
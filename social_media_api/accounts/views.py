@@ -1,56 +1,202 @@
-from rest_framework import status, generics
-from rest_framework.response import Response
-from django.contrib.auth import authenticate, get_user_model
-from rest_framework.authtoken.models import Token
-from rest_framework.views import APIView
-from .serializers import CustomUserSerializer, TokenSerializer
-from rest_framework import permissions
-from accounts.models import CustomUser
-
-# Create your views here.
-
-class RegisterUserView(generics.CreateAPIView):
-    queryset = get_user_model().objects.all()
-    serializer_class = CustomUserSerializer
-
-class LoginView(APIView):
-    def post(self, request):
-        username = request.data.get('username')
-        password = request.data.get('password')
-        
-        user = authenticate(username=username, password=password)
-        if user is not None:
-            token, created = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key}, status=status.HTTP_200_OK)
-        return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
-
-class RetrieveTokenView(APIView):
-    def post(self, request):
-        user = request.user
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({'token': token.key})
-    
-
-class FollowUserView(generics.GenericAPIView):
-    queryset = CustomUser.objects.all()
-    permission_classes = [permissions.IsAuthenticated]
-
-    def post(self, request, user_id):
-        try:
-            user_to_follow = User.objects.get(id=user_id)
-            request.user.following.add(user_to_follow)
-            return Response({'status': 'followed'}, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-
-class UnfollowUserView(generics.GenericAPIView):
-    queryset = CustomUser.objects.all()
-    permission_classes = [permissions.IsAuthenticated]
-
-    def post(self, request, user_id):
-        try:
-            user_to_unfollow = User.objects.get(id=user_id)
-            request.user.following.remove(user_to_unfollow)
-            return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+import json
+
+from asgiref.sync import sync_to_async
+from rest_framework import status, generics
+from rest_framework.response import Response
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+from .follows import follow_users, unfollow_users
+from .graph import follow_graph
+from .hashing import PoolSaturated, get_pool
+from .models import FollowSuggestion
+from .serializers import BulkFollowSerializer, FollowSuggestionSerializer, UserRegistrationSerializer, UserSerializer
+from rest_framework import permissions
+from accounts.models import CustomUser
+from posts.timelines import backfill_follow, purge_unfollow
+from social_media_api.conditional import conditional, make_etag
+
+# Create your views here.
+
+class RegisterUserView(generics.CreateAPIView):
+    queryset = get_user_model().objects.all()
+    serializer_class = UserRegistrationSerializer
+
+def _login_user(username):
+    UserModel = get_user_model()
+    try:
+        return UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        return None
+
+
+def _store_password(user, encoded):
+    type(user).objects.filter(pk=user.pk).update(password=encoded)
+
+
+def _get_token(user):
+    token, created = Token.objects.get_or_create(user=user)
+    return token
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """Exchange a username and password for an API token.
+
+    Async so that, under ASGI, the password check waits on the hashing pool
+    (see accounts/hashing.py) instead of holding a serving thread. When the
+    pool is saturated the client gets a fast 503 with Retry-After. A stored
+    hash with an outdated work factor is upgraded after a successful check,
+    unless the pool is saturated by then; that skips the upgrade, not the login.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        data = request.POST
+    username, password = data.get('username'), data.get('password')
+    if not isinstance(username, str) or not isinstance(password, str):
+        return JsonResponse({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
+
+    pool = get_pool()
+    user = await sync_to_async(_login_user)(username)
+    try:
+        # Unknown users still pay for one hash so response times do not reveal them.
+        valid, must_update = await pool.run(verify_password, password, user.password if user else '')
+    except PoolSaturated:
+        response = JsonResponse({'error': 'Too many logins in progress, retry shortly'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+
+    if not valid or not user.is_active:
+        return JsonResponse({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
+    if must_update:
+        try:
+            await sync_to_async(_store_password)(user, await pool.run(make_password, password))
+        except PoolSaturated:
+            # The password checked out; the upgrade can wait for the next login.
+            pass
+    token = await sync_to_async(_get_token)(user)
+    return JsonResponse({'token': token.key}, status=status.HTTP_200_OK)
+
+class RetrieveTokenView(APIView):
+    def post(self, request):
+        user = request.user
+        token, created = Token.objects.get_or_create(user=user)
+        return Response({'token': token.key})
+    
+
+class ProfileView(generics.RetrieveUpdateAPIView):
+    """The current user's profile; GET answers 304 while it is unchanged"""
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        # Not request.user itself, which may be a cached copy.
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        user = request.user
+        # request.user may come from the token cache, so read the one column fresh.
+        # Follow counts come from the in-memory graph.
+        updated_at = get_user_model().objects.filter(pk=user.pk).values_list('updated_at', flat=True).first()
+        etag = make_etag(
+            'profile', user.pk, updated_at,
+            follow_graph.followers_count(user.pk), follow_graph.following_count(user.pk),
+        )
+        respond = lambda: super(ProfileView, self).retrieve(request, *args, **kwargs)
+        return conditional(request, respond, etag=etag, last_modified=updated_at)
+
+
+class FollowUserView(generics.GenericAPIView):
+    queryset = CustomUser.objects.all()
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        try:
+            user_to_follow = CustomUser.objects.get(id=user_id)
+            request.user.following.add(user_to_follow)
+            backfill_follow(request.user, user_to_follow)
+            return Response({'status': 'followed'}, status=status.HTTP_200_OK)
+        except CustomUser.DoesNotExist:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+class UnfollowUserView(generics.GenericAPIView):
+    queryset = CustomUser.objects.all()
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, user_id):
+        try:
+            user_to_unfollow = CustomUser.objects.get(id=user_id)
+            request.user.following.remove(user_to_unfollow)
+            purge_unfollow(request.user, user_to_unfollow)
+            return Response({'status': 'unfollowed'}, status=status.HTTP_200_OK)
+        except CustomUser.DoesNotExist:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class FollowListView(generics.ListAPIView):
+    """Users that ``user_id`` (default: the current user) follows, or is followed by"""
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    relation = 'following'
+
+    def get_queryset(self):
+        user_id = self.kwargs.get('user_id', self.request.user.pk)
+        lookup = 'followers' if self.relation == 'following' else 'following'
+        return CustomUser.objects.filter(**{lookup: user_id}).order_by('pk')
+
+
+class BulkFollowView(APIView):
+    """Follow and/or unfollow many users in one request.
+
+    Body: {"follow": [ids or usernames], "unfollow": [ids or usernames]}.
+    Each list is resolved with one query and applied with bulk statements;
+    the status of every entry is returned.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = []
+        for action_name, apply in (('follow', follow_users), ('unfollow', unfollow_users)):
+            identifiers = serializer.validated_data.get(action_name)
+            if identifiers:
+                statuses = apply(request.user, identifiers)
+                results += [
+                    {'user': identifier, 'id': user_id, 'action': action_name, 'status': result}
+                    for identifier, (user_id, result) in statuses.items()
+                ]
+        return Response({'results': results})
+
+
+class FollowSuggestionsView(generics.ListAPIView):
+    """Who to follow: precomputed by ``manage.py compute_suggestions``"""
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            FollowSuggestion.objects.filter(user=self.request.user)
+            .select_related('candidate')
+            .order_by('-score', 'candidate_id')
+        )
+
+    def list(self, request, *args, **kwargs):
+        # Drop anyone followed since the last run.
+        suggestions = [
+            suggestion for suggestion in self.get_queryset()
+            if not follow_graph.follows(request.user.pk, suggestion.candidate_id)
+        ]
+        return Response(self.get_serializer(suggestions, many=True).data)
@@ -0,0 +1,136 @@
+"""Pub/sub that pushes new notifications to open event streams.
+
+Notifications are written by the outbox worker, usually in another process, so
+``InProcessBroker`` learns about them from a single tailer task per server
+process. The tailer polls for rows with a ``sequence`` past the last one it
+saw, restricted to users with an open stream, and fans them out to
+per-connection queues. That is one cheap indexed query per poll interval
+however many connections are open. Sequence numbers are handed out in commit
+order (see NotificationSequence), so a row can never commit behind the
+tailer's position, even with several outbox workers. A broker backed by a local message bus can replace it through
+``NOTIFICATION_BROKER`` by implementing the same ``subscribe`` /
+``unsubscribe`` / ``publish`` interface.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# Put in a subscriber's queue in place of the events it could not keep up
+# with. The stream then closes, and the client resumes from Last-Event-ID.
+OVERFLOW = object()
+
+
+def event_id(notification):
+    """Stream event id: the notification's sequence number"""
+    return str(notification.sequence)
+
+
+def parse_event_id(value):
+    """Inverse of ``event_id``; returns a sequence position or None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_fetch_limit():
+    return getattr(settings, 'NOTIFICATION_FETCH_LIMIT', 500)
+
+
+def fetch_events(recipient_ids, position, limit=None):
+    """Serialized notifications past ``position``, in sequence order, at most ``limit`` (default NOTIFICATION_FETCH_LIMIT)"""
+    notifications = (
+        Notification.objects.filter(recipient_id__in=recipient_ids, sequence__gt=position)
+        .select_related('actor', 'target_content_type')
+        .prefetch_related('target')
+        .order_by('sequence')[:limit or get_fetch_limit()]
+    )
+    return [
+        {
+            'id': event_id(notification),
+            'position': notification.sequence,
+            'recipient_id': notification.recipient_id,
+            'data': NotificationSerializer(notification).data,
+        }
+        for notification in notifications
+    ]
+
+
+def latest_position():
+    return Notification.objects.aggregate(latest=Max('sequence'))['latest'] or 0
+
+
+class InProcessBroker:
+    # Events buffered per connection. A connection that falls further behind
+    # is closed and recovers what it missed by reconnecting with Last-Event-ID.
+    queue_size = 100
+
+    def __init__(self):
+        self.subscribers = {}
+        self.tailer = None
+        self.position = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        if self.tailer is None or self.tailer.done():
+            self.tailer = asyncio.get_running_loop().create_task(self.tail())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self.subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+    def publish(self, user_id, event):
+        for queue in list(self.subscribers.get(user_id, ())):
+            if queue.full():
+                logger.warning('Notification stream of user %s fell %d events behind; closing it', user_id, queue.qsize())
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(OVERFLOW)
+                self.unsubscribe(user_id, queue)
+            else:
+                queue.put_nowait(event)
+
+    async def poll(self):
+        if self.position is None:
+            self.position = await sync_to_async(latest_position)()
+        if not self.subscribers:
+            return
+        events = await sync_to_async(fetch_events)(list(self.subscribers), self.position)
+        for event in events:
+            self.publish(event['recipient_id'], event)
+        if events:
+            self.position = events[-1]['position']
+
+    async def tail(self):
+        interval = getattr(settings, 'NOTIFICATION_STREAM_POLL_INTERVAL', 1.0)
+        while self.subscribers:
+            try:
+                await self.poll()
+            except Exception:
+                # Keep tailing: open streams would otherwise go quiet for good.
+                logger.exception('Notification stream poll failed; retrying in %s seconds', interval)
+            await asyncio.sleep(interval)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', 'notifications.broker.InProcessBroker'))()
+    return _broker
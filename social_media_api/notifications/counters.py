@@ -0,0 +1,48 @@
+"""Per-user unread notification counters.
+
+Every change is a relative ``UPDATE ... SET count = count + delta`` so it
+commutes with concurrent writers, and reading the badge is a primary-key
+lookup.
+"""
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .models import Notification, UnreadCounter
+
+
+def add_unread(deltas):
+    """Apply ``{user_id: delta}`` to the users' unread counters."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id) for user_id in deltas], ignore_conflicts=True,
+    )
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(count=Greatest(F('count') + delta, Value(0)))
+
+
+def unread_count(user):
+    count = UnreadCounter.objects.filter(user_id=user.pk).values_list('count', flat=True).first()
+    return count or 0
+
+
+def reconcile(user_ids=None):
+    """Recompute counters from Notification; returns how many were wrong."""
+    unread = Notification.objects.filter(read=False)
+    counters = UnreadCounter.objects.all()
+    if user_ids is not None:
+        unread = unread.filter(recipient_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+    actual = dict(unread.values('recipient_id').annotate(n=Count('pk')).values_list('recipient_id', 'n'))
+    stored = dict(counters.values_list('user_id', 'count'))
+
+    wrong = 0
+    for user_id in set(actual) | set(stored):
+        if actual.get(user_id, 0) != stored.get(user_id, 0):
+            UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'count': actual.get(user_id, 0)})
+            wrong += 1
+    return wrong
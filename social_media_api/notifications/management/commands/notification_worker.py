@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import drain
+
+
+class Command(BaseCommand):
+    help = 'Drain the notification outbox into Notification rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is pending and exit')
+
+    def handle(self, *args, **options):
+        delivered = 0
+        while True:
+            processed = drain(options['batch_size'])
+            delivered += processed
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} notification(s)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notifications.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the per-user unread notification counters'
+
+    def handle(self, *args, **options):
+        wrong = reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Repaired {wrong} unread counter(s)'))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def copy_post_ids(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.update(target_object_id=models.F('post_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='target_object_id',
+            field=models.PositiveBigIntegerField(null=True),
+        ),
+        migrations.RunPython(copy_post_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='target_object_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='post',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_target_object_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_id', models.PositiveBigIntegerField()),
+                ('actor_id', models.PositiveBigIntegerField()),
+                ('verb', models.CharField(max_length=255)),
+                ('target_content_type_id', models.PositiveIntegerField()),
+                ('target_object_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='event_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_actors(apps, schema_editor):
+    """Give notifications written before coalescing their single actor"""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    notifications = list(Notification.objects.only('pk', 'actor_id', 'timestamp'))
+    for notification in notifications:
+        notification.recent_actor_ids = [notification.actor_id]
+    Notification.objects.bulk_update(notifications, ['recent_actor_ids'], batch_size=500)
+    NotificationActor.objects.bulk_create(
+        [
+            NotificationActor(notification_id=n.pk, actor_id=n.actor_id, created_at=n.timestamp)
+            for n in notifications
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outboxevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='notifications.notification')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['notification', '-created_at', '-id'], name='notif_actor_created_idx')],
+                'unique_together': {('notification', 'actor')},
+            },
+        ),
+        migrations.RunPython(record_actors, migrations.RunPython.noop),
+    ]
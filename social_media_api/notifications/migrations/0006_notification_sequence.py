@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+def number_existing(apps, schema_editor):
+    """Give existing notifications stream positions in (timestamp, pk) order"""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationSequence = apps.get_model('notifications', 'NotificationSequence')
+    notifications = list(Notification.objects.order_by('timestamp', 'pk').only('pk'))
+    for sequence, notification in enumerate(notifications, 1):
+        notification.sequence = sequence
+    Notification.objects.bulk_update(notifications, ['sequence'], batch_size=500)
+    NotificationSequence.objects.create(pk=1, value=len(notifications))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_read_unreadcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='sequence',
+            field=models.PositiveBigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing, migrations.RunPython.noop),
+    ]
@@ -1,20 +1,95 @@
-from django.db import models
-from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.fields import GenericForeignKey
-from django.contrib.contenttypes.models import ContentType
-from posts.models import Post
-
-# Create your models here.
-
-User = get_user_model()
-class Notification(models.Model):
-    recipient = models.ForeignKey(User, related_name='notifications', on_delete=models.CASCADE)
-    actor = models.ForeignKey(User, related_name='actor_notifications', on_delete=models.CASCADE)
-    verb = models.CharField(max_length=255)
-    target_content_type = models.ForeignKey(ContentType, related_name='target_object', on_delete=models.CASCADE)
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    target = GenericForeignKey('target_content_type','post')
-    timestamp = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return f'{self.actor} {self.verb} {self.target} to {self.recipient}'
\ No newline at end of file
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+
+# Create your models here.
+
+User = get_user_model()
+class Notification(models.Model):
+    recipient = models.ForeignKey(User, related_name='notifications', on_delete=models.CASCADE)
+    actor = models.ForeignKey(User, related_name='actor_notifications', on_delete=models.CASCADE)
+    verb = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(ContentType, related_name='target_object', on_delete=models.CASCADE)
+    target_object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('target_content_type','target_object_id')
+    timestamp = models.DateTimeField(auto_now_add=True)
+    # Outbox event this row was delivered from; makes redelivery a no-op.
+    event_id = models.PositiveBigIntegerField(unique=True, null=True, blank=True)
+    # Coalesced notifications stand for several actors ("alice and 41 others"):
+    # `actor` is the most recent one, `recent_actor_ids` a small newest-first
+    # sample, and NotificationActor holds the full list.
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actor_ids = models.JSONField(default=list, blank=True)
+    read = models.BooleanField(default=False)
+    # Position in the live stream (see broker.py), taken again each time the
+    # row is delivered or coalesced into. `timestamp` stays the creation time.
+    sequence = models.PositiveBigIntegerField(null=True, unique=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'read', '-timestamp'], name='notif_recipient_read_idx'),
+        ]
+    
+    def __str__(self):
+        if self.actor_count > 1:
+            return f'{self.actor} and {self.actor_count - 1} others {self.verb} {self.target} to {self.recipient}'
+        return f'{self.actor} {self.verb} {self.target} to {self.recipient}'
+
+
+class NotificationActor(models.Model):
+    """One actor behind a (possibly coalesced) notification"""
+    notification = models.ForeignKey(Notification, related_name='actors', on_delete=models.CASCADE)
+    actor = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('notification', 'actor')
+        indexes = [
+            models.Index(fields=['notification', '-created_at', '-id'], name='notif_actor_created_idx'),
+        ]
+        
+    def __str__(self):
+        return f'{self.actor} on notification {self.notification_id}'
+
+
+class UnreadCounter(models.Model):
+    """Per-user unread notification count, so badge polling never scans.
+
+    Kept in step by notifications.counters on delivery, mark-read and delete.
+    """
+    user = models.OneToOneField(User, primary_key=True, related_name='unread_counter', on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f'{self.user} has {self.count} unread notifications'
+
+
+class NotificationSequence(models.Model):
+    """Single-row counter handing out Notification.sequence values.
+
+    The outbox worker locks the row when it takes numbers and holds the lock
+    until its delivery commits, so sequence order is commit order: a stream
+    tailing by sequence never passes a number that has yet to commit.
+    """
+    value = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f'notification sequence at {self.value}'
+
+
+class OutboxEvent(models.Model):
+    """A pending notification, written in the same transaction as the action.
+
+    Request handlers only append these compact rows; the
+    `manage.py notification_worker` process drains them into Notification.
+    """
+    recipient_id = models.PositiveBigIntegerField()
+    actor_id = models.PositiveBigIntegerField()
+    verb = models.CharField(max_length=255)
+    target_content_type_id = models.PositiveIntegerField()
+    target_object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'outbox #{self.pk}: {self.actor_id} {self.verb} -> {self.recipient_id}'
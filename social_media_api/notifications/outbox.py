@@ -0,0 +1,199 @@
+"""Transactional outbox for notification delivery.
+
+Writers call ``enqueue`` inside the transaction that performs the action, so
+the event exists if and only if the action committed, and the request pays for
+one small INSERT whatever the notification logic costs. ``drain`` runs in the
+worker (``manage.py notification_worker``) and turns events into Notification
+rows in batches. Delivery is at-least-once; ``Notification.event_id`` is
+unique, so redelivered events are ignored.
+
+With ``NOTIFICATION_COALESCE_WINDOW`` set (seconds), events sharing
+(recipient, verb, target) are folded into the newest notification for that
+key younger than the window, which keeps an actor count and a small sample of
+recent actors; every actor is recorded in NotificationActor. The window runs
+from the notification's creation: coalescing never moves ``timestamp``.
+
+Every delivered or updated row takes a new ``sequence`` number, which open
+streams tail by (see broker.py).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters
+from .models import Notification, NotificationActor, NotificationSequence, OutboxEvent
+
+
+def get_coalesce_window():
+    return getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', None)
+
+
+def get_actor_sample_size():
+    return getattr(settings, 'NOTIFICATION_ACTOR_SAMPLE', 3)
+
+
+def enqueue(events):
+    """Append events: an iterable of (recipient_id, actor_id, verb, target) tuples."""
+    rows = []
+    for recipient_id, actor_id, verb, target in events:
+        if recipient_id == actor_id:
+            continue
+        rows.append(OutboxEvent(
+            recipient_id=recipient_id,
+            actor_id=actor_id,
+            verb=verb,
+            target_content_type_id=ContentType.objects.get_for_model(target).pk,
+            target_object_id=target.pk,
+        ))
+    if rows:
+        OutboxEvent.objects.bulk_create(rows)
+
+
+def drain(batch_size=500):
+    """Deliver up to ``batch_size`` events; returns how many were processed."""
+    with transaction.atomic():
+        events = OutboxEvent.objects.order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Lets several workers drain concurrently without sharing events.
+            events = events.select_for_update(skip_locked=True)
+        events = list(events[:batch_size])
+        if not events:
+            return 0
+        window = get_coalesce_window()
+        if window is None:
+            _deliver(events)
+        else:
+            _coalesce(events, window)
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
+
+
+def _take_sequence(count):
+    """Reserve ``count`` stream sequence numbers and return the first.
+
+    The counter row stays locked until the surrounding transaction commits
+    (see NotificationSequence), so take numbers as late as possible.
+    """
+    counter, _ = NotificationSequence.objects.select_for_update().get_or_create(pk=1)
+    counter.value += count
+    counter.save(update_fields=['value'])
+    return counter.value - count + 1
+
+
+def _deliver(events):
+    delivered = set(
+        Notification.objects.filter(event_id__in=[event.pk for event in events]).values_list('event_id', flat=True)
+    )
+    events = [event for event in events if event.pk not in delivered]
+    if not events:
+        return
+    first = _take_sequence(len(events))
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=event.recipient_id,
+                actor_id=event.actor_id,
+                verb=event.verb,
+                target_content_type_id=event.target_content_type_id,
+                target_object_id=event.target_object_id,
+                event_id=event.pk,
+                recent_actor_ids=[event.actor_id],
+                sequence=sequence,
+            )
+            for sequence, event in enumerate(events, first)
+        ],
+        ignore_conflicts=True,
+    )
+    unread = {}
+    for event in events:
+        unread[event.recipient_id] = unread.get(event.recipient_id, 0) + 1
+    counters.add_unread(unread)
+
+
+def _key(row):
+    return row.recipient_id, row.verb, row.target_content_type_id, row.target_object_id
+
+
+def _coalesce(events, window):
+    groups = {}
+    for event in events:
+        groups.setdefault(_key(event), []).append(event)
+
+    # The open notification per key: the newest one inside the window, or
+    # the one an earlier delivery of this group already created.
+    first_event_ids = [group[0].pk for group in groups.values()]
+    candidates = Notification.objects.filter(
+        Q(timestamp__gte=timezone.now() - timedelta(seconds=window)) | Q(event_id__in=first_event_ids),
+        recipient_id__in={key[0] for key in groups},
+        target_object_id__in={key[3] for key in groups},
+    ).order_by('timestamp', 'pk')
+    if connection.features.has_select_for_update:
+        candidates = candidates.select_for_update()
+    open_rows = {}
+    for notification in candidates:
+        if _key(notification) in groups:
+            open_rows[_key(notification)] = notification
+    known = set(
+        NotificationActor.objects.filter(
+            notification__in=list(open_rows.values()),
+            actor_id__in={event.actor_id for event in events},
+        ).values_list('notification_id', 'actor_id')
+    )
+
+    sample_size = get_actor_sample_size()
+    created, updated, unread = [], [], {}
+    for key, group in groups.items():
+        notification = open_rows.get(key)
+        fresh, seen = [], set()
+        for event in group:
+            if event.actor_id in seen or (notification and (notification.pk, event.actor_id) in known):
+                continue
+            seen.add(event.actor_id)
+            fresh.append(event)
+        if not fresh:
+            continue
+        newest = [event.actor_id for event in reversed(fresh)]
+        if notification is None:
+            notification = Notification(
+                recipient_id=key[0],
+                verb=key[1],
+                target_content_type_id=key[2],
+                target_object_id=key[3],
+                event_id=group[0].pk,
+                actor_count=0,
+            )
+            created.append((notification, fresh))
+        else:
+            newest += [actor_id for actor_id in notification.recent_actor_ids if actor_id not in seen]
+            updated.append((notification, fresh))
+        if notification.read or notification.pk is None:
+            # New, or resurfacing after having been read.
+            unread[key[0]] = unread.get(key[0], 0) + 1
+            notification.read = False
+        notification.actor_id = fresh[-1].actor_id
+        notification.actor_count += len(fresh)
+        notification.recent_actor_ids = newest[:sample_size]
+
+    if not created and not updated:
+        return
+    first = _take_sequence(len(created) + len(updated))
+    for sequence, (notification, _) in enumerate(created + updated, first):
+        notification.sequence = sequence
+    Notification.objects.bulk_create([notification for notification, _ in created])
+    Notification.objects.bulk_update(
+        [notification for notification, _ in updated],
+        ['actor', 'actor_count', 'recent_actor_ids', 'read', 'sequence'],
+    )
+    NotificationActor.objects.bulk_create(
+        [
+            NotificationActor(notification=notification, actor_id=event.actor_id, created_at=event.created_at)
+            for notification, fresh in created + updated
+            for event in fresh
+        ],
+        ignore_conflicts=True,
+    )
+    counters.add_unread(unread)
@@ -1,8 +1,47 @@
-from rest_framework import serializers
-from .models import Notification
-
-class NotificationSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Notification
-        fields = ['id', 'recipient', 'actor', 'verb', 'target', 'timestamp']
-        depth = 1
\ No newline at end of file
+from rest_framework import serializers
+from .models import Notification, NotificationActor
+
+class NotificationActorField(serializers.Field):
+    """Compact {id, username} of the notification's (most recent) actor"""
+    def __init__(self, **kwargs):
+        super().__init__(read_only=True, **kwargs)
+        
+    def to_representation(self, actor):
+        return {'id': actor.pk, 'username': actor.username}
+
+class NotificationTargetField(serializers.Field):
+    """Compact reference to the target object: {type, id} plus its title if it has one"""
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+        
+    def to_representation(self, notification):
+        content_type = notification.target_content_type
+        data = {'type': f'{content_type.app_label}.{content_type.model}', 'id': notification.target_object_id}
+        title = getattr(notification.target, 'title', None)
+        if title is not None:
+            data['title'] = title
+        return data
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Flat notification representation.
+
+    Expects the queryset to select_related('actor', 'target_content_type')
+    and prefetch_related('target'), which loads targets with one query per
+    content type instead of one per row.
+    """
+    actor = NotificationActorField()
+    target = NotificationTargetField()
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'recipient', 'actor', 'verb', 'target', 'timestamp', 'actor_count', 'recent_actor_ids', 'read']
+        read_only_fields = fields
+
+class NotificationActorSerializer(serializers.ModelSerializer):
+    """One entry of a coalesced notification's full actor list"""
+    id = serializers.IntegerField(source='actor.id', read_only=True)
+    username = serializers.CharField(source='actor.username', read_only=True)
+    
+    class Meta:
+        model = NotificationActor
+        fields = ['id', 'username', 'created_at']
\ No newline at end of file
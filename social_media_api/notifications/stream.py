@@ -0,0 +1,86 @@
+"""Server-Sent Events stream of a user's notifications.
+
+An async view, so under ASGI (``social_media_api/asgi.py``) each open stream
+is a suspended coroutine rather than a worker thread, and one process can
+hold thousands of idle connections. Clients reconnect with the standard
+``Last-Event-ID`` header (or ``?last_event_id=``) to replay what they missed.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from accounts.authentication import get_token
+from .broker import OVERFLOW, fetch_events, get_broker, get_fetch_limit, latest_position, parse_event_id
+
+
+def _token_user(key):
+    token = get_token(key)
+    return token.user if token is not None else None
+
+
+async def authenticate(request):
+    """Token from the Authorization header or ?token= (EventSource cannot set headers), else the session"""
+    header = request.headers.get('Authorization', '')
+    key = header[len('Token '):] if header.startswith('Token ') else request.GET.get('token')
+    user = await sync_to_async(_token_user)(key) if key else await request.auser()
+    if user is None or not user.is_authenticated or not user.is_active:
+        return None
+    return user
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+async def notification_stream(request):
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    broker = get_broker()
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    resume = parse_event_id(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+
+    async def events():
+        # Subscribe before replaying so nothing written in between is lost.
+        queue = broker.subscribe(user.pk)
+        try:
+            sent = resume
+            if resume is None:
+                # Hand the client a Last-Event-ID up front, so a stream closed
+                # before its first event still resumes without a gap.
+                sent = await sync_to_async(latest_position)()
+                yield f'retry: 5000\nid: {sent}\n\n'
+            else:
+                yield 'retry: 5000\n\n'
+                # Replay in batches until caught up; the queue holds what arrives meanwhile.
+                limit = get_fetch_limit()
+                while True:
+                    missed = await sync_to_async(fetch_events)([user.pk], sent, limit)
+                    for event in missed:
+                        sent = event['position']
+                        yield format_event(event)
+                    if len(missed) < limit:
+                        break
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': heartbeat\n\n'
+                    continue
+                if event is OVERFLOW:
+                    # Too far behind: end the response so the client reconnects and replays.
+                    return
+                if event['position'] <= sent:
+                    continue
+                sent = event['position']
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(user.pk, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
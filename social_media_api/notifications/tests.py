@@ -1,3 +1,369 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from posts.models import Post
+from . import broker
+from .models import Notification, NotificationActor, OutboxEvent, UnreadCounter
+from .outbox import drain, enqueue
+
+User = get_user_model()
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=None)
+class OutboxTest(APITestCase):
+    """Test notification delivery through the transactional outbox"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Test Post', content='content')
+        
+    def test_like_appends_event_not_notification(self):
+        """Test liking only writes an outbox event on the request path"""
+        self.client.force_authenticate(user=self.fan)
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+        
+    def test_drain_delivers_notifications(self):
+        """Test draining turns events into notifications"""
+        enqueue([(self.author.pk, self.fan.pk, 'liked your post', self.post)])
+        self.assertEqual(drain(), 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.actor, self.fan)
+        self.assertEqual(notification.target, self.post)
+        self.assertFalse(OutboxEvent.objects.exists())
+        
+    def test_redelivery_is_idempotent(self):
+        """Test an event delivered twice yields one notification"""
+        enqueue([(self.author.pk, self.fan.pk, 'liked your post', self.post)])
+        event = OutboxEvent.objects.get()
+        drain()
+        event.save()  # simulate a crash before the event was deleted
+        drain()
+        self.assertEqual(Notification.objects.count(), 1)
+        
+    def test_self_actions_are_skipped(self):
+        """Test no event is written for acting on your own post"""
+        enqueue([(self.author.pk, self.author.pk, 'liked your post', self.post)])
+        self.assertFalse(OutboxEvent.objects.exists())
+        
+    def test_worker_command(self):
+        """Test the worker drains everything pending with --once"""
+        enqueue([(self.author.pk, self.fan.pk, 'liked your post', self.post)] * 3)
+        out = StringIO()
+        call_command('notification_worker', '--once', '--batch-size', '2', stdout=out)
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertIn('Delivered 3 notification(s)', out.getvalue())
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=3600, NOTIFICATION_ACTOR_SAMPLE=2)
+class CoalescingTest(APITestCase):
+    """Test coalescing notifications per (recipient, verb, target)"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(4)]
+        self.post = Post.objects.create(author=self.author, title='Test Post', content='content')
+        
+    def like(self, *fans):
+        enqueue([(self.author.pk, fan.pk, 'liked your post', self.post) for fan in fans])
+        
+    def test_events_fold_into_one_row(self):
+        """Test likes on one post become one notification with a count"""
+        self.like(*self.fans[:3])
+        drain()
+        self.like(self.fans[3])
+        drain()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertEqual(notification.actor, self.fans[3])
+        self.assertEqual(notification.recent_actor_ids, [self.fans[3].pk, self.fans[2].pk])
+        self.assertEqual(NotificationActor.objects.count(), 4)
+        self.assertEqual(str(notification).split(' liked')[0], 'fan3 and 3 others')
+        
+    def test_repeat_actor_counts_once(self):
+        """Test the same actor is only counted once (also covers redelivery)"""
+        self.like(self.fans[0], self.fans[0])
+        drain()
+        self.like(self.fans[0])
+        drain()
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+        
+    def test_window_expiry_starts_new_row(self):
+        """Test events after the window open a new notification"""
+        self.like(self.fans[0])
+        drain()
+        Notification.objects.update(timestamp=timezone.now() - timedelta(hours=2))
+        self.like(self.fans[1])
+        drain()
+        self.assertEqual(Notification.objects.count(), 2)
+        
+    def test_coalescing_keeps_timestamp(self):
+        """Test folding in a later event keeps the window fixed but moves the row up the stream"""
+        self.like(self.fans[0])
+        drain()
+        first = Notification.objects.get()
+        self.like(self.fans[1])
+        drain()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.timestamp, first.timestamp)
+        self.assertGreater(notification.sequence, first.sequence)
+        
+    def test_other_targets_are_separate(self):
+        """Test different targets are not merged"""
+        other = Post.objects.create(author=self.author, title='Other', content='content')
+        self.like(self.fans[0])
+        enqueue([(self.author.pk, self.fans[1].pk, 'liked your post', other)])
+        drain()
+        self.assertEqual(Notification.objects.count(), 2)
+        
+    def test_full_actor_list_endpoint(self):
+        """Test the full actor list is served on demand"""
+        self.like(*self.fans)
+        drain()
+        notification = Notification.objects.get()
+        self.client.force_authenticate(user=self.author)
+        url = reverse('notification-actors', kwargs={'pk': notification.pk})
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([actor['username'] for actor in response.data['results']], ['fan0'])
+
+
+class UnreadCountTest(APITestCase):
+    """Test read state and the unread counter"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan', password='testpass123')
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='content') for i in range(3)]
+        enqueue([(self.author.pk, self.fan.pk, 'liked your post', post) for post in self.posts])
+        drain()
+        self.client.force_authenticate(user=self.author)
+        
+    def unread_count(self):
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['unread_count']
+        
+    def test_delivery_increments_counter(self):
+        """Test delivered notifications are counted as unread"""
+        self.assertEqual(self.unread_count(), 3)
+        
+    def test_unread_count_is_a_single_lookup(self):
+        """Test the badge endpoint does not scan notifications"""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('notification-unread-count'))
+            
+    def test_mark_one_and_all_as_read(self):
+        """Test marking read keeps the counter in sync"""
+        notification = Notification.objects.first()
+        self.client.post(reverse('notification-read', kwargs={'pk': notification.pk}))
+        self.client.post(reverse('notification-read', kwargs={'pk': notification.pk}))
+        self.assertEqual(self.unread_count(), 2)
+        self.client.post(reverse('notification-mark-as-read'))
+        self.assertEqual(self.unread_count(), 0)
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+        
+    def test_deleting_unread_notification(self):
+        """Test deleting an unread notification decrements the counter"""
+        notification = Notification.objects.first()
+        self.client.delete(reverse('notification-detail', kwargs={'pk': notification.pk}))
+        self.assertEqual(self.unread_count(), 2)
+        
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=3600)
+    def test_coalesced_notification_resurfaces(self):
+        """Test a read coalesced notification becomes unread on a new actor"""
+        self.client.post(reverse('notification-mark-as-read'))
+        other = User.objects.create_user(username='other', password='testpass123')
+        enqueue([(self.author.pk, other.pk, 'liked your post', self.posts[0])])
+        drain()
+        self.assertEqual(self.unread_count(), 1)
+        self.assertEqual(Notification.objects.filter(read=False).get().actor_count, 2)
+        
+    def test_reconcile_command(self):
+        """Test reconcile_unread_counts repairs drift"""
+        UnreadCounter.objects.filter(user=self.author).update(count=40)
+        call_command('reconcile_unread_counts', stdout=StringIO())
+        self.assertEqual(self.unread_count(), 3)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=None)
+class NotificationListTest(APITestCase):
+    """Test the flat notification list"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(5)]
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='content') for i in range(10)]
+        enqueue([(self.author.pk, fan.pk, 'liked your post', post) for fan in self.fans for post in self.posts])
+        drain()
+        self.client.force_authenticate(user=self.author)
+        
+    def test_flat_representation(self):
+        """Test actor and target are compact references"""
+        response = self.client.get(reverse('notification-list'), {'page_size': 1})
+        item = response.data['results'][0]
+        self.assertEqual(item['actor'], {'id': self.fans[4].pk, 'username': 'fan4'})
+        self.assertEqual(item['target'], {'type': 'posts.post', 'id': self.posts[9].pk, 'title': 'Post 9'})
+        self.assertEqual(item['recipient'], self.author.pk)
+        
+    def test_clients_cannot_write_notifications(self):
+        """Test create and update are not routed"""
+        response = self.client.post(reverse('notification-list'), {'message': 'spoofed'})
+        self.assertEqual(response.status_code, 405)
+        notification = Notification.objects.filter(recipient=self.author).first()
+        response = self.client.patch(reverse('notification-detail', args=[notification.pk]), {'read': True})
+        self.assertEqual(response.status_code, 405)
+        
+    def test_page_query_count_is_constant(self):
+        """Test a page of 50 resolves all targets in one query"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('notification-list'), {'page_size': 50})
+        self.assertEqual(len(response.data['results']), 50)
+
+
+@override_settings(
+    NOTIFICATION_COALESCE_WINDOW=None,
+    NOTIFICATION_STREAM_POLL_INTERVAL=60,
+    NOTIFICATION_STREAM_HEARTBEAT=60,
+)
+class NotificationStreamTest(TestCase):
+    """Test the server-sent event stream"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan', password='testpass123')
+        self.token = Token.objects.create(user=self.author)
+        self.post = Post.objects.create(author=self.author, title='Post', content='content')
+        broker._broker = None
+        
+    async def open_stream(self, **headers):
+        headers['Authorization'] = f'Token {self.token.key}'
+        response = await self.async_client.get(reverse('notification-stream'), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return aiter(response.streaming_content)
+        
+    async def read(self, stream):
+        return (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+        
+    async def close(self, stream):
+        await stream.aclose()
+        broker.get_broker().tailer.cancel()
+        
+    def notify(self, actor):
+        enqueue([(self.author.pk, actor.pk, 'liked your post', self.post)])
+        drain()
+        
+    async def test_requires_authentication(self):
+        """Test anonymous clients are rejected"""
+        response = await self.async_client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, 401)
+        
+    async def test_token_query_parameter(self):
+        """Test EventSource clients can authenticate with ?token="""
+        response = await self.async_client.get(reverse('notification-stream'), {'token': self.token.key})
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await self.read(stream)).startswith('retry:'))
+        await self.close(stream)
+        
+    async def test_replays_after_last_event_id(self):
+        """Test a reconnecting client receives only what it missed"""
+        await sync_to_async(self.notify)(self.fan)
+        await sync_to_async(self.notify)(self.author)
+        other = await User.objects.acreate(username='other')
+        await sync_to_async(self.notify)(other)
+        first = await Notification.objects.order_by('pk').afirst()
+        stream = await self.open_stream(**{'Last-Event-ID': broker.event_id(first)})
+        self.assertTrue((await self.read(stream)).startswith('retry:'))
+        chunk = await self.read(stream)
+        self.assertIn('event: notification', chunk)
+        self.assertIn('"username": "other"', chunk)
+        await self.close(stream)
+        
+    @override_settings(NOTIFICATION_FETCH_LIMIT=2)
+    async def test_replay_continues_past_one_batch(self):
+        """Test a reconnect replays every missed notification, not just the first batch"""
+        post_type = await sync_to_async(ContentType.objects.get_for_model)(Post)
+        await Notification.objects.abulk_create([
+            Notification(
+                recipient=self.author, actor=self.fan, verb='liked your post',
+                target_content_type=post_type, target_object_id=self.post.pk, sequence=sequence,
+            )
+            for sequence in range(1, 6)
+        ])
+        stream = await self.open_stream(**{'Last-Event-ID': '0'})
+        await self.read(stream)
+        ids = [(await self.read(stream)).split('\n')[0] for _ in range(5)]
+        self.assertEqual(ids, [f'id: {sequence}' for sequence in range(1, 6)])
+        await self.close(stream)
+        
+    async def test_pushes_new_notifications(self):
+        """Test the tailer delivers notifications written after the stream opened"""
+        stream = await self.open_stream()
+        await self.read(stream)
+        await broker.get_broker().poll()
+        await sync_to_async(self.notify)(self.fan)
+        await broker.get_broker().poll()
+        chunk = await self.read(stream)
+        notification = await Notification.objects.aget()
+        self.assertIn(f'id: {broker.event_id(notification)}', chunk)
+        self.assertIn('"username": "fan"', chunk)
+        await self.close(stream)
+        
+    async def test_overflowing_stream_closes(self):
+        """Test a stream that falls too far behind is closed, not silently thinned out"""
+        stream = await self.open_stream()
+        await self.read(stream)
+        hub = broker.get_broker()
+        with self.assertLogs('notifications.broker', 'WARNING'):
+            for position in range(1, hub.queue_size + 2):
+                hub.publish(self.author.pk, {'position': position})
+        with self.assertRaises(StopAsyncIteration):
+            await self.read(stream)
+        await self.close(stream)
+        
+    @override_settings(NOTIFICATION_STREAM_POLL_INTERVAL=0.01)
+    async def test_tailer_survives_poll_errors(self):
+        """Test a failed poll is logged and the tailer keeps going"""
+        hub = broker.get_broker()
+        polls = []
+        
+        async def poll():
+            polls.append(None)
+            if len(polls) == 1:
+                raise DatabaseError('connection lost')
+            
+        with patch.object(hub, 'poll', poll), self.assertLogs('notifications.broker', 'ERROR'):
+            stream = await self.open_stream()
+            await self.read(stream)
+            for _ in range(500):
+                if len(polls) > 1:
+                    break
+                await asyncio.sleep(0.01)
+        self.assertGreater(len(polls), 1)
+        self.assertFalse(hub.tailer.done())
+        await self.close(stream)
+        
+    @override_settings(NOTIFICATION_STREAM_HEARTBEAT=0.01)
+    async def test_heartbeat(self):
+        """Test idle streams are kept alive with comment lines"""
+        stream = await self.open_stream()
+        await self.read(stream)
+        self.assertEqual(await self.read(stream), ': heartbeat\n\n')
+        await self.close(stream)
@@ -1,10 +1,12 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
-
-router = DefaultRouter()
-router.register(r'notifications', NotificationViewSet, basename='notification')
-
-urlpatterns = [
-    path('', include(router.urls)),
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .stream import notification_stream
+from .views import NotificationViewSet
+
+router = DefaultRouter()
+router.register(r'notifications', NotificationViewSet, basename='notification')
+
+urlpatterns = [
+    path('stream/', notification_stream, name='notification-stream'),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,19 +1,70 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
-from rest_framework.response import Response
-from .models import Notification
-from .serializers import NotificationSerializer
-
-# Create your views here.
-class NotificationViewSet(viewsets.ModelViewSet):
-    queryset = Notification.objects.all()
-    serializer_class = NotificationSerializer
-
-    def get_queryset(self):
-        return self.queryset.filter(recipient=self.request.user).order_by('-timestamp')
-
-    @action(detail=False, methods=['post'])
-    def mark_as_read(self, request):
-        notifications = self.get_queryset().filter(read=False)
-        notifications.update(read=True)
-        return Response({'status': 'notifications marked as read'}, status=status.HTTP_200_OK)
\ No newline at end of file
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db import transaction
+from . import counters
+from .models import Notification, NotificationActor
+from .serializers import NotificationActorSerializer, NotificationSerializer
+from social_media_api.pagination import KeysetCursorPagination
+
+class NotificationCursorPagination(KeysetCursorPagination):
+    ordering_field = 'timestamp'
+
+# Create your views here.
+class NotificationViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    # Notifications are only written by delivery (see notifications/outbox.py):
+    # clients list, read and delete them, but never create or edit them.
+    queryset = Notification.objects.all()
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        return (
+            self.queryset.filter(recipient=self.request.user)
+            .select_related('actor', 'target_content_type')
+            .prefetch_related('target')
+            .order_by('-timestamp')
+        )
+
+    @action(detail=True, methods=['get'])
+    def actors(self, request, pk=None):
+        """Full, paginated actor list of a coalesced notification"""
+        notification = self.get_object()
+        actors = NotificationActor.objects.filter(notification=notification).select_related('actor')
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(actors, request, view=self)
+        if not page and paginator.previous_position is None:
+            # Delivered without coalescing: the notification's own actor is the list.
+            page = [NotificationActor(notification=notification, actor=notification.actor, created_at=notification.timestamp)]
+        return paginator.get_paginated_response(NotificationActorSerializer(page, many=True).data)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        if not instance.read:
+            counters.add_unread({instance.recipient_id: -1})
+
+    @action(detail=False, methods=['post'])
+    def mark_as_read(self, request):
+        with transaction.atomic():
+            updated = self.get_queryset().filter(read=False).update(read=True)
+            counters.add_unread({request.user.pk: -updated})
+        return Response({'status': 'notifications marked as read'}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        notification = self.get_object()
+        with transaction.atomic():
+            updated = self.get_queryset().filter(pk=notification.pk, read=False).update(read=True)
+            counters.add_unread({request.user.pk: -updated})
+        return Response({'status': 'notification marked as read'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Badge count: a primary-key lookup on the user's counter, never a scan"""
+        return Response({'unread_count': counters.unread_count(request.user)})
\ No newline at end of file
@@ -1,38 +1,38 @@
-from django.contrib import admin
-from .models import Post, Comment
-
-@admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'created_at', 'updated_at']
-    list_filter = ['created_at', 'updated_at', 'author']
-    search_fields = ['title', 'content', 'author__username']
-    readonly_fields = ['created_at', 'updated_at']
-    ordering = ['-created_at']
-    
-    fieldsets = (
-        ('Post Information', {
-            'fields': ('title', 'content', 'author')
-        }),
-        ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
-            'classes': ('collapse',)
-        }),
-    )
-
-@admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ['__str__', 'author', 'post', 'created_at']
-    list_filter = ['created_at', 'updated_at', 'author', 'post']
-    search_fields = ['content', 'author__username', 'post__title']
-    readonly_fields = ['created_at', 'updated_at']
-    ordering = ['-created_at']
-    
-    fieldsets = (
-        ('Comment Information', {
-            'fields': ('post', 'author', 'content')
-        }),
-        ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
-            'classes': ('collapse',)
-        }),
+from django.contrib import admin
+from .models import Post, Comment
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ['title', 'author', 'created_at', 'updated_at']
+    list_filter = ['created_at', 'updated_at', 'author']
+    search_fields = ['title', 'content', 'author__username']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-created_at']
+    
+    fieldsets = (
+        ('Post Information', {
+            'fields': ('title', 'content', 'author')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'author', 'post', 'created_at']
+    list_filter = ['created_at', 'updated_at', 'author', 'post']
+    search_fields = ['content', 'author__username', 'post__title']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-created_at']
+    
+    fieldsets = (
+        ('Comment Information', {
+            'fields': ('post', 'author', 'content')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
     )
\ No newline at end of file
@@ -1,6 +1,22 @@
-from django.apps import AppConfig
-
-
-class PostsConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'posts'
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+class PostsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'posts'
+
+    def ready(self):
+        from . import signals
+        from .models import Comment, Post
+
+        # Keep the full-text search index in step with every post write.
+        post_migrate.connect(signals.setup_search_index, sender=self)
+        post_save.connect(signals.index_post, sender=Post)
+        post_delete.connect(signals.unindex_post, sender=Post)
+        # Anonymous responses cached by posts.response_cache; counter updates
+        # (likes, comment counts) invalidate from posts.counters.
+        post_save.connect(signals.post_changed, sender=Post)
+        post_delete.connect(signals.post_changed, sender=Post)
+        post_save.connect(signals.comment_changed, sender=Comment)
+        post_delete.connect(signals.comment_changed, sender=Comment)
@@ -0,0 +1,152 @@
+"""Denormalized like/comment counters on Post.
+
+Counters are changed with a single ``UPDATE ... SET n = n + delta`` so
+concurrent writers never lose increments, and serializers read them straight
+off the row instead of running a COUNT per post.
+
+Posts receiving more than ``LIKE_SHARD_RATE_THRESHOLD`` likes per minute
+switch to sharded counting: each like lands on one of
+``LIKE_COUNTER_SHARDS`` LikeCounterShard rows picked at random, so writers no
+longer queue on the same row lock. ``fold_like_shards`` (run periodically via
+``manage.py fold_like_shards``) moves shard totals back onto the post, and
+``like_total`` gives the exact count in between.
+
+The per-minute like rate is counted in the ``LIKE_RATE_CACHE`` alias. With
+a per-process cache such as LocMemCache each process only sees its own
+share of the likes, so a post only goes hot once a single process alone
+sees more than the threshold. Point the alias at a shared cache to count
+across processes.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import response_cache
+from .models import Comment, Like, LikeCounterShard, Post
+
+
+def _adjust(post_ids, field, delta):
+    Post.objects.filter(pk__in=post_ids).update(**{field: Greatest(F(field) + delta, Value(0))})
+    if field == 'likes_count':
+        response_cache.invalidate_likes(post_ids)
+    else:
+        response_cache.invalidate(post_ids)
+
+
+def get_shard_count():
+    return getattr(settings, 'LIKE_COUNTER_SHARDS', 8)
+
+
+def get_shard_rate_threshold():
+    return getattr(settings, 'LIKE_SHARD_RATE_THRESHOLD', 600)
+
+
+def get_rate_cache():
+    return caches[getattr(settings, 'LIKE_RATE_CACHE', 'default')]
+
+
+def _is_hot(post_id):
+    """Record a like write and report whether the post is above the shard threshold."""
+    threshold = get_shard_rate_threshold()
+    if threshold is None:
+        return False
+    rates = get_rate_cache()
+    key = f'posts:like-rate:{post_id}:{int(time.time() // 60)}'
+    rates.add(key, 0, timeout=120)
+    try:
+        return rates.incr(key) > threshold
+    except ValueError:
+        # Evicted between add() and incr(); count this write as cold.
+        return False
+
+
+def _add_to_shard(post_id, delta):
+    shard = random.randrange(get_shard_count())
+    rows = LikeCounterShard.objects.filter(post_id=post_id, shard=shard)
+    if not rows.update(count=F('count') + delta):
+        LikeCounterShard.objects.bulk_create(
+            [LikeCounterShard(post_id=post_id, shard=shard)], ignore_conflicts=True,
+        )
+        rows.update(count=F('count') + delta)
+
+
+def add_likes(post_ids, delta=1):
+    cold = []
+    for post_id in post_ids:
+        if _is_hot(post_id):
+            _add_to_shard(post_id, delta)
+        else:
+            cold.append(post_id)
+    if cold:
+        _adjust(cold, 'likes_count', delta)
+
+
+def like_total(post):
+    """Exact like count: the folded total plus any pending shard deltas."""
+    pending = post.like_shards.aggregate(total=Sum('count'))['total'] or 0
+    return max(post.likes_count + pending, 0)
+
+
+def fold_like_shards(posts=None):
+    """Move pending shard deltas onto Post.likes_count.
+
+    Returns the number of posts folded.
+    """
+    shards = LikeCounterShard.objects.all()
+    if posts is not None:
+        shards = shards.filter(post__in=posts)
+    with transaction.atomic():
+        # Locking the shard rows makes concurrent increments wait for the
+        # fold; they then find the row gone and start a fresh shard.
+        rows = list(shards.select_for_update().values_list('pk', 'post_id', 'count'))
+        totals = {}
+        for _, post_id, count in rows:
+            totals[post_id] = totals.get(post_id, 0) + count
+        for post_id, total in totals.items():
+            if total:
+                _adjust([post_id], 'likes_count', total)
+        LikeCounterShard.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+    return len(totals)
+
+
+def add_comment(post_id, delta=1):
+    _adjust([post_id], 'comments_count', delta)
+
+
+def _count_subquery(model):
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile(posts=None):
+    """Recompute counters from the Like and Comment tables.
+
+    Returns the number of posts whose stored counters had drifted.
+    """
+    posts = Post.objects.all() if posts is None else posts
+    # Pending shard deltas would be counted twice once likes_count is reset.
+    fold_like_shards(posts)
+    drifted = posts.annotate(
+        actual_likes=_count_subquery(Like),
+        actual_comments=_count_subquery(Comment),
+    ).exclude(likes_count=F('actual_likes'), comments_count=F('actual_comments'))
+
+    repaired = 0
+    for post in drifted.only('pk').iterator():
+        Post.objects.filter(pk=post.pk).update(
+            likes_count=post.actual_likes,
+            comments_count=post.actual_comments,
+        )
+        repaired += 1
+    return repaired
@@ -0,0 +1,94 @@
+"""Set-based like/unlike shared by the single-post and batch endpoints.
+
+Every call costs a fixed number of statements however many posts it touches:
+the posts and the user's existing likes are read once, new likes are written
+with one bulk insert that ignores conflicts, removed ones with one bulk
+delete, and the counters of all affected posts are moved by one UPDATE.
+Notifications are appended to the outbox and delivered by the worker.
+
+Counters, notifications and statuses follow the likes read at the start, so
+each call first locks the user's row: a concurrent call for the same user (a
+double tap) waits, then reads the likes the first one wrote instead of
+counting them again.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from notifications import outbox
+from . import counters
+from .models import Like, Post
+
+LIKED = 'liked'
+ALREADY_LIKED = 'already_liked'
+UNLIKED = 'unliked'
+NOT_LIKED = 'not_liked'
+NOT_FOUND = 'not_found'
+
+
+def _lock_user(user):
+    list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+def like_posts(user, post_ids):
+    """Like every post in ``post_ids``; returns ``{post_id: status}``."""
+    post_ids = list(dict.fromkeys(post_ids))
+    with transaction.atomic():
+        _lock_user(user)
+        rows = (
+            Post.objects.filter(pk__in=post_ids)
+            .annotate(liked=Exists(Like.objects.filter(user=user, post=OuterRef('pk'))))
+            .values_list('pk', 'author_id', 'liked')
+        )
+        authors, existing = {}, set()
+        for post_id, author_id, liked in rows:
+            authors[post_id] = author_id
+            if liked:
+                existing.add(post_id)
+        new_ids = [post_id for post_id in authors if post_id not in existing]
+        if new_ids:
+            Like.objects.bulk_create(
+                [Like(user=user, post_id=post_id) for post_id in new_ids],
+                ignore_conflicts=True,
+            )
+            counters.add_likes(new_ids)
+            outbox.enqueue(
+                (authors[post_id], user.pk, 'liked your post', Post(pk=post_id))
+                for post_id in new_ids
+            )
+
+    results = {}
+    for post_id in post_ids:
+        if post_id not in authors:
+            results[post_id] = NOT_FOUND
+        elif post_id in existing:
+            results[post_id] = ALREADY_LIKED
+        else:
+            results[post_id] = LIKED
+    return results
+
+
+def unlike_posts(user, post_ids):
+    """Remove the user's likes on ``post_ids``; returns ``{post_id: status}``."""
+    post_ids = list(dict.fromkeys(post_ids))
+    with transaction.atomic():
+        _lock_user(user)
+        liked = set(
+            Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+        if liked:
+            Like.objects.filter(user=user, post_id__in=liked).delete()
+            counters.add_likes(liked, -1)
+    # Only posts the user had not liked need an existence check.
+    rest = [post_id for post_id in post_ids if post_id not in liked]
+    found = set(Post.objects.filter(pk__in=rest).values_list('pk', flat=True)) if rest else set()
+
+    results = {}
+    for post_id in post_ids:
+        if post_id in liked:
+            results[post_id] = UNLIKED
+        elif post_id in found:
+            results[post_id] = NOT_LIKED
+        else:
+            results[post_id] = NOT_FOUND
+    return results
@@ -0,0 +1,42 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from posts.serializers import PostSerializer
+from posts.views import PostViewSet
+from social_media_api.benchmarks import benchmark_user, create_posts
+from social_media_api.renderers import ORJSONParser, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON rendering and parsing speed of DRF\'s JSON classes and the orjson ones on a post list page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=100, help='Posts on the page')
+
+    def handle(self, *args, **options):
+        with benchmark_user('json') as author:
+            create_posts(author, options['posts'], comments=3, title='JSON benchmark')
+            page = PostViewSet.queryset.filter(author=author)[:options['posts']]
+            data = {'next': None, 'previous': None, 'results': PostSerializer(page, many=True).data}
+
+        repeat = options['repeat']
+        body = JSONRenderer().render(data)
+        self.stdout.write(f'payload: {len(body):,} bytes, {options["posts"]} posts')
+        for name, stdlib, fast in (
+            ('render', lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(BytesIO(body)), lambda: ORJSONParser().parse(BytesIO(body))),
+        ):
+            plain, quick = self.run(stdlib, repeat), self.run(fast, repeat)
+            self.stdout.write(f'{name}: {plain * 1000:.2f} ms json, {quick * 1000:.2f} ms orjson ({plain / quick:.1f}x)')
+        self.stdout.write(self.style.SUCCESS('done'))
+
+    def run(self, func, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat
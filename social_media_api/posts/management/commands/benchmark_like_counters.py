@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from posts import counters
+from posts.models import Post
+from social_media_api.benchmarks import benchmark_user
+
+
+class Command(BaseCommand):
+    help = 'Compare like-counter throughput on a single row versus sharded rows under concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=200, help='Increments per thread')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writes database-wide, so sharding cannot help here; '
+                'run against a row-locking database to see the gain.'
+            ))
+        # Deleting the author removes the post and its shards too.
+        with benchmark_user('likes') as author:
+            post = Post.objects.create(author=author, title='Like counter benchmark', content='')
+            single = self.run(lambda: counters._adjust([post.pk], 'likes_count', 1), options)
+            sharded = self.run(lambda: counters._add_to_shard(post.pk, 1), options)
+
+        self.stdout.write(f'single row: {single:,.0f} increments/s')
+        self.stdout.write(f'{counters.get_shard_count()} shards: {sharded:,.0f} increments/s')
+        self.stdout.write(self.style.SUCCESS(f'speedup: {sharded / single:.2f}x'))
+
+    def run(self, increment, options):
+        def worker():
+            try:
+                for _ in range(options['writes']):
+                    increment()
+            finally:
+                close_old_connections()
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            for future in [pool.submit(worker) for _ in range(options['threads'])]:
+                future.result()
+        elapsed = time.perf_counter() - start
+        return options['threads'] * options['writes'] / elapsed
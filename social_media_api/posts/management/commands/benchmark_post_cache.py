@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from posts import response_cache
+from posts.views import PostViewSet
+from social_media_api.benchmarks import benchmark_user, create_posts
+
+
+class Command(BaseCommand):
+    help = 'Compare anonymous post list/detail throughput with and without the response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=50)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        with benchmark_user('cache') as author:
+            posts = create_posts(author, options['posts'], comments=5, title='Cache benchmark', content='content ' * 50)
+            views = {
+                'list': (PostViewSet.as_view({'get': 'list'}), {}),
+                'detail': (PostViewSet.as_view({'get': 'retrieve'}), {'pk': posts[0].pk}),
+            }
+            try:
+                for name, (view, kwargs) in views.items():
+                    request = factory.get('/api/posts/', {'page_size': 20}, HTTP_HOST='localhost')
+                    with override_settings(POST_RESPONSE_CACHE=None):
+                        plain = self.run(view, request, kwargs, options['requests'])
+                    response_cache.invalidate()
+                    cached = self.run(view, request, kwargs, options['requests'])
+                    self.stdout.write(
+                        f'{name}: {plain:,.0f} requests/s uncached, {cached:,.0f} requests/s cached '
+                        f'({cached / plain:.1f}x)'
+                    )
+            finally:
+                response_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS('done'))
+
+    def run(self, view, request, kwargs, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            response = view(request, **kwargs)
+            response.render()
+        return count / (time.perf_counter() - start)
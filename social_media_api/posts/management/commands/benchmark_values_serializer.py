@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.serializers import PostSerializer
+from social_media_api.benchmarks import benchmark_user, create_posts
+
+
+class Command(BaseCommand):
+    help = 'Compare serializing a post list page from model instances versus the values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=100, help='Posts on the page')
+
+    def handle(self, *args, **options):
+        with benchmark_user('values') as author:
+            create_posts(author, options['posts'], title='Values benchmark')
+            page = Post.objects.filter(author=author).select_related('author').order_by('-created_at', '-id')
+            # .all() so every run queries again, as a request would.
+            instances = self.run(lambda: PostSerializer(list(page.all()), many=True).data, options['repeat'])
+            values = self.run(lambda: PostSerializer(page.all(), many=True).data, options['repeat'])
+        self.stdout.write(f'model instances: {instances * 1000:.2f} ms per page of {options["posts"]}')
+        self.stdout.write(f'values() rows: {values * 1000:.2f} ms per page of {options["posts"]}')
+        self.stdout.write(self.style.SUCCESS(f'speedup: {instances / values:.1f}x'))
+
+    def run(self, serialize, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            serialize()
+        return (time.perf_counter() - start) / repeat
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import fold_like_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded like counters back into Post.likes_count (run periodically)'
+
+    def handle(self, *args, **options):
+        folded = fold_like_shards()
+        self.stdout.write(self.style.SUCCESS(f'Folded like shards for {folded} post(s)'))
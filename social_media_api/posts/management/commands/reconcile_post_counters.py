@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the denormalized like/comment counters on posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int, help='Only check these posts (default: all)')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['post_ids']:
+            posts = posts.filter(pk__in=options['post_ids'])
+
+        repaired = reconcile(posts)
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {repaired} post(s)'))
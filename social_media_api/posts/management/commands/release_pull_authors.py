@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.follower_counts import recount_followers
+from posts.timelines import release_pull_authors
+
+
+class Command(BaseCommand):
+    help = 'Push pulled authors who dropped below FEED_PUSH_FOLLOWER_THRESHOLD back to fan-out-on-write'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true', help='Recompute stored follower counts first')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            recount_followers()
+        released = release_pull_authors()
+        self.stdout.write(self.style.SUCCESS(f'Released {released} author(s) to fan-out'))
@@ -1,35 +1,99 @@
-from django.db import models
-from django.conf import settings
-
-# Create your models here.
-class Post(models.Model):
-    title = models.CharField(max_length=200)
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    
-    def __str__(self):
-        return f"{self.title} by {self.author.username.capitalize()} with {self.content.title()}"
-
-
-class Comment(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    def __str__(self):
-        return f"{self.author.username} commented on {self.post.title}"
-    
-class Like(models.Model):
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        unique_together = ('post', 'user')
-    
-    def __str__(self):
-        return f"{self.user.username} liked {self.post.title}"
+from django.db import models
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
+
+# Create your models here.
+class Post(models.Model):
+    title = models.CharField(max_length=200)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Denormalized counters, kept in step by posts.counters and repaired by
+    # `manage.py reconcile_post_counters`.
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Lets notifications about a post be deleted along with it.
+    notifications = GenericRelation(
+        'notifications.Notification',
+        content_type_field='target_content_type',
+        object_id_field='target_object_id',
+    )
+    
+    class Meta:
+        indexes = [
+            # Serves pull-based feed reads of an author's recent posts.
+            models.Index(fields=['author', '-created_at'], name='post_author_created_idx'),
+            # Serves keyset pagination of the post list.
+            models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} by {self.author.username.capitalize()} with {self.content.title()}"
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.author.username} commented on {self.post.title}"
+    
+class Like(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('post', 'user')
+    
+    def __str__(self):
+        return f"{self.user.username} liked {self.post.title}"
+
+
+class TimelineEntry(models.Model):
+    """Materialized home timeline row: one per (follower, post) pair.
+
+    Rows are written when a post is created (fan-out-on-write) so reading a
+    feed is a single range scan over the (owner, -created_at) index.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copied from the post so the timeline can be ordered without a join.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} in {self.owner.username}'s timeline"
+
+
+class LikeCounterShard(models.Model):
+    """One of several rows absorbing like-count deltas for a hot post.
+
+    Spreading increments over shards stops concurrent likes on a viral post
+    from serializing on its single Post row. Shards are periodically folded
+    back into Post.likes_count (see posts.counters.fold_like_shards).
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='like_shards')
+    shard = models.PositiveSmallIntegerField()
+    # Net delta since the last fold; may be negative after unlikes.
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'shard')
+
+    def __str__(self):
+        return f"{self.post.title} like shard {self.shard}"
@@ -1,18 +1,18 @@
-from rest_framework import permissions
-
-class IsAuthorOrReadOnly(permissions.BasePermission):
-    """
-    Custom permission to only allow authors of an object to edit or delete it.
-    Read permissions are allowed for any request,
-    so we'll always allow GET, HEAD or OPTIONS requests.
-    Write permissions are only allowed to the author of the object.
-    """
-
-    def has_object_permission(self, request, view, obj):
-        # Read permissions are allowed to any request,
-        # so we'll always allow GET, HEAD or OPTIONS requests.
-        if request.method in permissions.SAFE_METHODS:
-            return True
-
-        # Write permissions are only allowed to the author of the object.
+from rest_framework import permissions
+
+class IsAuthorOrReadOnly(permissions.BasePermission):
+    """
+    Custom permission to only allow authors of an object to edit or delete it.
+    Read permissions are allowed for any request,
+    so we'll always allow GET, HEAD or OPTIONS requests.
+    Write permissions are only allowed to the author of the object.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        # Read permissions are allowed to any request,
+        # so we'll always allow GET, HEAD or OPTIONS requests.
+        if request.method in permissions.SAFE_METHODS:
+            return True
+
+        # Write permissions are only allowed to the author of the object.
         return obj.author == request.user
\ No newline at end of file
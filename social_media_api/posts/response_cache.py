@@ -0,0 +1,247 @@
+"""Read-through cache of anonymous post list and detail responses.
+
+Anonymous readers all see the same thing, so ``PostViewSet`` keeps the
+serialized data of their list and retrieve responses in the cache named by
+``POST_RESPONSE_CACHE`` (an alias in ``CACHES``, so local memory, a file
+cache or Redis is a settings change). Keys are built from the normalized
+URL and a version token:
+
+* list pages use the posts generation, which every post and comment write
+  replaces;
+* a post's detail uses that post's own version, replaced by writes to it,
+  its comments or its likes.
+
+Likes are the most frequent write, so they leave list pages cached. A list
+entry remembers the like counts it was built with, and each hit reads the
+current ones from per-post keys in the same cache, which like writes drop;
+only posts whose key was dropped cost a (single) query. When a count has
+moved, the served page and its ETag carry the new value.
+
+Old entries are never deleted, they simply stop being looked up and expire
+after ``POST_RESPONSE_CACHE_TTL`` seconds. Versions are fresh random tokens
+rather than counters, so an evicted version can never line up with old
+entries again. Author changes (username, picture) do not replace versions
+and show up once the TTL runs out.
+
+On a miss one request per key computes the response while the others wait
+up to ``POST_RESPONSE_CACHE_LOCK_WAIT`` seconds for it, instead of all
+running the same queries at once, and then compute it themselves. The lock
+itself expires after ``POST_RESPONSE_CACHE_LOCK_TIMEOUT`` seconds should its
+holder die.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from social_media_api.conditional import make_etag
+from .models import Post
+
+GENERATION_KEY = 'posts:responses:generation'
+POLL_INTERVAL = 0.05
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache_alias():
+    return getattr(settings, 'POST_RESPONSE_CACHE', 'default')
+
+
+def get_ttl():
+    return getattr(settings, 'POST_RESPONSE_CACHE_TTL', 60)
+
+
+def get_lock_timeout():
+    return getattr(settings, 'POST_RESPONSE_CACHE_LOCK_TIMEOUT', 5)
+
+
+def get_lock_wait():
+    return getattr(settings, 'POST_RESPONSE_CACHE_LOCK_WAIT', 0.5)
+
+
+def get_cache():
+    return caches[get_cache_alias()]
+
+
+def is_enabled():
+    return get_cache_alias() is not None
+
+
+def version_key(post_id):
+    return f'posts:responses:version:{post_id}'
+
+
+def like_count_key(post_id):
+    return f'posts:responses:likes:{post_id}'
+
+
+def _bump(post_ids, generation=True):
+    keys = [GENERATION_KEY] if generation else []
+    get_cache().set_many({key: uuid.uuid4().hex for key in [*keys, *map(version_key, post_ids)]}, timeout=None)
+    get_cache().delete_many([like_count_key(post_id) for post_id in post_ids])
+
+
+def invalidate(post_ids=()):
+    """Replace the generation and the versions of ``post_ids``.
+
+    Done now, so this process stops serving old data at once, and again
+    after commit, so nothing cached by a reader that ran before the commit
+    survives it.
+    """
+    if not is_enabled():
+        return
+    post_ids = list(post_ids)
+    _bump(post_ids)
+    transaction.on_commit(lambda: _bump(post_ids))
+
+
+def invalidate_likes(post_ids):
+    """Like counts of ``post_ids`` changed: replace their versions, but keep list pages"""
+    if not is_enabled():
+        return
+    post_ids = list(post_ids)
+    _bump(post_ids, generation=False)
+    transaction.on_commit(lambda: _bump(post_ids, generation=False))
+
+
+def like_counts(post_ids):
+    """Current ``likes_count`` of ``post_ids``, from the cache where it holds them"""
+    cache = get_cache()
+    keys = {like_count_key(post_id): post_id for post_id in post_ids}
+    counts = {keys[key]: count for key, count in cache.get_many(keys).items()}
+    missing = [post_id for post_id in post_ids if post_id not in counts]
+    if missing:
+        fresh = dict(Post.objects.filter(pk__in=missing).values_list('pk', 'likes_count'))
+        cache.set_many({like_count_key(post_id): count for post_id, count in fresh.items()}, get_ttl())
+        counts.update(fresh)
+    return counts
+
+
+def _remember_like_counts(counts):
+    cache = get_cache()
+    known = cache.get_many([like_count_key(post_id) for post_id in counts])
+    cache.set_many(
+        {like_count_key(post_id): count for post_id, count in counts.items() if like_count_key(post_id) not in known},
+        get_ttl(),
+    )
+
+
+def _page_like_counts(data):
+    """{post id: likes_count} of a list page, or None when its results cannot be matched to posts"""
+    results = data.get('results') if isinstance(data, dict) else None
+    if results is None or any('likes_count' in item and 'id' not in item for item in results):
+        return None
+    return {item['id']: item['likes_count'] for item in results if 'likes_count' in item}
+
+
+def _with_current_likes(entry):
+    stored = entry['likes']
+    counts = like_counts(list(stored)) if stored else {}
+    if all(counts.get(post_id) == count for post_id, count in stored.items()):
+        return entry
+    results = [
+        {**item, 'likes_count': counts.get(item['id'], item['likes_count'])} if 'likes_count' in item else item
+        for item in entry['data']['results']
+    ]
+    headers = dict(entry['headers'])
+    if 'ETag' in headers:
+        headers['ETag'] = make_etag(headers['ETag'], sorted(counts.items()))
+    return {'data': {**entry['data'], 'results': results}, 'headers': headers}
+
+
+def current_version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def response_key(request, post_id=None):
+    """Cache key for an anonymous GET: absolute path plus sorted query parameters"""
+    params = sorted((name, value) for name, values in request.query_params.lists() for value in values)
+    version = current_version(GENERATION_KEY if post_id is None else version_key(post_id))
+    url = repr((request.build_absolute_uri(request.path), params))
+    return f'posts:responses:{version}:{hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()}'
+
+
+def get_or_set(key, compute):
+    """Return the cached value for ``key``, computing it at most once at a time.
+
+    ``compute`` returns the value to store, or None for results that must
+    not be cached (which are then not shared with waiting requests either).
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock = key + ':lock'
+    if not cache.add(lock, 1, get_lock_timeout()):
+        # Someone else is computing it: wait briefly for their result.
+        deadline = time.monotonic() + get_lock_wait()
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.get(lock) is None:
+                break
+        lock = None
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, get_ttl())
+        return value
+    finally:
+        if lock is not None:
+            cache.delete(lock)
+
+
+def cached_response(request, respond, post_id=None):
+    """Serve an anonymous GET from the cache, calling ``respond()`` on a miss.
+
+    Only the data and validator headers of 200 responses are stored; the
+    response is rendered per request, so content negotiation still applies.
+    List pages whose like counts cannot be refreshed (left without post ids
+    by ``?fields=``) are not stored.
+    """
+    if request.user.is_authenticated or not is_enabled():
+        return respond()
+    computed = None
+
+    def compute():
+        nonlocal computed
+        computed = respond()
+        if computed.status_code != 200:
+            return None
+        headers = {name: computed[name] for name in VALIDATOR_HEADERS if computed.has_header(name)}
+        entry = {'data': computed.data, 'headers': headers}
+        if post_id is None:
+            entry['likes'] = _page_like_counts(computed.data)
+            if entry['likes'] is None:
+                return None
+            _remember_like_counts(entry['likes'])
+        return entry
+
+    entry = get_or_set(response_key(request, post_id), compute)
+    if computed is not None:
+        return computed
+    if post_id is None:
+        entry = _with_current_likes(entry)
+    headers = entry['headers']
+    not_modified = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified')),
+    )
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+    return Response(entry['data'], headers=headers)
@@ -0,0 +1,161 @@
+"""Full-text search over posts.
+
+Search goes through a pluggable backend chosen by ``POST_SEARCH_BACKEND``:
+
+* ``SQLiteFTS5Backend`` keeps an FTS5 inverted index of post titles and
+  content, ranked with bm25 (title matches weigh double).
+* ``DatabaseSearchBackend`` is the portable fallback: one ``icontains``
+  filter per term, ordered by recency.
+
+All terms must match. Under FTS5 each term matches as a word prefix; the
+fallback matches it as a substring anywhere in the text, so ``cat`` also
+finds "concatenate". The FTS5 index is kept in step by post save/delete
+signals (see ``PostsConfig.ready``) and can be rebuilt with
+``manage.py rebuild_search_index``.
+
+``search`` pages with a keyset on (rank, id), so every page costs the same
+however deep the client goes.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def parse_terms(query):
+    return TERM_RE.findall(query.lower())
+
+
+class SearchBackend:
+    """Interface for post search backends.
+
+    ``search`` returns up to ``limit`` (post_id, rank) pairs, best first with
+    ties broken by id. With ``position`` (a previous (rank, id)) only rows
+    after it are returned, or rows before it, nearest first, when
+    ``reverse`` is true.
+    """
+
+    def setup(self):
+        pass
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, position=None, reverse=False):
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    table = 'posts_post_fts'
+    # bm25() column weights for (title, content)
+    weights = (2.0, 1.0)
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f"USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content) '
+                f'SELECT id, title, content FROM {Post._meta.db_table}'
+            )
+
+    def search(self, query, limit, position=None, reverse=False):
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        # Quote each term so FTS5 syntax in user input is inert, and match it as a prefix.
+        match = ' '.join('"%s"*' % term for term in terms)
+        sql = (
+            f'SELECT id, rank FROM ('
+            f'SELECT rowid AS id, bm25({self.table}, %s, %s) AS rank '
+            f'FROM {self.table} WHERE {self.table} MATCH %s)'
+        )
+        params = [*self.weights, match]
+        if position is not None:
+            op = '<' if reverse else '>'
+            sql += f' WHERE rank {op} %s OR (rank = %s AND id {op} %s)'
+            params += [position[0], position[0], position[1]]
+        direction = 'DESC' if reverse else 'ASC'
+        sql += f' ORDER BY rank {direction}, id {direction} LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Unindexed fallback for databases without a full-text engine.
+
+    Results are ordered newest first; the rank is the negated post id.
+    """
+
+    def search(self, query, limit, position=None, reverse=False):
+        terms = parse_terms(query)
+        if not terms:
+            return []
+        posts = Post.objects.all()
+        for term in terms:
+            posts = posts.filter(Q(title__icontains=term) | Q(content__icontains=term))
+        if position is not None:
+            posts = posts.filter(pk__gt=position[1]) if reverse else posts.filter(pk__lt=position[1])
+        posts = posts.order_by('pk' if reverse else '-pk')
+        return [(pk, -pk) for pk in posts.values_list('pk', flat=True)[:limit]]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'POST_SEARCH_BACKEND', None)
+        if path is None:
+            path = 'posts.search.SQLiteFTS5Backend' if connection.vendor == 'sqlite' else 'posts.search.DatabaseSearchBackend'
+        _backend = import_string(path)()
+    return _backend
+
+
+def search_posts(query, queryset, limit, position=None, reverse=False):
+    """Run a search and load the matching posts from ``queryset`` in rank order.
+
+    Each post gets a ``search_rank`` attribute for the cursor.
+    """
+    hits = get_backend().search(query, limit, position, reverse)
+    posts = queryset.in_bulk([post_id for post_id, _ in hits])
+    results = []
+    for post_id, rank in hits:
+        post = posts.get(post_id)
+        if post is not None:
+            post.search_rank = rank
+            results.append(post)
+    return results
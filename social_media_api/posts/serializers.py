@@ -1,55 +1,122 @@
-from rest_framework import serializers
-from django.contrib.auth import get_user_model
-from .models import Post, Comment
-
-User = get_user_model()
-
-class AuthorSerializer(serializers.ModelSerializer):
-    """Serializer for displaying author information"""
-    class Meta:
-        model = User
-        fields = ['id', 'username']
-
-class CommentSerializer(serializers.ModelSerializer):
-    author = AuthorSerializer(read_only=True)
-    
-    class Meta:
-        model = Comment
-        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
-        
-    def create(self, validated_data):
-        # Set the author to the current user
-        validated_data['author'] = self.context['request'].user
-        return super().create(validated_data)
-
-class PostSerializer(serializers.ModelSerializer):
-    author = AuthorSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    comments_count = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments', 'comments_count']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
-        
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-        
-    def create(self, validated_data):
-        # Set the author to the current user
-        validated_data['author'] = self.context['request'].user
-        return super().create(validated_data)
-
-class PostListSerializer(serializers.ModelSerializer):
-    """Simplified serializer for post list view (without comments)"""
-    author = AuthorSerializer(read_only=True)
-    comments_count = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments_count']
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
-        
-    def get_comments_count(self, obj):
-        return obj.comments.count()
\ No newline at end of file
+from rest_framework import serializers
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from accounts.renditions import rendition_urls, urls_for
+from social_media_api.sparse import SparseFieldsetMixin
+from social_media_api.values import ValuesListSerializer
+from .models import Post, Comment
+
+User = get_user_model()
+
+class AuthorSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for displaying author information"""
+    avatar = serializers.SerializerMethodField()
+    values_methods = {'avatar': (['profile_picture_renditions'], 'get_avatar_from_values')}
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'avatar']
+        list_serializer_class = ValuesListSerializer
+        
+    def get_avatar(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
+        
+    def get_avatar_from_values(self, renditions):
+        return urls_for(renditions, self.context.get('request'))
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(read_only=True)
+    
+    class Meta:
+        model = Comment
+        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+        list_serializer_class = ValuesListSerializer
+        
+    def create(self, validated_data):
+        # Set the author to the current user
+        validated_data['author'] = self.context['request'].user
+        return super().create(validated_data)
+
+def get_comment_preview_size():
+    return getattr(settings, 'COMMENT_PREVIEW_SIZE', 3)
+
+def comment_preview_prefetch(columns=None):
+    """Prefetch the newest comments of every post in one window-function query.
+
+    ``columns`` limits the comment columns loaded (see social_media_api.sparse).
+    """
+    comments = Comment.objects.select_related('author').order_by('-created_at', '-id')
+    if columns is not None:
+        if not any(column.startswith('author') for column in columns):
+            comments = comments.select_related(None)
+        comments = comments.only('post', *columns)
+    return Prefetch('comments', queryset=comments[:get_comment_preview_size()], to_attr='comment_preview')
+
+def comment_preview_queryset(post_ids):
+    """The newest comments of each of ``post_ids`` in one window-function query, ``preview_rank`` 1 being the newest"""
+    return Comment.objects.filter(post_id__in=post_ids).annotate(
+        preview_rank=Window(RowNumber(), partition_by=F('post_id'), order_by=[F('created_at').desc(), F('id').desc()]),
+    ).filter(preview_rank__lte=get_comment_preview_size()).order_by('preview_rank')
+
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Post with a bounded preview of its newest comments.
+
+    The full thread is paginated at /posts/{id}/comments/.
+    """
+    author = AuthorSerializer(read_only=True)
+    comments = serializers.SerializerMethodField()
+    values_page_methods = {'comments': 'get_comments_from_values'}
+    
+    class Meta:
+        model = Post
+        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments', 'comments_count', 'likes_count']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'comments_count', 'likes_count']
+        list_serializer_class = ValuesListSerializer
+        
+    def get_comments(self, obj):
+        preview = getattr(obj, 'comment_preview', None)
+        if preview is None:
+            preview = obj.comments.select_related('author').order_by('-created_at', '-id')[:get_comment_preview_size()]
+        return CommentSerializer(preview, many=True, context=self.context, fieldset=self.fieldset_for('comments')).data
+        
+    def get_comments_from_values(self, rows):
+        serializer = CommentSerializer(many=True, context=self.context, fieldset=self.fieldset_for('comments'))
+        previews = {row['pk']: [] for row in rows}
+        comments = list(serializer.values(comment_preview_queryset(previews), 'post_id', 'preview_rank'))
+        for row, comment in zip(comments, serializer.build(comments)):
+            previews[row['post_id']].append(comment)
+        return [previews[row['pk']] for row in rows]
+        
+    def create(self, validated_data):
+        # Set the author to the current user
+        validated_data['author'] = self.context['request'].user
+        return super().create(validated_data)
+
+class PostListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Simplified serializer for post list view (without comments).
+
+    Given a queryset with many=True it serializes from values() rows (see
+    social_media_api.values).
+    """
+    author = AuthorSerializer(read_only=True)
+    
+    class Meta:
+        model = Post
+        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments_count', 'likes_count']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'comments_count', 'likes_count']
+        list_serializer_class = ValuesListSerializer
+
+class BatchLikeSerializer(serializers.Serializer):
+    """Input for the batch like/unlike endpoint"""
+    like = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=100)
+    unlike = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=100)
+    
+    def validate(self, attrs):
+        if not attrs.get('like') and not attrs.get('unlike'):
+            raise serializers.ValidationError('Provide post ids to like or unlike')
+        if set(attrs.get('like', [])) & set(attrs.get('unlike', [])):
+            raise serializers.ValidationError('A post cannot be liked and unliked in the same request')
+        return attrs
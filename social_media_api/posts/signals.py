@@ -0,0 +1,22 @@
+from . import response_cache
+from .search import get_backend
+
+
+def setup_search_index(sender, **kwargs):
+    get_backend().setup()
+
+
+def index_post(sender, instance, **kwargs):
+    get_backend().index(instance)
+
+
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
+
+
+def post_changed(sender, instance, **kwargs):
+    response_cache.invalidate([instance.pk])
+
+
+def comment_changed(sender, instance, **kwargs):
+    response_cache.invalidate([instance.post_id])
@@ -1,317 +1,1222 @@
-from django.test import TestCase
-from django.contrib.auth import get_user_model
-from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
-from rest_framework.authtoken.models import Token
-from .models import Post, Comment
-
-User = get_user_model()
-
-class PostModelTest(TestCase):
-    """Test Post model"""
-    
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        
-    def test_post_creation(self):
-        """Test creating a post"""
-        post = Post.objects.create(
-            author=self.user,
-            title='Test Post',
-            content='This is a test post content.'
-        )
-        self.assertEqual(post.title, 'Test Post')
-        self.assertEqual(post.author, self.user)
-        self.assertTrue(post.created_at)
-        self.assertTrue(post.updated_at)
-        
-    def test_post_str_method(self):
-        """Test post string representation"""
-        post = Post.objects.create(
-            author=self.user,
-            title='Test Post',
-            content='Test content'
-        )
-        expected_str = f"Test Post by {self.user.username}"
-        self.assertEqual(str(post), expected_str)
-
-class CommentModelTest(TestCase):
-    """Test Comment model"""
-    
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.post = Post.objects.create(
-            author=self.user,
-            title='Test Post',
-            content='Test content'
-        )
-        
-    def test_comment_creation(self):
-        """Test creating a comment"""
-        comment = Comment.objects.create(
-            post=self.post,
-            author=self.user,
-            content='This is a test comment.'
-        )
-        self.assertEqual(comment.content, 'This is a test comment.')
-        self.assertEqual(comment.author, self.user)
-        self.assertEqual(comment.post, self.post)
-        
-    def test_comment_str_method(self):
-        """Test comment string representation"""
-        comment = Comment.objects.create(
-            post=self.post,
-            author=self.user,
-            content='Test comment'
-        )
-        expected_str = f"Comment by {self.user.username} on {self.post.title}"
-        self.assertEqual(str(comment), expected_str)
-
-class PostAPITest(APITestCase):
-    """Test Post API endpoints"""
-    
-    def setUp(self):
-        self.client = APIClient()
-        self.user1 = User.objects.create_user(
-            username='testuser1',
-            email='test1@example.com',
-            password='testpass123'
-        )
-        self.user2 = User.objects.create_user(
-            username='testuser2',
-            email='test2@example.com',
-            password='testpass123'
-        )
-        self.token1 = Token.objects.create(user=self.user1)
-        self.token2 = Token.objects.create(user=self.user2)
-        
-        self.post = Post.objects.create(
-            author=self.user1,
-            title='Test Post',
-            content='This is a test post.'
-        )
-        
-    def test_get_posts_list(self):
-        """Test getting posts list (public access)"""
-        url = reverse('post-list-create')
-        response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
-        
-    def test_create_post_authenticated(self):
-        """Test creating a post with authentication"""
-        self.client.force_authenticate(user=self.user1, token=self.token1)
-        url = reverse('post-list-create')
-        data = {
-            'title': 'New Test Post',
-            'content': 'This is new post content.'
-        }
-        response = self.client.post(url, data)
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Post.objects.count(), 2)
-        
-    def test_create_post_unauthenticated(self):
-        """Test creating a post without authentication"""
-        url = reverse('post-list-create')
-        data = {
-            'title': 'New Test Post',
-            'content': 'This is new post content.'
-        }
-        response = self.client.post(url, data)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
-        
-    def test_get_post_detail(self):
-        """Test getting post detail (public access)"""
-        url = reverse('post-detail', kwargs={'pk': self.post.pk})
-        response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['title'], 'Test Post')
-        
-    def test_update_post_by_author(self):
-        """Test updating post by author"""
-        self.client.force_authenticate(user=self.user1, token=self.token1)
-        url = reverse('post-detail', kwargs={'pk': self.post.pk})
-        data = {
-            'title': 'Updated Test Post',
-            'content': 'Updated content.'
-        }
-        response = self.client.put(url, data)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.post.refresh_from_db()
-        self.assertEqual(self.post.title, 'Updated Test Post')
-        
-    def test_update_post_by_non_author(self):
-        """Test updating post by non-author (should fail)"""
-        self.client.force_authenticate(user=self.user2, token=self.token2)
-        url = reverse('post-detail', kwargs={'pk': self.post.pk})
-        data = {
-            'title': 'Updated Test Post',
-            'content': 'Updated content.'
-        }
-        response = self.client.put(url, data)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        
-    def test_delete_post_by_author(self):
-        """Test deleting post by author"""
-        self.client.force_authenticate(user=self.user1, token=self.token1)
-        url = reverse('post-detail', kwargs={'pk': self.post.pk})
-        response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Post.objects.count(), 0)
-        
-    def test_delete_post_by_non_author(self):
-        """Test deleting post by non-author (should fail)"""
-        self.client.force_authenticate(user=self.user2, token=self.token2)
-        url = reverse('post-detail', kwargs={'pk': self.post.pk})
-        response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        
-    def test_search_posts(self):
-        """Test searching posts"""
-        Post.objects.create(
-            author=self.user1,
-            title='Django Tutorial',
-            content='Learning Django framework.'
-        )
-        url = reverse('post-list-create')
-        response = self.client.get(url, {'search': 'django'})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
-        
-    def test_filter_posts_by_author(self):
-        """Test filtering posts by author"""
-        Post.objects.create(
-            author=self.user2,
-            title='User2 Post',
-            content='Post by user2.'
-        )
-        url = reverse('post-list-create')
-        response = self.client.get(url, {'author': self.user1.username})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
-
-class CommentAPITest(APITestCase):
-    """Test Comment API endpoints"""
-    
-    def setUp(self):
-        self.client = APIClient()
-        self.user1 = User.objects.create_user(
-            username='testuser1',
-            email='test1@example.com',
-            password='testpass123'
-        )
-        self.user2 = User.objects.create_user(
-            username='testuser2',
-            email='test2@example.com',
-            password='testpass123'
-        )
-        self.token1 = Token.objects.create(user=self.user1)
-        self.token2 = Token.objects.create(user=self.user2)
-        
-        self.post = Post.objects.create(
-            author=self.user1,
-            title='Test Post',
-            content='This is a test post.'
-        )
-        self.comment = Comment.objects.create(
-            post=self.post,
-            author=self.user1,
-            content='This is a test comment.'
-        )
-        
-    def test_get_post_comments(self):
-        """Test getting comments for a post"""
-        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
-        response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        
-    def test_create_comment_authenticated(self):
-        """Test creating a comment with authentication"""
-        self.client.force_authenticate(user=self.user2, token=self.token2)
-        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
-        data = {'content': 'This is a new comment.'}
-        response = self.client.post(url, data)
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Comment.objects.count(), 2)
-        
-    def test_create_comment_unauthenticated(self):
-        """Test creating a comment without authentication"""
-        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
-        data = {'content': 'This is a new comment.'}
-        response = self.client.post(url, data)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
-        
-    def test_update_comment_by_author(self):
-        """Test updating comment by author"""
-        self.client.force_authenticate(user=self.user1, token=self.token1)
-        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
-        data = {'content': 'Updated comment content.'}
-        response = self.client.put(url, data)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.comment.refresh_from_db()
-        self.assertEqual(self.comment.content, 'Updated comment content.')
-        
-    def test_update_comment_by_non_author(self):
-        """Test updating comment by non-author (should fail)"""
-        self.client.force_authenticate(user=self.user2, token=self.token2)
-        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
-        data = {'content': 'Updated comment content.'}
-        response = self.client.put(url, data)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        
-    def test_delete_comment_by_author(self):
-        """Test deleting comment by author"""
-        self.client.force_authenticate(user=self.user1, token=self.token1)
-        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
-        response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Comment.objects.count(), 0)
-
-class PaginationTest(APITestCase):
-    """Test pagination functionality"""
-    
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        # Create 15 posts for pagination testing
-        for i in range(15):
-            Post.objects.create(
-                author=self.user,
-                title=f'Test Post {i+1}',
-                content=f'Content for post {i+1}'
-            )
-            
-    def test_default_pagination(self):
-        """Test default pagination (10 per page)"""
-        url = reverse('post-list-create')
-        response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 10)
-        self.assertIsNotNone(response.data['next'])
-        
-    def test_custom_page_size(self):
-        """Test custom page size"""
-        url = reverse('post-list-create')
-        response = self.client.get(url, {'page_size': 5})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 5)
-        
-    def test_second_page(self):
-        """Test getting second page"""
-        url = reverse('post-list-create')
-        response = self.client.get(url, {'page': 2})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 5)  # Remaining 5 posts
\ No newline at end of file
+import datetime
+import json
+import threading
+import time
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework import serializers
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from .models import Post, Comment, Like, LikeCounterShard, TimelineEntry
+from accounts.graph import follow_graph
+from accounts.models import Follow
+from notifications.models import OutboxEvent
+from social_media_api.renderers import ORJSONParser, ORJSONRenderer
+from . import response_cache
+from .counters import like_total
+from .likes import like_posts, unlike_posts
+from .serializers import AuthorSerializer, CommentSerializer, PostListSerializer, PostSerializer
+from .timelines import backfill_follow, purge_unfollow, trim_timelines
+
+User = get_user_model()
+
+class PostModelTest(TestCase):
+    """Test Post model"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        
+    def test_post_creation(self):
+        """Test creating a post"""
+        post = Post.objects.create(
+            author=self.user,
+            title='Test Post',
+            content='This is a test post content.'
+        )
+        self.assertEqual(post.title, 'Test Post')
+        self.assertEqual(post.author, self.user)
+        self.assertTrue(post.created_at)
+        self.assertTrue(post.updated_at)
+        
+    def test_post_str_method(self):
+        """Test post string representation"""
+        post = Post.objects.create(
+            author=self.user,
+            title='Test Post',
+            content='Test content'
+        )
+        expected_str = f"Test Post by {self.user.username}"
+        self.assertEqual(str(post), expected_str)
+
+class CommentModelTest(TestCase):
+    """Test Comment model"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            title='Test Post',
+            content='Test content'
+        )
+        
+    def test_comment_creation(self):
+        """Test creating a comment"""
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            content='This is a test comment.'
+        )
+        self.assertEqual(comment.content, 'This is a test comment.')
+        self.assertEqual(comment.author, self.user)
+        self.assertEqual(comment.post, self.post)
+        
+    def test_comment_str_method(self):
+        """Test comment string representation"""
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            content='Test comment'
+        )
+        expected_str = f"Comment by {self.user.username} on {self.post.title}"
+        self.assertEqual(str(comment), expected_str)
+
+class PostAPITest(APITestCase):
+    """Test Post API endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.token1 = Token.objects.create(user=self.user1)
+        self.token2 = Token.objects.create(user=self.user2)
+        
+        self.post = Post.objects.create(
+            author=self.user1,
+            title='Test Post',
+            content='This is a test post.'
+        )
+        
+    def test_get_posts_list(self):
+        """Test getting posts list (public access)"""
+        url = reverse('post-list-create')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        
+    def test_create_post_authenticated(self):
+        """Test creating a post with authentication"""
+        self.client.force_authenticate(user=self.user1, token=self.token1)
+        url = reverse('post-list-create')
+        data = {
+            'title': 'New Test Post',
+            'content': 'This is new post content.'
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.count(), 2)
+        
+    def test_create_post_unauthenticated(self):
+        """Test creating a post without authentication"""
+        url = reverse('post-list-create')
+        data = {
+            'title': 'New Test Post',
+            'content': 'This is new post content.'
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_get_post_detail(self):
+        """Test getting post detail (public access)"""
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Test Post')
+        
+    def test_update_post_by_author(self):
+        """Test updating post by author"""
+        self.client.force_authenticate(user=self.user1, token=self.token1)
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        data = {
+            'title': 'Updated Test Post',
+            'content': 'Updated content.'
+        }
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Updated Test Post')
+        
+    def test_update_post_by_non_author(self):
+        """Test updating post by non-author (should fail)"""
+        self.client.force_authenticate(user=self.user2, token=self.token2)
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        data = {
+            'title': 'Updated Test Post',
+            'content': 'Updated content.'
+        }
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+    def test_delete_post_by_author(self):
+        """Test deleting post by author"""
+        self.client.force_authenticate(user=self.user1, token=self.token1)
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Post.objects.count(), 0)
+        
+    def test_delete_post_by_non_author(self):
+        """Test deleting post by non-author (should fail)"""
+        self.client.force_authenticate(user=self.user2, token=self.token2)
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+    def test_search_posts(self):
+        """Test searching posts"""
+        Post.objects.create(
+            author=self.user1,
+            title='Django Tutorial',
+            content='Learning Django framework.'
+        )
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'search': 'django'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        
+    def test_filter_posts_by_author(self):
+        """Test filtering posts by author"""
+        Post.objects.create(
+            author=self.user2,
+            title='User2 Post',
+            content='Post by user2.'
+        )
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'author': self.user1.username})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+class CommentAPITest(APITestCase):
+    """Test Comment API endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.token1 = Token.objects.create(user=self.user1)
+        self.token2 = Token.objects.create(user=self.user2)
+        
+        self.post = Post.objects.create(
+            author=self.user1,
+            title='Test Post',
+            content='This is a test post.'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post,
+            author=self.user1,
+            content='This is a test comment.'
+        )
+        
+    def test_get_post_comments(self):
+        """Test getting comments for a post"""
+        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        
+    def test_create_comment_authenticated(self):
+        """Test creating a comment with authentication"""
+        self.client.force_authenticate(user=self.user2, token=self.token2)
+        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
+        data = {'content': 'This is a new comment.'}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Comment.objects.count(), 2)
+        
+    def test_create_comment_unauthenticated(self):
+        """Test creating a comment without authentication"""
+        url = reverse('post-comments', kwargs={'post_pk': self.post.pk})
+        data = {'content': 'This is a new comment.'}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_update_comment_by_author(self):
+        """Test updating comment by author"""
+        self.client.force_authenticate(user=self.user1, token=self.token1)
+        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
+        data = {'content': 'Updated comment content.'}
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.content, 'Updated comment content.')
+        
+    def test_update_comment_by_non_author(self):
+        """Test updating comment by non-author (should fail)"""
+        self.client.force_authenticate(user=self.user2, token=self.token2)
+        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
+        data = {'content': 'Updated comment content.'}
+        response = self.client.put(url, data)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+    def test_delete_comment_by_author(self):
+        """Test deleting comment by author"""
+        self.client.force_authenticate(user=self.user1, token=self.token1)
+        url = reverse('comment-detail', kwargs={'pk': self.comment.pk})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Comment.objects.count(), 0)
+
+class PaginationTest(APITestCase):
+    """Test pagination functionality"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        # Create 15 posts for pagination testing
+        for i in range(15):
+            Post.objects.create(
+                author=self.user,
+                title=f'Test Post {i+1}',
+                content=f'Content for post {i+1}'
+            )
+            
+    def test_default_pagination(self):
+        """Test default pagination (10 per page)"""
+        url = reverse('post-list-create')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+        
+    def test_custom_page_size(self):
+        """Test custom page size"""
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'page_size': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        
+    def test_second_page(self):
+        """Test getting second page"""
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)  # Remaining 5 posts
+
+class TimelineTest(APITestCase):
+    """Test fan-out-on-write home timelines"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.reader.following.add(self.author)
+        
+    def create_post(self, title):
+        self.client.force_authenticate(user=self.author)
+        response = self.client.post(reverse('post-list'), {'title': title, 'content': 'content'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+        
+    def test_post_create_fans_out_to_followers(self):
+        """Test creating a post pushes it into follower timelines"""
+        post_id = self.create_post('Hello')
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, post_id=post_id).exists())
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.author).exists())
+        
+    def test_fan_out_reads_follow_table(self):
+        """Test a follow the in-memory graph has not seen yet still gets the post"""
+        follow_graph.load()
+        newcomer = User.objects.create_user(username='newcomer', password='testpass123')
+        # As if written by another process: no signals, no graph update.
+        Follow.objects.bulk_create([Follow(follower=newcomer, following=self.author)])
+        post_id = self.create_post('Hello')
+        self.assertTrue(TimelineEntry.objects.filter(owner=newcomer, post_id=post_id).exists())
+        
+    def test_feed_reads_timeline_newest_first(self):
+        """Test the feed returns timeline posts newest first"""
+        first = self.create_post('First')
+        second = self.create_post('Second')
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [second, first])
+        self.assertEqual(response.data['results'][0]['author'], 'author')
+        
+    def test_feed_takes_following_from_graph(self):
+        """Test reading the feed does not query the follow table"""
+        self.create_post('Hello')
+        follow_graph.load()
+        self.client.force_authenticate(user=self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed'))
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertFalse([query for query in queries if '"accounts_follow"' in query['sql']])
+        
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_timeline_is_capped(self):
+        """Test timelines keep only the newest TIMELINE_MAX_LENGTH posts"""
+        ids = [self.create_post(f'Post {i}') for i in range(4)]
+        kept = TimelineEntry.objects.filter(owner=self.reader).values_list('post_id', flat=True)
+        self.assertEqual(sorted(kept), sorted(ids[-2:]))
+        
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_trim_only_deletes_past_the_cap(self):
+        """Test trimming leaves owners under the cap alone and breaks created_at ties by post id"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='content') for i in range(3)]
+        at = timezone.now()
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner=self.reader, post=post, created_at=at) for post in posts]
+            + [TimelineEntry(owner=other, post=posts[0], created_at=at)]
+        )
+        with self.assertNumQueries(2):
+            trim_timelines([self.reader.pk, other.pk])
+        kept = TimelineEntry.objects.filter(owner=self.reader).values_list('post_id', flat=True)
+        self.assertEqual(sorted(kept), [posts[1].pk, posts[2].pk])
+        self.assertTrue(TimelineEntry.objects.filter(owner=other).exists())
+        with self.assertNumQueries(1):
+            trim_timelines([self.reader.pk, other.pk])
+        
+    def test_follow_and_unfollow_repair_timeline(self):
+        """Test follow backfills and unfollow purges the timeline"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        post = Post.objects.create(author=other, title='Old', content='content')
+        self.reader.following.add(other)
+        backfill_follow(self.reader, other)
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, post=post).exists())
+        self.reader.following.remove(other)
+        purge_unfollow(self.reader, other)
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader, post=post).exists())
+        
+    def test_post_delete_removes_entries(self):
+        """Test deleting a post removes it from timelines"""
+        post_id = self.create_post('Doomed')
+        self.client.delete(reverse('post-detail', kwargs={'pk': post_id}))
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post_id).exists())
+        
+    def test_rebuild_timelines_command(self):
+        """Test rebuilding timelines from the follow graph"""
+        post = Post.objects.create(author=self.author, title='Direct', content='content')
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader).exists())
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, post=post).exists())
+
+    @override_settings(FEED_PULL_FOLLOWER_THRESHOLD=2)
+    def test_high_follower_authors_are_pulled(self):
+        """Test authors above the follower threshold are merged in at read time"""
+        celebrity = User.objects.create_user(username='celebrity', password='testpass123')
+        fan = User.objects.create_user(username='fan', password='testpass123')
+        self.reader.following.add(celebrity)
+        fan.following.add(celebrity)
+        pushed = self.create_post('Pushed')
+        pulled = Post.objects.create(author=celebrity, title='Pulled', content='content')
+        
+        self.client.force_authenticate(user=celebrity)
+        self.client.post(reverse('post-list'), {'title': 'Not pushed', 'content': 'content'})
+        self.assertFalse(TimelineEntry.objects.filter(post__author=celebrity).exists())
+        
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.get(reverse('feed'))
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(len(ids), 3)
+        self.assertIn(pushed, ids)
+        self.assertIn(pulled.id, ids)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    @override_settings(FEED_PULL_FOLLOWER_THRESHOLD=2, FEED_PUSH_FOLLOWER_THRESHOLD=2)
+    def test_pulled_posts_survive_losing_followers(self):
+        """Test a pulled author's posts stay in feeds after dropping below the threshold"""
+        fan = User.objects.create_user(username='fan', password='testpass123')
+        fan.following.add(self.author)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.pull_delivery)
+        post_id = self.create_post('Pulled')
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post_id).exists())
+        
+        fan.following.remove(self.author)
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([item['id'] for item in response.data['results']], [post_id])
+        
+        call_command('release_pull_authors', stdout=StringIO())
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.pull_delivery)
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, post_id=post_id).exists())
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([item['id'] for item in response.data['results']], [post_id])
+
+
+class CursorPaginationTest(APITestCase):
+    """Test keyset cursor pagination"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.reader.following.add(self.user)
+        self.client.force_authenticate(user=self.user)
+        # Create 15 posts through the API so they are also fanned out
+        self.ids = []
+        for i in range(15):
+            response = self.client.post(reverse('post-list'), {'title': f'Post {i+1}', 'content': 'content'})
+            self.ids.append(response.data['id'])
+        self.ids.reverse()
+        
+    def walk(self, url, params=None):
+        """Follow next links to the end, returning the ids of every page"""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([item['id'] for item in response.data['results']])
+            if not response.data['next']:
+                return pages, response
+            response = self.client.get(response.data['next'])
+            
+    def test_post_pages_follow_cursor(self):
+        """Test posts are paged newest first without gaps or repeats"""
+        pages, _ = self.walk(reverse('post-list'), {'page_size': 4})
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 3])
+        self.assertEqual(sum(pages, []), self.ids)
+        
+    def test_previous_link_returns_prior_page(self):
+        """Test the previous link walks back to the same rows"""
+        first = self.client.get(reverse('post-list'), {'page_size': 5})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+        
+    def test_posts_created_at_same_instant(self):
+        """Test rows sharing created_at are split by id"""
+        Post.objects.update(created_at=Post.objects.first().created_at)
+        pages, _ = self.walk(reverse('post-list'), {'page_size': 4})
+        self.assertEqual(sum(pages, []), self.ids)
+        
+    def test_feed_is_paginated(self):
+        """Test the feed uses the same cursor pagination"""
+        self.client.force_authenticate(user=self.reader)
+        pages, _ = self.walk(reverse('feed'), {'page_size': 6})
+        self.assertEqual(sum(pages, []), self.ids)
+        
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get(reverse('post-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostCounterTest(APITestCase):
+    """Test denormalized like/comment counters"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Test Post', content='content')
+        self.client.force_authenticate(user=self.user)
+        
+    def test_comment_create_and_delete_update_counter(self):
+        """Test comment writes keep comments_count in step"""
+        response = self.client.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'Hi'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.client.delete(reverse('comment-detail', kwargs={'pk': response.data['id']}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        
+    def test_like_and_unlike_update_counter(self):
+        """Test like/unlike keep likes_count in step"""
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.client.post(reverse('unlike-post', kwargs={'pk': self.post.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        
+    def test_counters_are_serialized(self):
+        """Test counters are exposed on the post detail"""
+        Post.objects.filter(pk=self.post.pk).update(likes_count=3, comments_count=2)
+        response = self.client.get(reverse('post-detail', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.data['likes_count'], 3)
+        self.assertEqual(response.data['comments_count'], 2)
+        
+    def test_reconcile_command_repairs_drift(self):
+        """Test reconcile_post_counters recomputes counters from the tables"""
+        Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        Like.objects.create(post=self.post, user=self.user)
+        out = StringIO()
+        call_command('reconcile_post_counters', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+        self.assertIn('Repaired counters on 1 post', out.getvalue())
+
+
+class CommentPreviewTest(APITestCase):
+    """Test bounded comment previews on posts"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.posts = [Post.objects.create(author=self.user, title=f'Post {i}', content='content') for i in range(3)]
+        for post in self.posts:
+            for i in range(5):
+                Comment.objects.create(post=post, author=self.user, content=f'Comment {i}')
+                
+    @override_settings(COMMENT_PREVIEW_SIZE=2)
+    def test_preview_holds_newest_comments(self):
+        """Test each post embeds only its newest comments"""
+        response = self.client.get(reverse('post-detail', kwargs={'pk': self.posts[0].pk}))
+        self.assertEqual([c['content'] for c in response.data['comments']], ['Comment 4', 'Comment 3'])
+        
+    def test_preview_query_count_is_constant(self):
+        """Test listing posts does not query comments per post"""
+        url = reverse('post-list')
+        # Page of posts with its validators, comment previews.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(response.data['results'][0]['comments']), 3)
+        
+    def test_full_thread_is_paginated(self):
+        """Test the full thread is served by its own paginated endpoint"""
+        url = reverse('post-comments', kwargs={'pk': self.posts[0].pk})
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+
+class BatchLikeTest(APITestCase):
+    """Test batch like/unlike"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='content') for i in range(3)]
+        self.client.force_authenticate(user=self.user)
+        
+    def test_batch_like_reports_per_post_status(self):
+        """Test liking many posts at once"""
+        Like.objects.create(post=self.posts[0], user=self.user)
+        ids = [post.pk for post in self.posts]
+        response = self.client.post(reverse('batch-like'), {'like': ids + [9999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = {item['post']: item['status'] for item in response.data['results']}
+        self.assertEqual(statuses, {ids[0]: 'already_liked', ids[1]: 'liked', ids[2]: 'liked', 9999: 'not_found'})
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(OutboxEvent.objects.filter(recipient_id=self.author.pk).count(), 2)
+        self.posts[1].refresh_from_db()
+        self.assertEqual(self.posts[1].likes_count, 1)
+        
+    def test_batch_like_query_count_is_constant(self):
+        """Test the number of statements does not grow with the batch"""
+        ids = [post.pk for post in self.posts]
+        ContentType.objects.get_for_model(Post)
+        with self.assertNumQueries(7):
+            self.client.post(reverse('batch-like'), {'like': ids[:1]}, format='json')
+        with self.assertNumQueries(7):
+            self.client.post(reverse('batch-like'), {'like': ids[1:]}, format='json')
+            
+    def test_repeated_like_counts_once(self):
+        """Test liking the same posts twice moves counters and notifies only once"""
+        ids = [post.pk for post in self.posts[:2]]
+        self.assertEqual(like_posts(self.user, ids), {ids[0]: 'liked', ids[1]: 'liked'})
+        self.assertEqual(like_posts(self.user, ids), {ids[0]: 'already_liked', ids[1]: 'already_liked'})
+        self.assertEqual(list(Post.objects.filter(pk__in=ids).values_list('likes_count', flat=True)), [1, 1])
+        self.assertEqual(OutboxEvent.objects.filter(recipient_id=self.author.pk).count(), 2)
+        self.assertEqual(unlike_posts(self.user, ids), {ids[0]: 'unliked', ids[1]: 'unliked'})
+        self.assertEqual(unlike_posts(self.user, ids), {ids[0]: 'not_liked', ids[1]: 'not_liked'})
+        self.assertEqual(list(Post.objects.filter(pk__in=ids).values_list('likes_count', flat=True)), [0, 0])
+        
+    def test_batch_unlike(self):
+        """Test unliking many posts at once"""
+        for post in self.posts[:2]:
+            Like.objects.create(post=post, user=self.user)
+        Post.objects.filter(pk__in=[self.posts[0].pk, self.posts[1].pk]).update(likes_count=1)
+        ids = [post.pk for post in self.posts]
+        response = self.client.post(reverse('batch-like'), {'unlike': ids}, format='json')
+        statuses = {item['post']: item['status'] for item in response.data['results']}
+        self.assertEqual(statuses, {ids[0]: 'unliked', ids[1]: 'unliked', ids[2]: 'not_liked'})
+        self.assertFalse(Like.objects.filter(user=self.user).exists())
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].likes_count, 0)
+        
+    def test_batch_rejects_conflicting_actions(self):
+        """Test a post cannot be liked and unliked together"""
+        response = self.client.post(reverse('batch-like'), {'like': [1], 'unlike': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    def test_single_like_missing_post(self):
+        """Test the single-post endpoint still answers 404"""
+        response = self.client.post(reverse('like-post', kwargs={'pk': 9999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ShardedLikeCounterTest(APITestCase):
+    """Test sharded like counters for hot posts"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.post = Post.objects.create(author=self.author, title='Viral', content='content')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(5)]
+        
+    def like_all(self):
+        for fan in self.fans:
+            self.client.force_authenticate(user=fan)
+            self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+            
+    @override_settings(LIKE_SHARD_RATE_THRESHOLD=2)
+    def test_hot_post_writes_go_to_shards(self):
+        """Test likes above the rate threshold land on shard rows"""
+        self.like_all()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(self.post.like_shards.aggregate(total=Sum('count'))['total'], 3)
+        self.assertEqual(like_total(self.post), 5)
+        
+    @override_settings(LIKE_SHARD_RATE_THRESHOLD=2)
+    def test_fold_moves_shards_onto_post(self):
+        """Test folding shards restores the exact total on the post"""
+        self.like_all()
+        call_command('fold_like_shards', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 5)
+        self.assertFalse(LikeCounterShard.objects.exists())
+        
+    @override_settings(LIKE_SHARD_RATE_THRESHOLD=2, LIKE_RATE_CACHE='post_responses')
+    def test_rate_is_counted_in_configured_cache(self):
+        """Test LIKE_RATE_CACHE picks the cache the like rate is counted in"""
+        caches['post_responses'].clear()
+        self.like_all()
+        self.post.refresh_from_db()
+        self.assertEqual(like_total(self.post), 5)
+        self.assertTrue(self.post.like_shards.exists())
+        self.assertFalse([key for key in cache._cache if 'like-rate' in key])
+        
+    @override_settings(LIKE_SHARD_RATE_THRESHOLD=None)
+    def test_sharding_can_be_disabled(self):
+        """Test no shards are used when the threshold is None"""
+        self.like_all()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 5)
+        self.assertFalse(LikeCounterShard.objects.exists())
+
+
+class PostSearchTest(APITestCase):
+    """Test full-text post search"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.title_hit = Post.objects.create(author=self.user, title='Django tips', content='Short post.')
+        self.content_hit = Post.objects.create(author=self.user, title='Weekend', content='Read about django and rest.')
+        Post.objects.create(author=self.user, title='Flask', content='Another framework.')
+        
+    def search(self, query, **params):
+        response = self.client.get(reverse('post-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+        
+    def test_ranked_results(self):
+        """Test title matches rank above content matches"""
+        ids = [item['id'] for item in self.search('django').data['results']]
+        self.assertEqual(ids, [self.title_hit.pk, self.content_hit.pk])
+        
+    def test_prefix_and_all_terms(self):
+        """Test terms match as prefixes and must all match"""
+        ids = [item['id'] for item in self.search('djan res').data['results']]
+        self.assertEqual(ids, [self.content_hit.pk])
+        
+    def test_index_follows_updates_and_deletes(self):
+        """Test the index is kept in sync with post writes"""
+        self.title_hit.title = 'Python tips'
+        self.title_hit.save()
+        self.content_hit.delete()
+        self.assertEqual(self.search('django').data['results'], [])
+        self.assertEqual(len(self.search('python').data['results']), 1)
+        
+    def test_search_is_cursor_paginated(self):
+        """Test search pages follow a rank cursor"""
+        first = self.search('django', page_size=1)
+        self.assertEqual(first.data['results'][0]['id'], self.title_hit.pk)
+        second = self.client.get(first.data['next'])
+        self.assertEqual(second.data['results'][0]['id'], self.content_hit.pk)
+        self.assertIsNone(second.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'][0]['id'], self.title_hit.pk)
+        
+    def test_fts_syntax_is_inert(self):
+        """Test FTS operators in user input are treated as plain terms"""
+        self.assertEqual(self.search('django OR "').status_code, status.HTTP_200_OK)
+
+
+class ConditionalGetTest(APITestCase):
+    """Test ETag / Last-Modified validators on post endpoints"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('post-list'), {'title': 'Test Post', 'content': 'content'})
+        self.post = Post.objects.get(pk=response.data['id'])
+        self.detail = reverse('post-detail', kwargs={'pk': self.post.pk})
+        
+    def assertNotModified(self, url):
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        
+    def test_unchanged_endpoints_answer_304(self):
+        """Test If-None-Match returns 304 on list, detail, comments and feed"""
+        Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        for url in (
+            reverse('post-list'), self.detail, reverse('post-comments', kwargs={'pk': self.post.pk}),
+            reverse('comment-list'), reverse('feed'),
+        ):
+            with self.subTest(url=url):
+                self.assertNotModified(url)
+                
+    def test_304_skips_serialization(self):
+        """Test a matching detail request only runs the validator query"""
+        etag = self.client.get(self.detail)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_list_reads_validators_with_the_page(self):
+        """Test list ETags come from the page query and a 304 skips the previews"""
+        Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        url = reverse('post-list')
+        with self.assertNumQueries(2):
+            etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_feed_304_skips_post_bodies(self):
+        """Test a matching feed request does not load titles or contents"""
+        etag = self.client.get(reverse('feed'))['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('"posts_post"."content"' in query['sql'] for query in queries))
+        
+    def test_if_modified_since(self):
+        """Test detail honours If-Modified-Since with its Last-Modified"""
+        last_modified = self.client.get(self.detail)['Last-Modified']
+        response = self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_edit_moves_updated_at_and_etag(self):
+        """Test editing a post changes updated_at and the validators"""
+        etag = self.client.get(self.detail)['ETag']
+        created = self.post.updated_at
+        self.client.patch(self.detail, {'title': 'Edited'})
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, created)
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Edited')
+        
+    def test_like_and_comment_change_etag(self):
+        """Test counters and new comments invalidate post validators"""
+        list_etag = self.client.get(reverse('post-list'))['ETag']
+        etag = self.client.get(self.detail)['ETag']
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.assertNotEqual(self.client.get(self.detail)['ETag'], etag)
+        etag = self.client.get(self.detail)['ETag']
+        self.client.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'Hi'})
+        self.assertNotEqual(self.client.get(self.detail)['ETag'], etag)
+        self.assertNotEqual(self.client.get(reverse('post-list'))['ETag'], list_etag)
+        
+    def test_etag_is_per_user(self):
+        """Test validators differ between users"""
+        etag = self.client.get(self.detail)['ETag']
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class AnonymousResponseCacheTest(APITestCase):
+    """Test the anonymous post response cache"""
+    
+    def setUp(self):
+        caches['post_responses'].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = Post.objects.create(author=self.user, title='Test Post', content='content')
+        self.author = APIClient()
+        self.author.force_authenticate(user=self.user)
+        self.detail = reverse('post-detail', kwargs={'pk': self.post.pk})
+        
+    def test_repeated_reads_skip_the_database(self):
+        """Test anonymous list and detail hits run no queries"""
+        for url in (reverse('post-list'), self.detail):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(second.status_code, status.HTTP_200_OK)
+                self.assertEqual(second.json(), first.json())
+                self.assertEqual(second['ETag'], first['ETag'])
+                
+    def test_query_string_is_normalized(self):
+        """Test parameter order does not split the cache"""
+        self.client.get(reverse('post-list') + '?page_size=5&search=')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('post-list') + '?search=&page_size=5')
+            
+    def test_hit_answers_304(self):
+        """Test cached entries still honour If-None-Match"""
+        etag = self.client.get(self.detail)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_writes_invalidate(self):
+        """Test post, comment and like writes are seen by the next read"""
+        self.client.get(self.detail)
+        self.client.get(reverse('post-list'))
+        self.author.patch(self.detail, {'title': 'Edited'})
+        self.assertEqual(self.client.get(self.detail).data['title'], 'Edited')
+        self.author.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'Hi'})
+        self.assertEqual(self.client.get(self.detail).data['comments_count'], 1)
+        self.author.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.assertEqual(self.client.get(self.detail).data['likes_count'], 1)
+        self.assertEqual(self.client.get(reverse('post-list')).data['results'][0]['likes_count'], 1)
+        self.author.delete(self.detail)
+        self.assertEqual(self.client.get(self.detail).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('post-list')).data['results'], [])
+        
+    def test_detail_version_is_per_post(self):
+        """Test a write to one post keeps other posts' details cached"""
+        other = Post.objects.create(author=self.user, title='Other', content='content')
+        other_detail = reverse('post-detail', kwargs={'pk': other.pk})
+        self.client.get(other_detail)
+        self.author.patch(self.detail, {'title': 'Edited'})
+        with self.assertNumQueries(0):
+            self.client.get(other_detail)
+            
+    def test_authenticated_reads_bypass_cache(self):
+        """Test authenticated users always get a fresh response"""
+        self.author.get(self.detail)
+        Post.objects.filter(pk=self.post.pk).update(title='Changed quietly')
+        self.assertEqual(self.author.get(self.detail).data['title'], 'Changed quietly')
+        
+    def test_concurrent_miss_waits_for_the_first(self):
+        """Test a request finding the key locked waits instead of computing"""
+        backend = response_cache.get_cache()
+        backend.add('stampede:lock', 1)
+        threading.Timer(0.1, backend.set, ('stampede', 'value')).start()
+        compute = lambda: self.fail('computed while another request held the lock')
+        self.assertEqual(response_cache.get_or_set('stampede', compute), 'value')
+        
+    @override_settings(POST_RESPONSE_CACHE_LOCK_WAIT=0.1)
+    def test_wait_for_lock_is_bounded(self):
+        """Test a request gives up waiting after the lock wait, not the lock's lifetime"""
+        response_cache.get_cache().add('stuck:lock', 1)
+        start = time.monotonic()
+        self.assertEqual(response_cache.get_or_set('stuck', lambda: 'computed'), 'computed')
+        self.assertLess(time.monotonic() - start, 1)
+        
+    def test_likes_keep_list_cached(self):
+        """Test a like refreshes the count on the cached list instead of evicting it"""
+        first = self.client.get(reverse('post-list'))
+        self.author.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        # Only the like count of the liked post is read again.
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse('post-list'))
+        self.assertEqual(second.data['results'][0]['likes_count'], 1)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        with self.assertNumQueries(0):
+            third = self.client.get(reverse('post-list'), HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class ORJSONRendererTest(APITestCase):
+    """Test the orjson renderer and parser against DRF's JSON classes"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        
+    def render_both(self, data, media_type=None):
+        return ORJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type)
+        
+    def test_output_matches_json_renderer(self):
+        """Test awkward types render byte-identical to JSONRenderer"""
+        now = timezone.now()
+        data = {
+            'utc': now,
+            'offset': now.astimezone(timezone.get_fixed_timezone(90)),
+            'naive': timezone.make_naive(now),
+            'date': now.date(),
+            'time': datetime.time(12, 30, 15, 250),
+            'duration': datetime.timedelta(minutes=3),
+            'price': Decimal('19.99'),
+            'uuid': uuid.uuid4(),
+            'lazy': gettext_lazy('Invalid token.'),
+            'text': 'caf\u00e9 \u2028 \u2029 "quoted" \U0001f600',
+            'numbers': [0, -1, 2 ** 63 - 1, 1.5, True, None],
+            1: 'int key',
+        }
+        orjson_output, json_output = self.render_both(data)
+        self.assertEqual(orjson_output, json_output)
+        
+    def test_serialized_posts_match(self):
+        """Test a real post list page renders identically"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        for i in range(3):
+            post = Post.objects.create(author=user, title=f'Post {i}', content='Ünïcode content')
+            Comment.objects.create(post=post, author=user, content='Hi')
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        
+    def test_falls_back_when_orjson_cannot_encode(self):
+        """Test indented output and oversized ints go through JSONRenderer"""
+        orjson_output, json_output = self.render_both({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertEqual(orjson_output, json_output)
+        orjson_output, json_output = self.render_both({'big': 2 ** 70})
+        self.assertEqual(orjson_output, json_output)
+        
+    def test_parser(self):
+        """Test the parser decodes bodies and reports errors like JSONParser"""
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"a": ["é", 1.5]}'.encode())), {'a': ['é', 1.5]})
+        latin1 = {'encoding': 'latin-1'}
+        self.assertEqual(parser.parse(BytesIO('"café"'.encode('latin-1')), parser_context=latin1), 'café')
+        for body in (b'{"a": }', b'NaN'):
+            with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+                parser.parse(BytesIO(body))
+                
+    def test_api_accepts_json_bodies(self):
+        """Test JSON request bodies are parsed by the configured parser"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            reverse('post-list'), data='{"title": "Via orjson", "content": "body"}', content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], 'Via orjson')
+
+
+class ValuesSerializerTest(APITestCase):
+    """Test the values() fast path produces the same output as the model path"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.pictured = User.objects.create_user(
+            username='pictured', password='testpass123',
+            profile_picture_renditions={'small': 'profile_pics/renditions/small-48-abc.webp'},
+        )
+        for author in (self.user, self.pictured):
+            for i in range(3):
+                post = Post.objects.create(author=author, title=f'Post {i}', content='Ünïcode \u2028 content')
+                Comment.objects.create(post=post, author=self.user, content=f'Comment {i}')
+                Comment.objects.create(post=post, author=self.pictured, content=f'Reply {i}')
+        Post.objects.filter(pk=post.pk).update(likes_count=5)
+        self.context = {'request': APIRequestFactory().get('/')}
+        
+    def assertSameOutput(self, serializer_class, queryset):
+        fast = serializer_class(queryset, many=True, context=self.context).data
+        slow = serializer_class(list(queryset.select_related('author')), many=True, context=self.context).data
+        self.assertEqual(len(fast), queryset.count())
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+        
+    def test_post_list_matches(self):
+        """Test PostListSerializer output is identical on both paths"""
+        self.assertSameOutput(PostListSerializer, Post.objects.order_by('-created_at'))
+        
+    @override_settings(COMMENT_PREVIEW_SIZE=1)
+    def test_post_with_previews_matches(self):
+        """Test PostSerializer, comment previews included, is identical on both paths"""
+        self.assertSameOutput(PostSerializer, Post.objects.order_by('-created_at'))
+        
+    def test_post_list_endpoint_uses_values(self):
+        """Test the post list is served from values() rows with the previews in one query"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('post-list'))
+        posts = Post.objects.filter(pk__in=[post['id'] for post in response.data['results']])
+        expected = PostSerializer(list(posts.order_by('-created_at', '-id')), many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"password"', queries[0]['sql'])
+        
+    def test_comment_list_matches(self):
+        """Test CommentSerializer output is identical on both paths"""
+        self.assertSameOutput(CommentSerializer, Comment.objects.order_by('id'))
+        
+    def test_author_list_matches(self):
+        """Test AuthorSerializer output, avatars included, is identical on both paths"""
+        queryset = User.objects.order_by('id')
+        fast = AuthorSerializer(queryset, many=True, context=self.context).data
+        self.assertEqual(fast, AuthorSerializer(list(queryset), many=True, context=self.context).data)
+        self.assertEqual(fast[1]['avatar'], {'small': 'http://testserver/media/profile_pics/renditions/small-48-abc.webp'})
+        
+    def test_reads_only_needed_columns(self):
+        """Test the fast path is one query over the serialized columns"""
+        with CaptureQueriesContext(connection) as queries:
+            PostListSerializer(Post.objects.all(), many=True, context=self.context).data
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn('"username"', sql)
+        self.assertNotIn('"password"', sql)
+        self.assertNotIn('"bio"', sql)
+        
+    def test_comment_thread_pages_match(self):
+        """Test the paginated comment endpoints serve the same comments"""
+        post = Post.objects.order_by('pk').first()
+        response = self.client.get(reverse('post-comments', kwargs={'pk': post.pk}), {'page_size': 1})
+        expected = CommentSerializer(
+            list(Comment.objects.filter(post=post).order_by('-created_at', '-id')), many=True,
+            context={'request': response.wsgi_request},
+        ).data
+        second = self.client.get(response.data['next'])
+        self.assertEqual(response.json()['results'] + second.json()['results'], json.loads(JSONRenderer().render(expected)))
+        
+    def test_unsupported_fields_are_rejected(self):
+        """Test fields the fast path cannot reproduce raise instead of diverging"""
+        class Unsupported(PostListSerializer):
+            shout = serializers.SerializerMethodField()
+            
+            class Meta(PostListSerializer.Meta):
+                fields = ['id', 'shout']
+                
+            def get_shout(self, obj):
+                return obj.title.upper()
+                
+        with self.assertRaises(ImproperlyConfigured):
+            Unsupported(Post.objects.all(), many=True).data
+
+
+class SparseFieldsetTest(APITestCase):
+    """Test ?fields= and ?exclude= on post endpoints"""
+    
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title=f'Post {i}', content='long content ' * 100)
+            Comment.objects.create(post=post, author=self.user, content=f'Comment {i}')
+        self.url = reverse('post-list')
+        
+    def get(self, url=None, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        post_queries = [q['sql'] for q in queries if q['sql'].startswith('SELECT "posts_post"."id"')]
+        return response, post_queries[-1], queries
+        
+    def test_compact_feed_fields(self):
+        """Test fields= trims the output, nested fields included, and the columns loaded"""
+        response, sql, _ = self.get(fields='id,title,author.username,created_at')
+        for post in response.data['results']:
+            self.assertEqual(list(post), ['id', 'author', 'title', 'created_at'])
+            self.assertEqual(post['author'], {'username': 'testuser'})
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"profile_picture_renditions"', sql)
+        
+    def test_exclude_skips_comment_prefetch(self):
+        """Test excluding comments drops the preview and its query"""
+        response, sql, queries = self.get(exclude='content,comments')
+        self.assertNotIn('content', response.data['results'][0])
+        self.assertNotIn('comments', response.data['results'][0])
+        self.assertNotIn('"content"', sql)
+        self.assertFalse(any('"posts_comment"."content"' in q['sql'] for q in queries))
+        
+    def test_author_left_out_skips_join(self):
+        """Test leaving author out drops the join to users"""
+        response, sql, _ = self.get(fields='id,title')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title'])
+        self.assertNotIn('accounts_customuser', sql)
+        
+    def test_nested_comment_fields(self):
+        """Test dotted names reach into the comment preview"""
+        response, _, queries = self.get(fields='id,comments.content')
+        self.assertEqual(response.data['results'][0]['comments'], [{'content': 'Comment 2'}])
+        comment_sql = [q['sql'] for q in queries if 'FROM "posts_comment"' in q['sql']][-1]
+        self.assertNotIn('"updated_at"', comment_sql.split(' FROM ')[0])
+        
+    def test_detail_and_cursor(self):
+        """Test sparse fieldsets apply to retrieve and keep the cursor working"""
+        post = Post.objects.order_by('pk').first()
+        response, _, _ = self.get(reverse('post-detail', kwargs={'pk': post.pk}), fields='title')
+        self.assertEqual(response.data, {'title': 'Post 0'})
+        first, _, queries = self.get(fields='id', page_size=2)
+        self.assertEqual(len(queries), 1)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([p['id'] for p in second.data['results']], [post.pk])
+        
+    def test_unknown_field_is_rejected(self):
+        """Test unknown names and selecting inside a plain field answer 400"""
+        for params in ({'fields': 'id,nope'}, {'exclude': 'author.nope'}, {'fields': 'title.length'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BenchmarkCommandTest(APITestCase):
+    """Test the benchmark commands work on throwaway data only"""
+    
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_benchmarks_leave_existing_data_alone(self):
+        """Test a user named like a benchmark's is not reused or deleted, and nothing is left behind"""
+        user = User.objects.create_user(username='benchmark-values', password='testpass123')
+        post = Post.objects.create(author=user, title='Real post', content='content')
+        for name, options in (
+            ('benchmark_values_serializer', {'repeat': 1, 'posts': 2}),
+            ('benchmark_json', {'repeat': 1, 'posts': 2}),
+            ('benchmark_post_cache', {'requests': 1, 'posts': 2}),
+            ('benchmark_token_auth', {'requests': 1}),
+        ):
+            with self.subTest(command=name):
+                call_command(name, stdout=StringIO(), **options)
+                self.assertEqual(list(User.objects.values_list('username', flat=True)), ['benchmark-values'])
+                self.assertEqual(list(Post.objects.all()), [post])
+                self.assertFalse(Comment.objects.exists())
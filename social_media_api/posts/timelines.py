@@ -0,0 +1,258 @@
+"""Materialized home timelines (fan-out-on-write).
+
+When a post is created its id is pushed into the timeline of every follower
+of the author. Each timeline is capped at ``TIMELINE_MAX_LENGTH`` entries, so
+reading a feed is one indexed range scan instead of a join over the follow
+graph. Follow/unfollow repair the affected timelines, deleting a post drops
+its entries through the foreign key cascade, and
+``manage.py rebuild_timelines`` rebuilds them from scratch.
+
+Authors with at least ``FEED_PULL_FOLLOWER_THRESHOLD`` followers are flagged
+for pull delivery (``CustomUser.pull_delivery``, kept by
+accounts/follower_counts.py) and are not pushed: fanning out to that many
+timelines is too expensive per post. Their recent posts are pulled at read
+time instead and k-way merged with the pushed timeline. Nothing they wrote
+while pulled is in any timeline, so the flag outlives a drop in followers:
+``manage.py release_pull_authors`` clears it only after pushing the author's
+recent posts to their followers, and only below
+``FEED_PUSH_FOLLOWER_THRESHOLD``, so an author hovering at the threshold is
+not pushed and pulled by turns.
+
+Fan-out reads follower sets from the ``Follow`` table, not the in-memory
+follow graph (``accounts.graph``): the graph can lag behind follows written
+by other processes, and a post fanned out from a stale follower set would
+never reach the new follower's timeline. Reads take the reader's following
+set from the graph instead; at worst a pulled author just followed in
+another process shows up one ``FOLLOW_GRAPH_CHECK_INTERVAL`` late.
+"""
+import heapq
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from accounts.graph import follow_graph
+from accounts.models import Follow
+from .models import Post, TimelineEntry
+
+# Rows written per bulk_create / delete statement.
+BATCH_SIZE = 1000
+# Owners trimmed per delete statement, keeping its OR chain well inside
+# the database's expression depth limits.
+TRIM_GROUP_SIZE = 100
+
+
+def get_timeline_length():
+    return getattr(settings, 'TIMELINE_MAX_LENGTH', 500)
+
+
+def get_pull_threshold():
+    return getattr(settings, 'FEED_PULL_FOLLOWER_THRESHOLD', 10000)
+
+
+def get_push_threshold():
+    return min(getattr(settings, 'FEED_PUSH_FOLLOWER_THRESHOLD', 8000), get_pull_threshold())
+
+
+def _follower_ids(user):
+    return Follow.objects.filter(following=user).values_list('follower_id', flat=True)
+
+
+def _following_ids(user):
+    return Follow.objects.filter(follower=user).values_list('following_id', flat=True)
+
+
+def pull_author_ids(author_ids):
+    """Return the subset of ``author_ids`` delivered by pull instead of push."""
+    return set(
+        get_user_model().objects.filter(pk__in=author_ids, pull_delivery=True).values_list('pk', flat=True)
+    )
+
+
+def trim_timelines(owner_ids):
+    """Drop everything past the cap for the given timeline owners.
+
+    Each owner's entry just past the cap is found with an OFFSET walk down
+    the (owner, -created_at, -post) index, so nothing is sorted or
+    numbered. Only the owners that have such an entry are deleted from, and
+    only at or below it.
+    """
+    owner_ids = list(owner_ids)
+    limit = get_timeline_length()
+    newest = TimelineEntry.objects.filter(owner_id=OuterRef('pk')).order_by('-created_at', '-post_id')
+    for start in range(0, len(owner_ids), BATCH_SIZE):
+        chunk = owner_ids[start:start + BATCH_SIZE]
+        past_cap = (
+            get_user_model().objects.filter(pk__in=chunk)
+            .annotate(entry=Subquery(newest.values('pk')[limit:limit + 1]))
+            .filter(entry__isnull=False)
+            .values('entry')
+        )
+        cutoffs = list(TimelineEntry.objects.filter(pk__in=past_cap).values_list('owner_id', 'created_at', 'post_id'))
+        for group in range(0, len(cutoffs), TRIM_GROUP_SIZE):
+            overflow = Q()
+            for owner_id, created_at, post_id in cutoffs[group:group + TRIM_GROUP_SIZE]:
+                overflow |= Q(owner_id=owner_id) & (Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lte=post_id))
+            TimelineEntry.objects.filter(overflow).delete()
+
+
+def fan_out_post(post):
+    """Push a newly created post into the timeline of each of its author's followers."""
+    # Read the flag with the followers: the author instance may be a cached copy.
+    follower_ids = list(
+        Follow.objects.filter(following_id=post.author_id, following__pull_delivery=False)
+        .values_list('follower_id', flat=True)
+    )
+    if not follower_ids:
+        return
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=owner_id, post=post, created_at=post.created_at) for owner_id in follower_ids],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        trim_timelines(follower_ids)
+
+
+def backfill_follow(follower, following):
+    """Merge the recent posts of a newly followed user into the follower's timeline."""
+    backfill_follows(follower, [following.pk])
+
+
+def backfill_follows(follower, following_ids):
+    """Merge the recent posts of several newly followed users in one pass."""
+    author_ids = set(following_ids)
+    author_ids -= pull_author_ids(author_ids)
+    if not author_ids:
+        return
+    recent = (
+        Post.objects.filter(author_id__in=author_ids)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:get_timeline_length()]
+    )
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner=follower, post_id=post_id, created_at=created_at) for post_id, created_at in recent],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        trim_timelines([follower.pk])
+
+
+def purge_unfollow(follower, following):
+    """Drop an unfollowed user's posts from the follower's timeline."""
+    purge_unfollows(follower, [following.pk])
+
+
+def purge_unfollows(follower, following_ids):
+    """Drop the posts of several unfollowed users from the follower's timeline."""
+    TimelineEntry.objects.filter(owner=follower, post__author_id__in=following_ids).delete()
+
+
+def rebuild_timeline(user):
+    """Rebuild one user's timeline from the follow table."""
+    following_ids = set(_following_ids(user))
+    following_ids -= pull_author_ids(following_ids)
+    recent = (
+        Post.objects.filter(author_id__in=following_ids)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:get_timeline_length()]
+    )
+    with transaction.atomic():
+        TimelineEntry.objects.filter(owner=user).delete()
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner=user, post_id=post_id, created_at=created_at) for post_id, created_at in recent],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def _push_recent_posts(author_id, after=None):
+    """Push an author's recent posts, those with ids above ``after`` if given, to every follower.
+
+    Returns the newest post id pushed, or ``after`` when there was none.
+    """
+    recent = Post.objects.filter(author_id=author_id)
+    if after is not None:
+        recent = recent.filter(pk__gt=after)
+    recent = list(recent.order_by('-created_at', '-id').values_list('id', 'created_at')[:get_timeline_length()])
+    if not recent:
+        return after
+    follower_ids = list(_follower_ids(author_id))
+    # Keep each round of entries near BATCH_SIZE rows per owner chunk.
+    step = max(1, BATCH_SIZE // len(recent))
+    for start in range(0, len(follower_ids), step):
+        chunk = follower_ids[start:start + step]
+        with transaction.atomic():
+            TimelineEntry.objects.bulk_create(
+                [
+                    TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+                    for owner_id in chunk for post_id, created_at in recent
+                ],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            trim_timelines(chunk)
+    return max(post_id for post_id, _ in recent)
+
+
+def release_pull_authors():
+    """Return pulled authors now below the push threshold to fan-out-on-write.
+
+    Each author's recent posts are pushed before the flag is cleared, so
+    their followers' feeds never miss them, and anything posted while that
+    ran is pushed once the flag is down. Returns the number of authors released.
+    """
+    users = get_user_model().objects
+    authors = users.filter(pull_delivery=True, followers_count__lt=get_push_threshold()).values_list('pk', flat=True)
+    released = 0
+    for author_id in list(authors):
+        newest = _push_recent_posts(author_id)
+        users.filter(pk=author_id).update(pull_delivery=False)
+        _push_recent_posts(author_id, after=newest)
+        released += 1
+    return released
+
+
+def _keyset(rows, position, reverse, field):
+    """Restrict newest-first ``rows`` to one side of a (created_at, id) position."""
+    if position is not None:
+        created_at, pk = position
+        op = 'gt' if reverse else 'lt'
+        rows = rows.filter(Q(**{f'created_at__{op}': created_at}) | Q(created_at=created_at, **{f'{field}__{op}': pk}))
+    if reverse:
+        return rows.order_by('created_at', field)
+    return rows.order_by('-created_at', f'-{field}')
+
+
+def read_timeline(user, limit=None, position=None, reverse=False, defer=()):
+    """Return up to ``limit`` posts from a user's feed.
+
+    Posts are newest first and older than ``position``, a (created_at, id)
+    pair, when given. With ``reverse`` they are oldest first and newer than
+    ``position`` instead, which is how previous pages are fetched.
+
+    The pushed timeline and the recent posts of each pulled author are
+    already sorted, so they are combined with a k-way heap merge.
+
+    ``defer`` names Post fields to leave unloaded.
+    """
+    if limit is None:
+        limit = get_timeline_length()
+    entries = _keyset(TimelineEntry.objects.filter(owner=user), position, reverse, 'post_id')
+    entries = entries.select_related('post__author').defer(*[f'post__{field}' for field in defer])
+    sources = [[entry.post for entry in entries[:limit]]]
+    for author_id in pull_author_ids(follow_graph.following_ids(user.pk)):
+        recent = _keyset(Post.objects.filter(author_id=author_id), position, reverse, 'id')
+        sources.append(list(recent.select_related('author').defer(*defer)[:limit]))
+
+    posts, seen = [], set()
+    # Posts pushed before an author crossed the threshold may appear twice.
+    for post in heapq.merge(*sources, key=lambda post: (post.created_at, post.id), reverse=not reverse):
+        if post.id in seen:
+            continue
+        seen.add(post.id)
+        posts.append(post)
+        if len(posts) == limit:
+            break
+    return posts
@@ -1,14 +1,15 @@
-from django.urls import path
-from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView
-
-router = DefaultRouter()
-router.register('posts', PostViewSet, basename='post')
-router.register('comments', CommentViewSet, basename='comment')
-
-
-urlpatterns = [
-    path('feed/', FeedView.as_view(), name='feed'),
-    path('posts/<int:pk>/like/', LikePostView.as_view(), name='like-post'),
-    path('posts/<int:pk>/unlike/', UnlikePostView.as_view(), name='unlike-post'),
-] + router.urls
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView, BatchLikeView
+
+router = DefaultRouter()
+router.register('posts', PostViewSet, basename='post')
+router.register('comments', CommentViewSet, basename='comment')
+
+
+urlpatterns = [
+    path('feed/', FeedView.as_view(), name='feed'),
+    path('posts/<int:pk>/like/', LikePostView.as_view(), name='like-post'),
+    path('posts/<int:pk>/unlike/', UnlikePostView.as_view(), name='unlike-post'),
+    path('likes/batch/', BatchLikeView.as_view(), name='batch-like'),
+] + router.urls
@@ -1,86 +1,244 @@
-from django.shortcuts import render
-from rest_framework import viewsets, permissions
-from .models import Post, Comment
-from .serializers import CommentSerializer, PostSerializer
-from rest_framework import filters
-#  Classes to implementation feeds for post of this social media app.
-from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
-
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('-created_at')
-    serializer_class = PostSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'content']
-
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-        
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by('-created_at')
-    serializer_class = CommentSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-        
-# --------------- #####################------------------------------#
-#  Classes for the implementation of feeds for post of this social media app.
-#----------------######################------------------------------#
-class FeedView(APIView):
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        following_users = request.user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        feed_data = [
-            {
-                "id": posts.id,
-                "author": posts.author.username,
-                "title": posts.title,
-                "content": posts.content,
-                "created_at": posts.created_at,
-            }
-            for post in posts
-        ]
-        return Response(feed_data)
-    
-# from django.shortcuts import get_object_or_404
-from .models import Post, Like
-from rest_framework import generics
-from notifications.models import Notification
-
-class LikePostView(APIView):
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
-        
-        if created:
-            # create a notification for the post's author
-            if post.author != request.user:
-                Notification.objects.create(
-                    recipient=post.author,
-                    actor = request.user,
-                    verb='liked your post',
-                    target=post,
-                )
-            return Response({'message': 'Post liked successfuly!'})
-        else:
-            return Response({'message': 'you already liked this post.'}, status=400)
-        
-class UnlikePostView(APIView):
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        like = Like.objects.filter(user=request.user, post=post)
-        
-        if like.exists():
-            like.delete()
-            return Response({'message': 'Post unliked successfully!'})
-        else:
-            return Response({'message': 'You have not liked this post yet.'}, status=400)
+from django.shortcuts import render
+from django.db import transaction
+from rest_framework import viewsets, permissions
+from .models import Post, Comment
+from .serializers import CommentSerializer, PostSerializer, comment_preview_prefetch
+#  Classes to implementation feeds for post of this social media app.
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from .timelines import fan_out_post, read_timeline
+from . import counters
+from .response_cache import cached_response
+from .search import search_posts
+from django.db.models import F, OuterRef, Subquery
+from social_media_api.conditional import ConditionalGetMixin, conditional, make_etag
+from social_media_api.pagination import KeysetCursorPagination, RankCursorPagination
+from social_media_api.sparse import only_columns, parse_fieldset
+
+# What a serialized comment depends on, for ETags.
+COMMENT_VALIDATOR_FIELDS = ('updated_at', 'post_id', 'author_updated_at')
+
+# Post validators that only matter while the named field is serialized.
+POST_FIELD_VALIDATORS = {'author_updated_at': 'author', 'thread_updated_at': 'comments'}
+
+
+def comment_validator_annotations():
+    return {'author_updated_at': F('author__updated_at')}
+
+
+def comment_validator_queryset():
+    return Comment.objects.only('id', 'created_at', 'updated_at', 'post_id').annotate(**comment_validator_annotations())
+
+
+def latest_comment_update():
+    return Subquery(
+        Comment.objects.filter(post=OuterRef('pk')).order_by('-updated_at').values('updated_at')[:1]
+    )
+
+
+class PostViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.select_related('author').order_by('-created_at')
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    # Everything a serialized post depends on, including its comment preview.
+    validator_fields = ('updated_at', 'likes_count', 'comments_count', 'thread_updated_at', 'author_updated_at')
+
+    def get_validator_fields(self):
+        # Leave out what the requested fieldset does not serialize, and its join.
+        fields = self.get_serializer().fields
+        return tuple(
+            name for name in self.validator_fields
+            if name not in POST_FIELD_VALIDATORS or POST_FIELD_VALIDATORS[name] in fields
+        )
+
+    def get_validator_annotations(self):
+        annotations = {'thread_updated_at': latest_comment_update(), 'author_updated_at': F('author__updated_at')}
+        fields = self.get_validator_fields()
+        return {name: annotation for name, annotation in annotations.items() if name in fields}
+
+    def get_validator_queryset(self):
+        return Post.objects.only('id', 'created_at', 'updated_at', 'likes_count', 'comments_count').annotate(
+            **self.get_validator_annotations(),
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            # ?fields= / ?exclude= (see social_media_api.sparse)
+            kwargs.setdefault('fieldset', parse_fieldset(self.request.query_params))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        serializer = self.get_serializer()
+        fields = serializer.fields
+        if 'author' not in fields:
+            queryset = queryset.select_related(None)
+        if serializer.fieldset:
+            columns = only_columns(serializer)
+            if columns is not None:
+                # The cursor reads the ordering field of every row.
+                queryset = queryset.only(*columns, self.paginator.ordering_field)
+        if 'comments' in fields:
+            comments = CommentSerializer(context=self.get_serializer_context(), fieldset=serializer.fieldset_for('comments'))
+            columns = only_columns(comments) if comments.fieldset else None
+            queryset = queryset.prefetch_related(comment_preview_prefetch(columns))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, lambda: self.search_or_list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        respond = lambda: super(PostViewSet, self).retrieve(request, *args, **kwargs)
+        return cached_response(request, respond, post_id=self.kwargs['pk'])
+
+    def search_or_list(self, request, *args, **kwargs):
+        query = request.query_params.get('search', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+        # ?search= goes to the full-text index (posts.search), ranked best first.
+        queryset = self.get_queryset()
+        paginator = RankCursorPagination()
+        posts = paginator.paginate_keyset(
+            lambda position, reverse, limit: search_posts(query, queryset, limit, position, reverse),
+            request,
+        )
+        serializer = self.get_serializer(posts, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def perform_create(self, serializer):
+        post = serializer.save(author=self.request.user)
+        fan_out_post(post)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """The full comment thread of a post, cursor paginated"""
+        post = self.get_object()
+        serializer = CommentSerializer(many=True, context=self.get_serializer_context())
+        return self.conditional_list(
+            request, Comment.objects.filter(post=post), serializer,
+            COMMENT_VALIDATOR_FIELDS, comment_validator_annotations(),
+        )
+        
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.select_related('author').order_by('-created_at')
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    validator_fields = COMMENT_VALIDATOR_FIELDS
+
+    def get_validator_annotations(self):
+        return comment_validator_annotations()
+
+    def get_validator_queryset(self):
+        return comment_validator_queryset()
+    
+    @transaction.atomic
+    def perform_create(self, serializer):
+        comment = serializer.save(author=self.request.user)
+        counters.add_comment(comment.post_id)
+        
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_post_id = serializer.instance.post_id
+        comment = serializer.save()
+        if comment.post_id != old_post_id:
+            counters.add_comment(old_post_id, -1)
+            counters.add_comment(comment.post_id)
+            
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        counters.add_comment(post_id, -1)
+        
+# --------------- #####################------------------------------#
+#  Classes for the implementation of feeds for post of this social media app.
+#----------------######################------------------------------#
+class FeedView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        # Timelines are materialized when posts are created (see posts.timelines),
+        # so the feed is a single range scan over the user's timeline rows.
+        # Titles and bodies are only loaded once the ETag did not match.
+        paginator = KeysetCursorPagination()
+        posts = paginator.paginate_keyset(
+            lambda position, reverse, limit: read_timeline(request.user, limit, position, reverse, defer=('title', 'content')),
+            request,
+        )
+
+        def respond():
+            bodies = Post.objects.only('title', 'content').in_bulk([post.id for post in posts])
+            feed_data = [
+                {
+                    "id": post.id,
+                    "author": post.author.username,
+                    "title": bodies[post.id].title,
+                    "content": bodies[post.id].content,
+                    "created_at": post.created_at,
+                }
+                for post in posts
+                if post.id in bodies
+            ]
+            return paginator.get_paginated_response(feed_data)
+
+        etag = make_etag(
+            'feed', request.user.pk, request.get_full_path(),
+            paginator.next_position, paginator.previous_position, paginator.restart,
+            [(post.pk, post.updated_at, post.author.username) for post in posts],
+        )
+        return conditional(request, respond, etag=etag)
+    
+from .likes import like_posts, unlike_posts, LIKED, UNLIKED, NOT_FOUND
+from .serializers import BatchLikeSerializer
+from rest_framework import status
+
+class LikePostView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, pk):
+        result = like_posts(request.user, [pk])[pk]
+        if result == NOT_FOUND:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if result == LIKED:
+            return Response({'message': 'Post liked successfuly!'})
+        else:
+            return Response({'message': 'you already liked this post.'}, status=400)
+        
+class UnlikePostView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, pk):
+        result = unlike_posts(request.user, [pk])[pk]
+        if result == NOT_FOUND:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if result == UNLIKED:
+            return Response({'message': 'Post unliked successfully!'})
+        else:
+            return Response({'message': 'You have not liked this post yet.'}, status=400)
+
+class BatchLikeView(APIView):
+    """Like and/or unlike many posts in one request.
+
+    Body: {"like": [post ids], "unlike": [post ids]}. Each list is applied
+    with a fixed number of statements and the status of every post is
+    returned.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BatchLikeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = []
+        for action_name, apply in (('like', like_posts), ('unlike', unlike_posts)):
+            post_ids = serializer.validated_data.get(action_name)
+            if post_ids:
+                statuses = apply(request.user, post_ids)
+                results += [
+                    {'post': post_id, 'action': action_name, 'status': result}
+                    for post_id, result in statuses.items()
+                ]
+        return Response({'results': results})
@@ -1,16 +1,23 @@
-"""
-ASGI config for social_media_api project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
-
-application = get_asgi_application()
+"""
+ASGI config for social_media_api project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the project through it (e.g. ``uvicorn social_media_api.asgi:application``)
+so long-lived notification streams do not each hold a worker thread.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
+
+application = get_asgi_application()
+
+# Load the follow graph before the first request (see accounts/graph.py).
+from accounts.graph import warm_start  # noqa: E402
+
+warm_start()
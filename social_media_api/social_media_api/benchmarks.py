@@ -0,0 +1,34 @@
+"""Throwaway data for the ``benchmark_*`` management commands.
+
+Every run gets a user of its own under a fresh random username, and
+deleting that user afterwards removes everything the run created with it
+(posts, comments, shards, tokens). A benchmark therefore never picks up an
+existing account, and never deletes one.
+"""
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+
+from posts.models import Comment, Post
+
+
+@contextmanager
+def benchmark_user(label):
+    """A new user for the duration of the block, deleted with all it owns on the way out"""
+    user = get_user_model().objects.create_user(username=f'benchmark-{label}-{uuid.uuid4().hex[:12]}')
+    try:
+        yield user
+    finally:
+        user.delete()
+
+
+def create_posts(author, count, comments=0, title='Benchmark', content='Lorem ipsum dolor sit amet. ' * 20):
+    """``count`` posts by ``author``, each with ``comments`` comments by them"""
+    posts = Post.objects.bulk_create([
+        Post(author=author, title=f'{title} {i}', content=content) for i in range(count)
+    ])
+    Comment.objects.bulk_create([
+        Comment(post=post, author=author, content='Nice post!') for post in posts for _ in range(comments)
+    ])
+    return posts
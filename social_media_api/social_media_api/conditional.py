@@ -0,0 +1,115 @@
+"""Conditional GET (ETag / Last-Modified) for list and detail endpoints.
+
+Validators are ids, modification times and counters. A list reads them
+as extra columns of the values() query that loads its page (see
+social_media_api.values), so a full response costs no extra query; a detail
+reads them from a narrow query for the one requested object first. When the
+client's ``If-None-Match`` or ``If-Modified-Since`` still matches, the view
+answers 304 without serializing the body, or on detail, loading it.
+
+Lists send only an ETag. Their "last modified" time would not move when a
+row drops off the page, so it is not a safe validator for them.
+"""
+import hashlib
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .values import paginate_values
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional(request, respond, etag=None, last_modified=None):
+    """Return 304 (or 412) when the request's validators match, else ``respond()``"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is None:
+        response = respond()
+    if response.status_code in (200, 304):
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def latest(values):
+    """Most recent of the datetimes in ``values``, ignoring anything else"""
+    times = [value for value in values if isinstance(value, datetime)]
+    return max(times) if times else None
+
+
+class ConditionalGetMixin:
+    """Answer conditional list and retrieve requests on a ModelViewSet.
+
+    Lists are served by the values() fast path of the view's serializer.
+    ``validator_fields`` (or ``get_validator_fields()``) names the columns of
+    each row that go into the ETag, and ``get_validator_annotations()`` adds
+    those that are not model fields.
+    ``get_validator_queryset()`` returns the narrow queryset retrieve reads
+    them from; every datetime among them counts toward its Last-Modified.
+    """
+    validator_fields = ('updated_at',)
+
+    def get_validator_fields(self):
+        return self.validator_fields
+
+    def get_validator_annotations(self):
+        return {}
+
+    def get_validator_queryset(self):
+        raise NotImplementedError
+
+    def get_validators(self, rows, fields=None):
+        fields = self.get_validator_fields() if fields is None else fields
+        return [
+            tuple(row[field] for field in ('pk', *fields)) if isinstance(row, dict)
+            else (row.pk, *(getattr(row, field) for field in fields))
+            for row in rows
+        ]
+
+    def conditional_list(self, request, queryset, serializer, fields=None, annotations=None):
+        """Serve the page of ``queryset`` the request asks for, ETagged from the same query
+
+        ``serializer`` is a ValuesListSerializer; ``fields`` and ``annotations``
+        default to the view's own validators.
+        """
+        fields = self.get_validator_fields() if fields is None else fields
+        annotations = self.get_validator_annotations() if annotations is None else annotations
+        rows = paginate_values(self, queryset.annotate(**annotations), serializer, *fields)
+        paginator = self.paginator
+        etag = make_etag(
+            request.user.pk, request.get_full_path(),
+            paginator.next_position, paginator.previous_position, paginator.restart,
+            self.get_validators(rows, fields),
+        )
+        return conditional(request, lambda: self.get_paginated_response(serializer.build(rows)), etag=etag)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_list(request, queryset, self.get_serializer(many=True))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        respond = lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        try:
+            row = self.get_validator_queryset().filter(**{self.lookup_field: lookup}).first()
+        except (TypeError, ValueError, ValidationError):
+            row = None
+        if row is None:
+            return respond()
+        values = self.get_validators([row])[0]
+        return conditional(request, respond, etag=make_etag(request.user.pk, *values), last_modified=latest(values))
@@ -0,0 +1,153 @@
+"""Keyset (cursor) pagination shared by the post, comment, feed and notification lists.
+
+Pages are addressed by an opaque cursor built from the (created_at, id) of the
+row at the page boundary, so fetching any page is an index range scan of
+``page_size + 1`` rows no matter how deep the client has scrolled.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    # Rows are ordered newest first by (ordering_field, pk).
+    ordering_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        field = self.ordering_field
+
+        def fetch(position, reverse, limit):
+            rows = queryset
+            if position is not None:
+                value, pk = position
+                op = 'gt' if reverse else 'lt'
+                rows = rows.filter(Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk}))
+            if reverse:
+                rows = rows.order_by(field, 'pk')
+            else:
+                rows = rows.order_by(f'-{field}', '-pk')
+            return list(rows[:limit])
+
+        return self.paginate_keyset(fetch, request)
+
+    def paginate_keyset(self, fetch, request):
+        """Paginate any newest-first source.
+
+        ``fetch(position, reverse, limit)`` must return up to ``limit`` rows
+        strictly older than ``position`` (newest first), or strictly newer
+        than it (oldest first) when ``reverse`` is true.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position, reverse = cursor if cursor else (None, False)
+
+        rows = fetch(position, reverse, self.page_size + 1)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self.get_position(rows[-1]) if has_next and rows else None
+        self.previous_position = self.get_position(rows[0]) if has_previous and rows else None
+        # Paged back past the newest row: "next" is the first page.
+        self.restart = reverse and not rows
+        return rows
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            # values() rows, e.g. from ValuesListSerializer.values(queryset, ordering_field)
+            return row[self.ordering_field], row['pk']
+        return getattr(row, self.ordering_field), row.pk
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            value = self.parse_value(data['v'])
+            return (value, int(data['pk'])), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_value(self, raw):
+        value = parse_datetime(raw)
+        if value is None:
+            raise ValueError(raw)
+        return value
+
+    def serialize_value(self, value):
+        return value.isoformat()
+
+    def encode_cursor(self, position, reverse):
+        value, pk = position
+        data = {'v': self.serialize_value(value), 'pk': pk}
+        if reverse:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.restart:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class RankCursorPagination(KeysetCursorPagination):
+    """Keyset pagination over (search_rank, id) for ranked search results"""
+    ordering_field = 'search_rank'
+
+    def parse_value(self, raw):
+        return float(raw)
+
+    def serialize_value(self, value):
+        return value
@@ -1,146 +1,257 @@
-"""
-Django settings for social_media_api project.
-
-Generated by 'django-admin startproject' using Django 5.2.5.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.2/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/5.2/ref/settings/
-"""
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-sv0bgxoza0x9tr5kb)g#=y@fr0uk*k@fogkyzuu9g)%0nj62=q'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'rest_framework',
-    'rest_framework.authtoken',
-    'django_filters',
-    'accounts',
-    'posts',
-]
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'social_media_api.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'social_media_api.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.2/howto/static-files/
-
-STATIC_URL = 'static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
-
-# Media files
-MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-# Custom user model
-AUTH_USER_MODEL = 'accounts.CustomUser'
-
-# REST Framework settings
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
-}
-
+"""
+Django settings for social_media_api project.
+
+Generated by 'django-admin startproject' using Django 5.2.5.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-sv0bgxoza0x9tr5kb)g#=y@fr0uk*k@fogkyzuu9g)%0nj62=q'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'django_filters',
+    'accounts',
+    'posts',
+    'notifications',
+]
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'social_media_api.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'social_media_api.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Per-process local memory. For a cache shared by all workers use
+# 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION: a directory)
+# or 'django.core.cache.backends.redis.RedisCache' (LOCATION: 'redis://127.0.0.1:6379').
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'post_responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'post-responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+
+# PBKDF2 work factor; stored hashes with another count are upgraded at login.
+PASSWORD_HASHERS = [
+    'accounts.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = 1000000
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Media files
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Stream uploads to a temporary file instead of holding them in memory
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Square profile picture renditions (pixels) built by `manage.py rendition_worker`
+PROFILE_PICTURE_RENDITIONS = {'small': 48, 'medium': 96, 'large': 256}
+PROFILE_PICTURE_QUALITY = 80
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Custom user model
+AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# REST Framework settings
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetCursorPagination',
+    # orjson-backed JSON (see social_media_api/renderers.py); swap back to
+    # rest_framework.renderers.JSONRenderer / parsers.JSONParser to opt out.
+    'DEFAULT_RENDERER_CLASSES': [
+        'social_media_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'social_media_api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Feed timelines (fan-out-on-write, see posts/timelines.py)
+TIMELINE_MAX_LENGTH = 500
+# Authors with at least this many followers are pulled at read time instead of pushed
+FEED_PULL_FOLLOWER_THRESHOLD = 10000
+# Pulled authors are pushed again once below this many followers (`manage.py release_pull_authors`)
+FEED_PUSH_FOLLOWER_THRESHOLD = 8000
+
+# The in-memory follow graph (accounts/graph.py) replays follows logged by other
+# processes every FOLLOW_GRAPH_CHECK_INTERVAL seconds, and reloads in full every
+# FOLLOW_GRAPH_MAX_AGE seconds (None disables either)
+FOLLOW_GRAPH_CHECK_INTERVAL = 1
+FOLLOW_GRAPH_MAX_AGE = None
+
+# Friends-of-friends suggestions kept per user (`manage.py compute_suggestions`)
+SUGGESTION_TOP_K = 20
+
+# Number of newest comments embedded in each serialized post
+COMMENT_PREVIEW_SIZE = 3
+
+# Posts liked more than LIKE_SHARD_RATE_THRESHOLD times a minute spread their
+# like counter over LIKE_COUNTER_SHARDS rows (None disables sharding).
+# Run `manage.py fold_like_shards` periodically to fold them back.
+LIKE_COUNTER_SHARDS = 8
+LIKE_SHARD_RATE_THRESHOLD = 600
+# CACHES alias counting likes per post per minute. With a per-process cache
+# (LocMemCache, as configured above) each worker counts only the likes it
+# serves, so the threshold applies per process; use a shared cache to count
+# across workers.
+LIKE_RATE_CACHE = 'default'
+
+# Fold notifications sharing (recipient, verb, target) within this many seconds
+# into one row (None delivers one row per event); each keeps a sample of
+# NOTIFICATION_ACTOR_SAMPLE recent actors.
+NOTIFICATION_COALESCE_WINDOW = 3600
+NOTIFICATION_ACTOR_SAMPLE = 3
+
+# Full-text search backend for ?search= on posts, as a dotted path; None picks
+# one for the database vendor (see posts/search.py)
+POST_SEARCH_BACKEND = None
+
+# Live notification stream (GET /api/notifications/stream/, served under ASGI).
+# The broker tails new notifications every NOTIFICATION_STREAM_POLL_INTERVAL
+# seconds; idle streams get a comment line every NOTIFICATION_STREAM_HEARTBEAT.
+# Polls and reconnect replays read NOTIFICATION_FETCH_LIMIT rows per query.
+NOTIFICATION_BROKER = 'notifications.broker.InProcessBroker'
+NOTIFICATION_STREAM_POLL_INTERVAL = 1.0
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_FETCH_LIMIT = 500
+
+# Seconds a token-to-user lookup stays cached, and a miss for an unknown token
+# (see accounts/authentication.py)
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_NEGATIVE_CACHE_TTL = 10
+
+# Login password checks run in a pool of LOGIN_HASHER_WORKERS threads with up
+# to LOGIN_HASHER_QUEUE_DEPTH waiting; further logins get a 503 (see accounts/hashing.py)
+LOGIN_HASHER_WORKERS = 4
+LOGIN_HASHER_QUEUE_DEPTH = 32
+
+# Anonymous post list/detail responses are cached in this CACHES alias (set it
+# to None to disable the cache) for up to POST_RESPONSE_CACHE_TTL seconds. On a
+# miss other requests wait up to POST_RESPONSE_CACHE_LOCK_WAIT seconds for the
+# one computing it (see posts/response_cache.py).
+POST_RESPONSE_CACHE = 'post_responses'
+POST_RESPONSE_CACHE_TTL = 60
+POST_RESPONSE_CACHE_LOCK_TIMEOUT = 5
+POST_RESPONSE_CACHE_LOCK_WAIT = 0.5
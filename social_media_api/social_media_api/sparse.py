@@ -0,0 +1,100 @@
+"""Sparse fieldsets: ``?fields=`` and ``?exclude=`` on read endpoints.
+
+Both take comma-separated field names. A dotted name reaches into a nested
+serializer: ``?fields=id,title,author.username,created_at`` keeps only those
+four values, and ``?exclude=content,author.avatar`` drops two. A nested
+field named without a dot is kept or dropped whole.
+
+Serializers opt in with ``SparseFieldsetMixin`` and receive the parsed
+fieldset as the ``fieldset`` keyword. They pass the matching part of it on
+to nested serializers that opt in too. Views use ``only_columns()`` to load
+only the columns the trimmed serializer reads, and can skip prefetches for
+relations that were left out.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _parse(value):
+    tree = {}
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        node = tree
+        *parents, leaf = name.split('.')
+        for parent in parents:
+            # Naming a field whole wins over naming parts of it.
+            if node.get(parent) == {}:
+                break
+            node = node.setdefault(parent, {})
+        else:
+            node[leaf] = {}
+    return tree or None
+
+
+def parse_fieldset(query_params):
+    """Return (include tree, exclude tree) from a request's query parameters, or None when neither is given"""
+    fieldset = _parse(query_params.get('fields', '')), _parse(query_params.get('exclude', ''))
+    return fieldset if fieldset != (None, None) else None
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin keeping only the fields a parsed fieldset asks for"""
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        self.fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        include, exclude = self.fieldset or (None, None)
+        unknown = set(include or ()) | set(exclude or ())
+        unknown -= set(fields)
+        if unknown:
+            raise ValidationError({'fields': [f'Unknown field: {name}' for name in sorted(unknown)]})
+        for name in list(fields):
+            if (include is not None and name not in include) or (exclude and exclude.get(name) == {}):
+                del fields[name]
+            elif isinstance(fields[name], SparseFieldsetMixin):
+                fields[name].fieldset = self.fieldset_for(name)
+            elif self.fieldset_for(name) and not isinstance(fields[name], serializers.SerializerMethodField):
+                raise ValidationError({'fields': [f'{name} has no fields to select']})
+        return fields
+
+    def fieldset_for(self, name):
+        """The part of this serializer's fieldset that applies to its field ``name``, or None"""
+        include, exclude = self.fieldset or (None, None)
+        fieldset = (include or {}).get(name) or None, (exclude or {}).get(name) or None
+        return fieldset if fieldset != (None, None) else None
+
+
+def only_columns(serializer, prefix=''):
+    """Model lookups for ``QuerySet.only()`` covering what ``serializer`` reads, or None if unknown.
+
+    Nested serializers on foreign keys are followed (use them with
+    select_related). SerializerMethodFields read the columns listed for them
+    in the serializer's ``values_methods`` (see social_media_api.values), or none.
+    """
+    model = serializer.Meta.model
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            method_columns, _ = getattr(serializer, 'values_methods', {}).get(name, ((), None))
+            columns += [prefix + column for column in method_columns]
+            continue
+        if field.source == '*' or '.' in field.source:
+            return None
+        model_field = model._meta.get_field(field.source)
+        if not model_field.concrete:
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            nested = only_columns(field, f'{prefix}{field.source}__')
+            if nested is None:
+                return None
+            columns += [prefix + field.source, *nested]
+        else:
+            columns.append(prefix + field.source)
+    return list(dict.fromkeys(columns))
@@ -0,0 +1,170 @@
+"""Read-only values() fast path for ModelSerializer lists.
+
+Serializing a page the usual way builds a model instance per row (plus one
+per select_related object) and then walks the serializer's field objects
+for each of them. ``ValuesListSerializer`` compiles the serializer once
+into the exact ``values()`` lookups it reads, joins included, and a
+list of per-field getters, then turns each row dict straight into output.
+The output is identical to the regular serializer, because every field
+that changes its value on the way out still runs its own
+``to_representation``.
+
+Opt in with ``Meta.list_serializer_class = ValuesListSerializer``; it is
+used when a list serializer is given an unevaluated QuerySet. Supported
+fields are model columns, forward foreign keys as primary keys, and nested
+serializers on forward foreign keys that opt in themselves.
+``SerializerMethodField``s are supported when the serializer declares the
+columns they need in ``values_methods``::
+
+    values_methods = {'avatar': (['profile_picture_renditions'], 'get_avatar_from_values')}
+
+The method then receives those column values as positional arguments.
+A top-level ``SerializerMethodField`` that needs other rows (a preview of
+related objects, say) can instead be filled for a whole page at once from
+``values_page_methods``::
+
+    values_page_methods = {'comments': 'get_comments_from_values'}
+
+That method receives the page's row dicts and returns one value per row.
+Anything else raises ImproperlyConfigured rather than risk different output.
+"""
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Manager, QuerySet
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns a database value of the right type unchanged.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField)
+
+
+def _convert(column, to_representation):
+    def get(row):
+        value = row[column]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def _datetime(field):
+    """DateTimeField.to_representation with the output timezone looked up once instead of per value"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def to_representation(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+def _nested(pk_column, build):
+    def get(row):
+        return None if row[pk_column] is None else build(row)
+    return get
+
+
+def _placeholder(row):
+    # Filled in for the whole page by ValuesListSerializer.build.
+    return None
+
+
+def _method(method, columns):
+    def get(row):
+        return method(*[row[column] for column in columns])
+    return get
+
+
+def compile_serializer(serializer, prefix=''):
+    """Return (values() lookups, function building one output dict from a row)"""
+    model = serializer.Meta.model
+    columns = []
+    getters = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if not prefix and name in getattr(serializer, 'values_page_methods', {}):
+                getters.append((name, _placeholder))
+                continue
+            try:
+                method_columns, method_name = serializer.values_methods[name]
+            except (AttributeError, KeyError):
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{name} needs an entry in values_methods for the values() fast path'
+                )
+            lookups = [prefix + column for column in method_columns]
+            columns += lookups
+            getters.append((name, _method(getattr(serializer, method_name), lookups)))
+            continue
+        source = field.source
+        if source == '*' or '.' in source:
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{name}: source {source!r} is not a model field')
+        model_field = model._meta.get_field(source)
+        if not model_field.concrete:
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{name}: only forward relations are supported')
+        if isinstance(field, serializers.BaseSerializer):
+            nested_columns, build = compile_serializer(field, f'{prefix}{source}__')
+            pk_column = f'{prefix}{source}'
+            columns += [pk_column, *nested_columns]
+            getters.append((name, _nested(pk_column, build)))
+        elif type(field) in IDENTITY_FIELDS or (
+            isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None
+        ):
+            columns.append(prefix + source)
+            getters.append((name, itemgetter(prefix + source)))
+        elif isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{name}: only primary key relations are supported')
+        else:
+            to_representation = _datetime(field) if type(field) is serializers.DateTimeField else field.to_representation
+            columns.append(prefix + source)
+            getters.append((name, _convert(prefix + source, to_representation)))
+
+    def build(row):
+        return {name: get(row) for name, get in getters}
+
+    return list(dict.fromkeys(columns)), build
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    def compile(self):
+        if not hasattr(self, '_compiled'):
+            self._compiled = compile_serializer(self.child)
+        return self._compiled
+
+    def values(self, queryset, *extra):
+        """``queryset`` as the row dicts ``build`` expects, plus its pk and ``extra`` lookups (e.g. for a cursor)"""
+        columns, _ = self.compile()
+        return queryset.prefetch_related(None).values(*dict.fromkeys(['pk', *extra, *columns]))
+
+    def build(self, rows):
+        _, build = self.compile()
+        rows = list(rows)
+        data = [build(row) for row in rows]
+        for name, method_name in getattr(self.child, 'values_page_methods', {}).items():
+            if name in self.child.fields and rows:
+                for item, value in zip(data, getattr(self.child, method_name)(rows)):
+                    item[name] = value
+        return data
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        # An evaluated queryset already holds its instances; don't query again.
+        if isinstance(data, QuerySet) and data._result_cache is None:
+            return self.build(self.values(data))
+        return super().to_representation(data)
+
+
+def paginate_values(view, queryset, serializer, *extra):
+    """The values() rows, with ``extra`` lookups, of the page of ``queryset`` the request asks for
+
+    All of ``queryset`` when the view does not paginate.
+    """
+    if hasattr(view.paginator, 'ordering_field'):
+        extra = (view.paginator.ordering_field, *extra)
+    rows = view.paginate_queryset(serializer.values(queryset, *extra))
+    return list(serializer.values(queryset, *extra)) if rows is None else rows
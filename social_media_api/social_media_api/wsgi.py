@@ -1,16 +1,21 @@
-"""
-WSGI config for social_media_api project.
-
-It exposes the WSGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
-"""
-
-import os
-
-from django.core.wsgi import get_wsgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
-
-application = get_wsgi_application()
+"""
+WSGI config for social_media_api project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
+
+application = get_wsgi_application()
+
+# Load the follow graph before the first request (see accounts/graph.py).
+from accounts.graph import warm_start  # noqa: E402
+
+warm_start()